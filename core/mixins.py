@@ -0,0 +1,131 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+def parse_fields(value):
+    """``"id,nombre,llave_obj.nombre"`` -> ``{'id': None, 'nombre': None, 'llave_obj': {'nombre': None}}``."""
+    tree = {}
+    for item in value.split(','):
+        parts = [part.strip() for part in item.split('.')]
+        if not all(parts):
+            continue
+        node = tree
+        for part in parts[:-1]:
+            child = node.get(part, {})
+            if child is None:
+                break  # the whole object was already requested
+            node = node.setdefault(part, child)
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+def _nested(field):
+    return isinstance(field, serializers.BaseSerializer) and not isinstance(field, serializers.ListSerializer)
+
+
+def trim_fields(serializer, tree, prefix=''):
+    """Drop from ``serializer`` (and nested serializers) every field not in ``tree``."""
+    unknown = [prefix + name for name in tree if name not in serializer.fields]
+    if unknown:
+        raise ValidationError({'fields': f"Campos desconocidos: {', '.join(unknown)}"})
+    for name in list(serializer.fields):
+        if name not in tree:
+            serializer.fields.pop(name)
+        elif tree[name]:
+            field = serializer.fields[name]
+            if not _nested(field):
+                raise ValidationError({'fields': f"El campo {prefix + name} no tiene subcampos."})
+            trim_fields(field, tree[name], f'{prefix}{name}.')
+
+
+def query_paths(serializer, model, prefix=''):
+    """Columns and joins the fields left in ``serializer`` read.
+
+    Returns ``(only, select_related)`` lookups, or ``None`` when a field reads
+    something that cannot be told from its source (a method field without a
+    ``Meta.field_paths`` entry, a property, a reverse relation...), in which
+    case the queryset is left alone.
+    """
+    only, related = set(), set()
+    declared = getattr(getattr(serializer, 'Meta', None), 'field_paths', {})
+    for name, field in serializer.fields.items():
+        if field.source == '*':
+            if name not in declared:
+                return None
+            for path in declared[name]:
+                parts = path.split('__')
+                only.add(prefix + path)
+                related.update(prefix + '__'.join(parts[:end]) for end in range(1, len(parts)))
+            continue
+        current, path = model, []
+        for attr in field.source_attrs:
+            if current is None:
+                return None
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                return None
+            if model_field.is_relation and not (model_field.many_to_one or model_field.one_to_one):
+                return None
+            if model_field.is_relation and not model_field.concrete:
+                return None
+            path.append(attr)
+            current = model_field.related_model if model_field.is_relation else None
+            if current is not None and len(path) < len(field.source_attrs):
+                related.add(prefix + '__'.join(path))
+        lookup = prefix + '__'.join(path)
+        if current is None:
+            only.add(lookup)
+        elif _nested(field):
+            paths = query_paths(field, current, lookup + '__')
+            if paths is None:
+                return None
+            related.add(lookup)
+            only.update(paths[0])
+            related.update(paths[1])
+        elif isinstance(field, serializers.PrimaryKeyRelatedField):
+            only.add(lookup)  # just the foreign key column
+        else:
+            return None
+    return only, related
+
+
+class SparseFieldsMixin:
+    """``?fields=`` for read requests: trims the serializer and the query behind it.
+
+    ``?fields=id,nombre,llave_obj.nombre`` keeps only those fields (dotted
+    names reach into nested serializers), and the queryset is narrowed with
+    ``.only()`` and ``select_related()`` to what those fields read, so a page
+    that shows three columns does not load every column and join. Method fields
+    list the lookups they read in the serializer's ``Meta.field_paths``.
+    """
+    fields_query_param = 'fields'
+
+    def get_requested_fields(self):
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return None
+        value = request.query_params.get(self.fields_query_param)
+        return parse_fields(value) if value else None
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        tree = self.get_requested_fields()
+        if tree:
+            trim_fields(getattr(serializer, 'child', serializer), tree)
+        return serializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        tree = self.get_requested_fields()
+        if not tree:
+            return queryset
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        trim_fields(serializer, tree)
+        paths = query_paths(serializer, queryset.model)
+        if paths is None:
+            return queryset
+        only, related = paths
+        return queryset.select_related(None).select_related(*sorted(related)).only('pk', *sorted(only))
@@ -0,0 +1,43 @@
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination
+
+
+class OptionalCursorPagination(CursorPagination):
+    """Cursor pagination that only applies when the client asks for it.
+
+    Requests with ``?page_size=`` or ``?cursor=`` get ``{next, previous,
+    results}`` pages; requests without them keep receiving the full list, so
+    selects and older screens that expect an array keep working.
+
+    The cursor follows the view's ``OrderingFilter`` when it has one, otherwise
+    the queryset or model ordering, with the primary key appended so rows that
+    share a value always come back in the same order.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.page_size_query_param in params or self.cursor_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        loaded, deferred = queryset.query.deferred_loading
+        if loaded and not deferred:
+            # The cursor reads the ordering fields from every row; keep them in .only().
+            ordering = self.get_ordering(request, queryset, view)
+            queryset = queryset.only(*loaded, *(name.lstrip('-') for name in ordering))
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        backends = getattr(view, 'filter_backends', None) or []
+        if any(issubclass(backend, OrderingFilter) for backend in backends):
+            ordering = list(super().get_ordering(request, queryset, view))
+        else:
+            ordering = list(queryset.query.order_by or queryset.model._meta.ordering or ['-pk'])
+        pk_name = queryset.model._meta.pk.name
+        if not any(name.lstrip('-') in ('pk', pk_name) for name in ordering):
+            ordering.append('-pk' if ordering[0].startswith('-') else 'pk')
+        return tuple(ordering)
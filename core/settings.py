@@ -145,3 +145,81 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Printer SNMP polling (impresoras app)
+
+# Maximum number of printers polled at the same time by a fleet refresh.
+PRINTER_POLL_CONCURRENCY = 32
+
+# Seconds a whole fleet refresh may take before pending printers are abandoned.
+PRINTER_POLL_DEADLINE = 60
+
+# Background monitor (manage.py monitor_printers): seconds between polls of a
+# printer, random spread as a fraction of that interval, and the longest delay
+# an unreachable printer backs off to.
+PRINTER_MONITOR_INTERVAL = 300
+PRINTER_MONITOR_JITTER = 0.1
+PRINTER_MONITOR_MAX_BACKOFF = 3600
+
+# Days of printer level history kept at each resolution.
+PRINTER_HISTORY_RAW_DAYS = 14
+PRINTER_HISTORY_HOURLY_DAYS = 120
+PRINTER_HISTORY_DAILY_DAYS = 730
+
+# Half-life in days of the weight given to old readings in toner depletion fits.
+PRINTER_FORECAST_HALF_LIFE_DAYS = 30
+
+# Circuit breaker: after this many consecutive failed polls a printer only gets
+# a one-second sysUpTime probe until the cool-down (seconds) has passed.
+PRINTER_BREAKER_THRESHOLD = 3
+PRINTER_BREAKER_COOLDOWN = 900
+
+# Printer discovery (manage.py discover_printers, POST /api/printers/discover/):
+# CIDR ranges swept, communities tried on each address and the most SNMP
+# probes started per second.
+PRINTER_DISCOVERY_RANGES = []
+PRINTER_DISCOVERY_COMMUNITIES = ["public"]
+PRINTER_DISCOVERY_RATE = 200
+
+# Toner levels (percent) below which a printer counts as low / critical in the
+# fleet summary (GET /api/printers/summary/) and raises a toner alert.
+PRINTER_TONER_THRESHOLDS = {"low": 20, "critical": 5}
+
+# Printer alerts: consecutive polls a condition must hold (or be gone) before it
+# is raised (or cleared), outbox batch size and delivery attempts, days
+# dispatched events are kept, and optional e-mail / webhook destinations for
+# manage.py dispatch_printer_alerts.
+PRINTER_ALERT_DEBOUNCE = 2
+PRINTER_ALERT_BATCH_SIZE = 100
+PRINTER_ALERT_MAX_ATTEMPTS = 5
+PRINTER_ALERT_RETENTION_DAYS = 30
+PRINTER_ALERT_EMAILS = []
+PRINTER_ALERT_WEBHOOK_URL = ""
+
+# Worker processes used by manage.py monitor_printers; above 1 the fleet is
+# split between them by consistent hash and a supervisor stores the results.
+PRINTER_POLL_WORKERS = 1
+
+# Poll results are stored in batches: at most this many per transaction, and
+# no result waits longer than the flush interval (seconds) to be written.
+PRINTER_WRITE_BATCH_SIZE = 100
+PRINTER_WRITE_FLUSH_INTERVAL = 1.0
+
+# Refresh jobs run in a thread of the web worker that started them; a queued or
+# running job whose heartbeat is older than this many seconds (its worker died
+# or was recycled) is marked as failed.
+PRINTER_JOB_STALE_AFTER = 60
+
+# Seconds GET /api/funcionarios/estadisticas/ results stay cached. Entries are
+# keyed by a signature of the funcionario and structure tables, so any write
+# makes them stale right away.
+FUNCIONARIOS_ESTADISTICAS_TTL = 300
+
+# Telephone extension (anexo) ranges handed out from the extension map, as
+# inclusive (first, last) pairs.
+FUNCIONARIOS_ANEXO_RANGOS = [(400, 600)]
+
+# Rows validated and written per batch by the funcionario import
+# (POST /api/funcionarios/importar/, manage.py importar_funcionarios).
+FUNCIONARIOS_IMPORT_BATCH_SIZE = 500
@@ -1,7 +1,11 @@
 from rest_framework import viewsets
+
+from core.mixins import SparseFieldsMixin
+from core.pagination import OptionalCursorPagination
 from .models import Establecimiento
 from .serializers import EstablecimientoSerializer
 
-class EstablecimientoViewSet(viewsets.ModelViewSet):
+class EstablecimientoViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Establecimiento.objects.all()
     serializer_class = EstablecimientoSerializer
+    pagination_class = OptionalCursorPagination
@@ -3,6 +3,10 @@ import { Phone, Search, X, Check, AlertCircle, Info, User, Building, Trash2, Arr
 import { motion, AnimatePresence } from 'framer-motion';
 import api from '../../api';
 
+// Opciones del select de asignación: se buscan en el servidor, no se cargan todos los funcionarios
+const FUNCIONARIO_FIELDS = 'id,nombre_funcionario,rut,anexo';
+const FUNCIONARIO_PAGE_SIZE = 20;
+
 const ControlAnexos = ({ isOpen, onClose }) => {
     const [data, setData] = useState(null);
     const [loading, setLoading] = useState(true);
@@ -12,6 +16,7 @@ const ControlAnexos = ({ isOpen, onClose }) => {
     const [funcionarioSearch, setFuncionarioSearch] = useState('');
     const [message, setMessage] = useState(null);
     const [confirmDialog, setConfirmDialog] = useState(null);
+    const [funcionarioOptions, setFuncionarioOptions] = useState([]);
 
     useEffect(() => {
         if (isOpen) {
@@ -54,7 +59,7 @@ const ControlAnexos = ({ isOpen, onClose }) => {
             return;
         }
 
-        const funcionario = data.funcionarios_activos.find(f => f.id == selectedFuncionarioId);
+        const funcionario = funcionarioOptions.find(f => f.id == selectedFuncionarioId);
         if (funcionario && funcionario.anexo && funcionario.anexo !== String(selectedAnexo)) {
             setConfirmDialog({
                 message: `${funcionario.nombre_funcionario} ya tiene el anexo ${funcionario.anexo}. ¿Deseas reemplazarlo por ${selectedAnexo}?`,
@@ -96,17 +101,33 @@ const ControlAnexos = ({ isOpen, onClose }) => {
         }
     };
 
-    const filteredFuncionarios = data?.funcionarios_activos.filter(f =>
-        f.nombre_funcionario.toLowerCase().includes(funcionarioSearch.toLowerCase()) ||
-        f.rut.includes(funcionarioSearch)
-    ) || [];
+    useEffect(() => {
+        // Solo hace falta buscar funcionarios cuando se está asignando un anexo libre
+        if (!selectedAnexo || occupiedMap[selectedAnexo]) return;
+        const timer = setTimeout(() => {
+            api.get('funcionarios/', {
+                params: {
+                    activos: 'true',
+                    fields: FUNCIONARIO_FIELDS,
+                    page_size: FUNCIONARIO_PAGE_SIZE,
+                    search: funcionarioSearch || undefined
+                }
+            })
+                .then(res => setFuncionarioOptions(res.data.results))
+                .catch(console.error);
+        }, funcionarioSearch ? 300 : 0);
+        return () => clearTimeout(timer);
+    }, [selectedAnexo, occupiedMap, funcionarioSearch]);
 
-    // Generar el grid de 400 a 600
+    // Generar el grid con los anexos de todos los rangos
     const gridItems = useMemo(() => {
         if (!data) return [];
+        // Uno o más rangos habilitados, cada uno como [min, max]
         const items = [];
-        for (let i = data.anexo_min; i <= data.anexo_max; i++) {
-            items.push(i);
+        for (const [min, max] of data.rangos) {
+            for (let i = min; i <= max; i++) {
+                items.push(i);
+            }
         }
         return items;
     }, [data]);
@@ -303,7 +324,7 @@ const ControlAnexos = ({ isOpen, onClose }) => {
                                                         className="w-full mt-1.5 px-4 py-3 bg-gray-50 border-none rounded-2xl text-sm focus:ring-2 focus:ring-blue-100 appearance-none cursor-pointer font-medium"
                                                     >
                                                         <option value="">-- Elige un funcionario --</option>
-                                                        {filteredFuncionarios.map(func => (
+                                                        {funcionarioOptions.map(func => (
                                                             <option key={func.id} value={func.id}>
                                                                 {func.nombre_funcionario} ({func.rut})
                                                             </option>
@@ -11,10 +11,8 @@ const FuncionarioForm = () => {
     const [loading, setLoading] = useState(false);
     const [errors, setErrors] = useState({});
 
-    // Opciones para selects
-    const [subdirecciones, setSubdirecciones] = useState([]);
-    const [departamentos, setDepartamentos] = useState([]);
-    const [unidades, setUnidades] = useState([]);
+    // Árbol organizacional completo; los selects dependientes se derivan de él
+    const [arbol, setArbol] = useState([]);
 
     // Form data
     const [formData, setFormData] = useState({
@@ -29,18 +27,18 @@ const FuncionarioForm = () => {
     });
 
     useEffect(() => {
-        fetchSubdirecciones();
+        fetchArbol();
         if (id) {
             fetchFuncionario();
         }
     }, [id]);
 
-    const fetchSubdirecciones = async () => {
+    const fetchArbol = async () => {
         try {
-            const response = await api.get('subdirecciones/');
-            setSubdirecciones(response.data);
+            const response = await api.get('org-tree/');
+            setArbol(response.data);
         } catch (error) {
-            console.error('Error fetching subdirecciones:', error);
+            console.error('Error fetching org-tree:', error);
         }
     };
 
@@ -48,38 +46,16 @@ const FuncionarioForm = () => {
         try {
             const response = await api.get(`funcionarios/${id}/`);
             setFormData(response.data);
-
-            // Cargar departamentos y unidades si existen
-            if (response.data.subdireccion) {
-                await fetchDepartamentos(response.data.subdireccion);
-            }
-            if (response.data.departamento) {
-                await fetchUnidades(response.data.departamento);
-            }
         } catch (error) {
             console.error('Error fetching funcionario:', error);
         }
     };
 
-    const fetchDepartamentos = async (subdireccionId) => {
-        try {
-            const response = await api.get(`departamentos/?subdireccion=${subdireccionId}`);
-            setDepartamentos(response.data);
-        } catch (error) {
-            console.error('Error fetching departamentos:', error);
-        }
-    };
-
-    const fetchUnidades = async (departamentoId) => {
-        try {
-            const response = await api.get(`unidades/?departamento=${departamentoId}`);
-            setUnidades(response.data);
-        } catch (error) {
-            console.error('Error fetching unidades:', error);
-        }
-    };
+    const subdirecciones = arbol;
+    const departamentos = arbol.find(sub => String(sub.id) === String(formData.subdireccion))?.departamentos || [];
+    const unidades = departamentos.find(dept => String(dept.id) === String(formData.departamento))?.unidades || [];
 
-    const handleSubdireccionChange = async (e) => {
+    const handleSubdireccionChange = (e) => {
         const subdireccionId = e.target.value;
         setFormData({
             ...formData,
@@ -87,26 +63,15 @@ const FuncionarioForm = () => {
             departamento: '',
             unidad: ''
         });
-        setDepartamentos([]);
-        setUnidades([]);
-
-        if (subdireccionId) {
-            await fetchDepartamentos(subdireccionId);
-        }
     };
 
-    const handleDepartamentoChange = async (e) => {
+    const handleDepartamentoChange = (e) => {
         const departamentoId = e.target.value;
         setFormData({
             ...formData,
             departamento: departamentoId,
             unidad: ''
         });
-        setUnidades([]);
-
-        if (departamentoId) {
-            await fetchUnidades(departamentoId);
-        }
     };
 
     const handleRutChange = (e) => {
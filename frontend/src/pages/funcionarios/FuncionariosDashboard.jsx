@@ -14,20 +14,14 @@ const FuncionariosDashboard = () => {
 
     const fetchStats = async () => {
         try {
-            const [funcionariosRes, subdireccionesRes, departamentosRes, unidadesRes, estadisticasRes] = await Promise.all([
-                api.get('funcionarios/'),
-                api.get('subdirecciones/'),
-                api.get('departamentos/'),
-                api.get('unidades/'),
-                api.get('funcionarios/estadisticas/')
-            ]);
+            // Una sola llamada: los conteos de la estructura vienen en las estadísticas
+            const { data } = await api.get('funcionarios/estadisticas/');
 
             setStats({
-                funcionarios: funcionariosRes.data.length,
-                subdirecciones: subdireccionesRes.data.length,
-                departamentos: departamentosRes.data.length,
-                unidades: unidadesRes.data.length,
-                estadisticas: estadisticasRes.data
+                subdirecciones: data.estructura.subdirecciones,
+                departamentos: data.estructura.departamentos,
+                unidades: data.estructura.unidades,
+                estadisticas: data
             });
         } catch (error) {
             console.error('Error fetching stats:', error);
@@ -19,12 +19,15 @@ const Unidades = () => {
 
     const fetchData = async () => {
         try {
-            const [unidRes, deptRes] = await Promise.all([
+            const [unidRes, arbolRes] = await Promise.all([
                 api.get('unidades/'),
-                api.get('departamentos/')
+                api.get('org-tree/')
             ]);
             setUnidades(unidRes.data);
-            setDepartamentos(deptRes.data);
+            // Opciones del select: departamentos del árbol con el nombre de su subdirección
+            setDepartamentos(arbolRes.data.flatMap(sub =>
+                sub.departamentos.map(dept => ({ ...dept, subdireccion_nombre: sub.nombre }))
+            ));
         } catch (error) {
             console.error('Error fetching data:', error);
         } finally {
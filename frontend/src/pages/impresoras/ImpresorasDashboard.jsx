@@ -3,6 +3,9 @@ import { motion, AnimatePresence } from 'framer-motion';
 import { Printer, RefreshCw, AlertTriangle, CheckCircle, Search, Filter, Droplet, MapPin, Hash, Activity } from 'lucide-react';
 import api from '../../api';
 
+// Milliseconds between polls of a running fleet refresh.
+const REFRESH_POLL_INTERVAL = 1000;
+
 const PrinterCard = ({ printer, onRefresh }) => {
     const [refreshing, setRefreshing] = useState(false);
 
@@ -149,12 +152,24 @@ const ImpresorasDashboard = () => {
     const [printers, setPrinters] = useState([]);
     const [loading, setLoading] = useState(true);
     const [refreshingAll, setRefreshingAll] = useState(false);
+    const [refreshProgress, setRefreshProgress] = useState(null);
     const [filter, setFilter] = useState('all'); // all, error, low-toner, offline
+    const [summary, setSummary] = useState(null);
 
     useEffect(() => {
         fetchPrinters();
+        fetchSummary();
     }, []);
 
+    const fetchSummary = async () => {
+        try {
+            const response = await api.get('printers/summary/');
+            setSummary(response.data);
+        } catch (error) {
+            console.error("Error fetching printer summary:", error);
+        }
+    };
+
     const fetchPrinters = async () => {
         try {
             const response = await api.get('printers/');
@@ -169,9 +184,10 @@ const ImpresorasDashboard = () => {
     const handleRefreshPrinter = async (id) => {
         try {
             const response = await api.post(`printers/${id}/refresh/`);
-            if (response.data.success) {
+            if (response.data.printer) {
                 setPrinters(prev => prev.map(p => p.id === id ? response.data.printer : p));
             }
+            fetchSummary();
         } catch (error) {
             console.error("Error refreshing printer:", error);
         }
@@ -180,25 +196,45 @@ const ImpresorasDashboard = () => {
     const handleRefreshAll = async () => {
         setRefreshingAll(true);
         try {
-            // Note: In a real scenario with many printers, this might timeout or take long.
-            // Ideally we'd trigger a background job or handle it one by one.
-            // For now given the legacy code did it synchronously-ish (asyncio loop but one http request wait), we'll do:
-            await api.post('printers/refresh_all/');
-            await fetchPrinters();
+            // The backend queues the refresh; its results are polled as they are written.
+            const { data: job } = await api.post('printers/refresh_all/');
+            setRefreshProgress({ done: 0, total: job.total });
+            let after = 0;
+            while (true) {
+                const { data } = await api.get(`printers/refresh_jobs/${job.job_id}/`, { params: { after } });
+                for (const result of data.results) {
+                    after = result.seq;
+                    if (result.printer) {
+                        setPrinters(prev => prev.map(p => p.id === result.printer.id ? result.printer : p));
+                    }
+                }
+                if (data.results.length) {
+                    setRefreshProgress(prev => ({ ...prev, done: prev.done + data.results.length }));
+                }
+                if (data.status === 'done' || data.status === 'failed') {
+                    if (data.status === 'failed') console.error("Refresh job failed:", data.message);
+                    break;
+                }
+                await new Promise(resolve => setTimeout(resolve, REFRESH_POLL_INTERVAL));
+            }
         } catch (error) {
             console.error("Error refreshing all:", error);
+            await fetchPrinters();
         } finally {
             setRefreshingAll(false);
+            setRefreshProgress(null);
+            fetchSummary();
         }
     };
 
+    const lowThreshold = summary?.toner?.low?.threshold ?? 20;
+
     const filteredPrinters = printers.filter(p => {
         if (filter === 'all') return true;
         if (filter === 'error') return (p.last_errors && p.last_errors.length > 0) || (!p.last_ok && p.last_check);
         if (filter === 'offline') return !p.last_ok && p.last_check;
-        // Simple low toner check < 10%
         if (filter === 'low-toner') {
-            const low = (val) => val !== null && val < 20;
+            const low = (val) => val !== null && val < lowThreshold;
             return low(p.toner.black) || low(p.toner.cyan) || low(p.toner.magenta) || low(p.toner.yellow);
         }
         return true;
@@ -218,7 +254,11 @@ const ImpresorasDashboard = () => {
                         className="flex items-center gap-2 bg-blue-600 text-white px-4 py-2 rounded-xl hover:bg-blue-700 transition-colors shadow-lg shadow-blue-600/20 disabled:opacity-70 disabled:cursor-not-allowed"
                     >
                         <RefreshCw className={`w-4 h-4 ${refreshingAll ? 'animate-spin' : ''}`} />
-                        <span>{refreshingAll ? 'Actualizando...' : 'Actualizar Todo'}</span>
+                        <span>
+                            {refreshingAll
+                                ? (refreshProgress ? `Actualizando ${refreshProgress.done}/${refreshProgress.total}...` : 'Actualizando...')
+                                : 'Actualizar Todo'}
+                        </span>
                     </button>
                     {/* Add Printer button could go here */}
                 </div>
@@ -227,14 +267,11 @@ const ImpresorasDashboard = () => {
             {/* Filters */}
             <div className="flex items-center gap-2 overflow-x-auto pb-2">
                 {[
-                    { id: 'all', label: 'Todos', count: printers.length },
-                    { id: 'error', label: 'Con Errores', count: printers.filter(p => (p.last_errors && p.last_errors.length > 0) || (!p.last_ok && p.last_check)).length, color: 'text-red-500' },
-                    {
-                        id: 'low-toner', label: 'Toner Bajo (<20%)', count: printers.filter(p => {
-                            const low = (val) => val !== null && val < 20;
-                            return low(p.toner.black) || low(p.toner.cyan) || low(p.toner.magenta) || low(p.toner.yellow);
-                        }).length, color: 'text-yellow-500'
-                    }
+                    // Counts come from the precomputed fleet summary, not from scanning the list.
+                    { id: 'all', label: 'Todos', count: summary?.total ?? printers.length },
+                    { id: 'error', label: 'Con Errores', count: summary?.with_errors ?? '-', color: 'text-red-500' },
+                    { id: 'offline', label: 'Sin Conexión', count: summary?.offline ?? '-', color: 'text-slate-500' },
+                    { id: 'low-toner', label: `Toner Bajo (<${lowThreshold}%)`, count: summary?.toner?.low?.printers ?? '-', color: 'text-yellow-500' }
                 ].map(f => (
                     <button
                         key={f.id}
@@ -2,25 +2,46 @@ import React, { useState, useEffect } from 'react';
 import api from '../../api';
 import { Search, Calendar, FileText, CheckCircle, Clock } from 'lucide-react';
 
+// Solo los campos que muestra la tabla; el historial se carga por páginas
+const LOAN_FIELDS = [
+    'id', 'fecha_prestamo', 'fecha_devolucion',
+    'llave_obj.nombre', 'llave_obj.establecimiento_nombre',
+    'solicitante_obj.nombre', 'solicitante_obj.apellido', 'solicitante_obj.rut'
+].join(',');
+const PAGE_SIZE = 50;
+
 const LoanHistory = () => {
     const [loans, setLoans] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [searchTerm, setSearchTerm] = useState('');
 
     useEffect(() => {
-        // Fetch all loans (no active filter)
-        api.get('prestamos/')
-            .then(res => setLoans(res.data))
-            .catch(console.error)
-            .finally(() => setLoading(false));
-    }, []);
+        // La búsqueda se hace en el servidor, con una pausa mientras se escribe
+        setLoading(true);
+        const timer = setTimeout(() => {
+            api.get('prestamos/', { params: { fields: LOAN_FIELDS, page_size: PAGE_SIZE, search: searchTerm || undefined } })
+                .then(res => {
+                    setLoans(res.data.results);
+                    setNextPage(res.data.next);
+                })
+                .catch(console.error)
+                .finally(() => setLoading(false));
+        }, searchTerm ? 300 : 0);
+        return () => clearTimeout(timer);
+    }, [searchTerm]);
 
-    const filteredLoans = loans.filter(loan =>
-        loan.llave_obj?.nombre?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        loan.solicitante_obj?.nombre?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        loan.solicitante_obj?.apellido?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        loan.llave_obj?.establecimiento_nombre?.toLowerCase().includes(searchTerm.toLowerCase())
-    );
+    const loadMore = () => {
+        setLoadingMore(true);
+        api.get(nextPage)
+            .then(res => {
+                setLoans(prev => [...prev, ...res.data.results]);
+                setNextPage(res.data.next);
+            })
+            .catch(console.error)
+            .finally(() => setLoadingMore(false));
+    };
 
     const formatDate = (dateString) => {
         if (!dateString) return '-';
@@ -60,7 +81,7 @@ const LoanHistory = () => {
                         </tr>
                     </thead>
                     <tbody className="divide-y divide-slate-100">
-                        {filteredLoans.map(loan => (
+                        {loans.map(loan => (
                             <tr key={loan.id} className="hover:bg-slate-50 transition-colors">
                                 <td className="p-3">
                                     {loan.fecha_devolucion ? (
@@ -91,12 +112,23 @@ const LoanHistory = () => {
                         ))}
                     </tbody>
                 </table>
-                {filteredLoans.length === 0 && !loading && (
+                {loans.length === 0 && !loading && (
                     <div className="p-12 text-center text-slate-400">
                         <FileText className="w-12 h-12 mx-auto mb-3 opacity-20" />
                         <p>No se encontraron registros.</p>
                     </div>
                 )}
+                {nextPage && !loading && (
+                    <div className="p-4 border-t border-slate-100 text-center">
+                        <button
+                            onClick={loadMore}
+                            disabled={loadingMore}
+                            className="px-4 py-2 text-sm font-medium text-blue-600 hover:bg-blue-50 rounded-lg transition-colors disabled:opacity-50"
+                        >
+                            {loadingMore ? 'Cargando...' : 'Cargar más'}
+                        </button>
+                    </div>
+                )}
             </div>
         </div>
     );
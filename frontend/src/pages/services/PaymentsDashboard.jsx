@@ -4,8 +4,17 @@ import { DollarSign, Search, Plus, Edit2, Trash2, X, Save, Building2, Calendar,
 import { motion, AnimatePresence } from 'framer-motion';
 import DateInput from '../../components/common/DateInput';
 
+// Campos que usan la tabla y el formulario de edición; los pagos se cargan por páginas
+const PAYMENT_FIELDS = [
+    'id', 'servicio', 'establecimiento', 'servicio_detalle', 'establecimiento_nombre',
+    'fecha_emision', 'fecha_vencimiento', 'fecha_pago', 'nro_documento', 'monto_interes', 'monto_total'
+].join(',');
+const PAGE_SIZE = 50;
+
 const PaymentsDashboard = () => {
     const [payments, setPayments] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [services, setServices] = useState([]);
     const [establishments, setEstablishments] = useState([]);
     const [loading, setLoading] = useState(true);
@@ -30,25 +39,54 @@ const PaymentsDashboard = () => {
     const fetchData = async () => {
         setLoading(true);
         try {
-            const [payRes, servRes, estRes] = await Promise.all([
-                api.get('registros-pagos/'),
-                api.get('servicios/'),
-                api.get('establecimientos/')
+            const payRes = await api.get('registros-pagos/', {
+                params: { fields: PAYMENT_FIELDS, page_size: PAGE_SIZE, search: searchTerm || undefined }
+            });
+            setPayments(payRes.data.results);
+            setNextPage(payRes.data.next);
+        } catch (error) {
+            console.error("Error fetching data:", error);
+        } finally {
+            setLoading(false);
+        }
+    };
+
+    const fetchOptions = async () => {
+        try {
+            const [servRes, estRes] = await Promise.all([
+                api.get('servicios/', { params: { fields: 'id,establecimiento,proveedor_nombre,numero_cliente' } }),
+                api.get('establecimientos/', { params: { fields: 'id,nombre' } })
             ]);
-            setPayments(payRes.data);
             setServices(servRes.data);
             setEstablishments(estRes.data);
         } catch (error) {
             console.error("Error fetching data:", error);
+        }
+    };
+
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const res = await api.get(nextPage);
+            setPayments(prev => [...prev, ...res.data.results]);
+            setNextPage(res.data.next);
+        } catch (error) {
+            console.error("Error fetching data:", error);
         } finally {
-            setLoading(false);
+            setLoadingMore(false);
         }
     };
 
     useEffect(() => {
-        fetchData();
+        fetchOptions();
     }, []);
 
+    useEffect(() => {
+        // La búsqueda se hace en el servidor, con una pausa mientras se escribe
+        const timer = setTimeout(fetchData, searchTerm ? 300 : 0);
+        return () => clearTimeout(timer);
+    }, [searchTerm]);
+
     const handleEdit = (item) => {
         setFormData({
             servicio: item.servicio,
@@ -99,12 +137,6 @@ const PaymentsDashboard = () => {
         }
     };
 
-    const filteredData = payments.filter(item =>
-        item.nro_documento.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        item.servicio_detalle?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        item.establecimiento_nombre?.toLowerCase().includes(searchTerm.toLowerCase())
-    );
-
     // Format currency (CLP)
     const formatCurrency = (amount) => {
         return new Intl.NumberFormat('es-CL', { style: 'currency', currency: 'CLP' }).format(amount);
@@ -351,7 +383,7 @@ const PaymentsDashboard = () => {
                         </tr>
                     </thead>
                     <tbody className="divide-y divide-slate-100">
-                        {filteredData.map(item => (
+                        {payments.map(item => (
                             <tr key={item.id} className="hover:bg-slate-50 transition-colors">
                                 <td className="p-3">
                                     <div className="flex items-center gap-2 text-sm text-slate-700 font-medium">
@@ -390,12 +422,23 @@ const PaymentsDashboard = () => {
                         ))}
                     </tbody>
                 </table>
-                {filteredData.length === 0 && !loading && (
+                {payments.length === 0 && !loading && (
                     <div className="p-12 text-center text-slate-400">
                         <DollarSign className="w-12 h-12 mx-auto mb-3 opacity-20" />
                         <p>No se encontraron pagos registrados.</p>
                     </div>
                 )}
+                {nextPage && !loading && (
+                    <div className="p-4 border-t border-slate-100 text-center">
+                        <button
+                            onClick={loadMore}
+                            disabled={loadingMore}
+                            className="px-4 py-2 text-sm font-medium text-blue-600 hover:bg-blue-50 rounded-lg transition-colors disabled:opacity-50"
+                        >
+                            {loadingMore ? 'Cargando...' : 'Cargar más'}
+                        </button>
+                    </div>
+                )}
             </div>
         </div>
     );
@@ -3,6 +3,10 @@ import { Phone, Search, Check, AlertCircle, Info, User, Building, Trash2, ArrowR
 import { motion, AnimatePresence } from 'framer-motion';
 import api from '../../api';
 
+// Opciones del select de asignación: se buscan en el servidor, no se cargan todos los funcionarios
+const FUNCIONARIO_FIELDS = 'id,nombre_funcionario,rut,anexo';
+const FUNCIONARIO_PAGE_SIZE = 20;
+
 const AnexosDashboard = () => {
     const [data, setData] = useState(null);
     const [loading, setLoading] = useState(true);
@@ -12,6 +16,7 @@ const AnexosDashboard = () => {
     const [funcionarioSearch, setFuncionarioSearch] = useState('');
     const [message, setMessage] = useState(null);
     const [confirmDialog, setConfirmDialog] = useState(null);
+    const [funcionarioOptions, setFuncionarioOptions] = useState([]);
 
     useEffect(() => {
         fetchData();
@@ -51,7 +56,7 @@ const AnexosDashboard = () => {
             return;
         }
 
-        const funcionario = data.funcionarios_activos.find(f => f.id == selectedFuncionarioId);
+        const funcionario = funcionarioOptions.find(f => f.id == selectedFuncionarioId);
         if (funcionario && funcionario.anexo && funcionario.anexo !== String(selectedAnexo)) {
             setConfirmDialog({
                 message: `${funcionario.nombre_funcionario} ya tiene el anexo ${funcionario.anexo}. ¿Deseas reemplazarlo por ${selectedAnexo}?`,
@@ -93,16 +98,32 @@ const AnexosDashboard = () => {
         }
     };
 
-    const filteredFuncionarios = data?.funcionarios_activos.filter(f =>
-        f.nombre_funcionario.toLowerCase().includes(funcionarioSearch.toLowerCase()) ||
-        f.rut.includes(funcionarioSearch)
-    ) || [];
+    useEffect(() => {
+        // Solo hace falta buscar funcionarios cuando se está asignando un anexo libre
+        if (!selectedAnexo || occupiedMap[selectedAnexo]) return;
+        const timer = setTimeout(() => {
+            api.get('funcionarios/', {
+                params: {
+                    activos: 'true',
+                    fields: FUNCIONARIO_FIELDS,
+                    page_size: FUNCIONARIO_PAGE_SIZE,
+                    search: funcionarioSearch || undefined
+                }
+            })
+                .then(res => setFuncionarioOptions(res.data.results))
+                .catch(console.error);
+        }, funcionarioSearch ? 300 : 0);
+        return () => clearTimeout(timer);
+    }, [selectedAnexo, occupiedMap, funcionarioSearch]);
 
     const gridItems = useMemo(() => {
         if (!data) return [];
+        // Uno o más rangos habilitados, cada uno como [min, max]
         const items = [];
-        for (let i = data.anexo_min; i <= data.anexo_max; i++) {
-            items.push(i);
+        for (const [min, max] of data.rangos) {
+            for (let i = min; i <= max; i++) {
+                items.push(i);
+            }
         }
         return items;
     }, [data]);
@@ -298,7 +319,7 @@ const AnexosDashboard = () => {
                                                         className="w-full px-5 py-4 bg-gray-50 border-none rounded-2xl text-md font-bold focus:ring-4 focus:ring-blue-50 appearance-none cursor-pointer shadow-inner pr-12"
                                                     >
                                                         <option value="">-- Elige un funcionario --</option>
-                                                        {filteredFuncionarios.map(func => (
+                                                        {funcionarioOptions.map(func => (
                                                             <option key={func.id} value={func.id}>
                                                                 {func.nombre_funcionario}
                                                             </option>
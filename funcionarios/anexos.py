@@ -0,0 +1,227 @@
+"""
+Asignación de anexos telefónicos.
+
+Los anexos habilitados son los rangos de ``FUNCIONARIOS_ANEXO_RANGOS``. La
+ocupación se lleva en un mapa de bits (un entero de Python, un bit por anexo)
+que se arma con una consulta sobre la columna anexo y queda en memoria del
+proceso mientras la firma de la tabla de funcionarios no cambie, igual que el
+organigrama.
+La unicidad la garantiza la restricción ``funcionario_anexo_unico`` de la base
+de datos; el mapa solo sirve para responder rápido qué está libre.
+"""
+import bisect
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import IntegrityError, transaction
+
+from . import versiones
+from .models import Funcionario
+
+# Anexos libres que se prueban al asignar el siguiente disponible antes de rendirse
+INTENTOS_SIGUIENTE = 5
+
+_lock = threading.Lock()
+_mapa = None  # (versión, MapaAnexos)
+
+
+class AnexoError(Exception):
+    """Asignación o liberación rechazada; ``status`` es el código HTTP a responder"""
+
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+def rangos():
+    """Rangos configurados como ``[(min, max), ...]`` ordenados, uniendo los que se tocan"""
+    normalizados = []
+    for minimo, maximo in sorted((int(a), int(b)) for a, b in getattr(settings, 'FUNCIONARIOS_ANEXO_RANGOS', [(400, 600)])):
+        if minimo < 0 or minimo > maximo:
+            raise ImproperlyConfigured(f'Rango de anexos inválido en FUNCIONARIOS_ANEXO_RANGOS: {minimo}-{maximo}')
+        if normalizados and minimo <= normalizados[-1][1] + 1:
+            normalizados[-1] = (normalizados[-1][0], max(maximo, normalizados[-1][1]))
+        else:
+            normalizados.append((minimo, maximo))
+    if not normalizados:
+        raise ImproperlyConfigured('FUNCIONARIOS_ANEXO_RANGOS no tiene ningún rango.')
+    return normalizados
+
+
+def describir_rangos(rangos):
+    return ', '.join(f'{minimo}-{maximo}' if minimo != maximo else str(minimo) for minimo, maximo in rangos)
+
+
+class MapaAnexos:
+    """Ocupación de los anexos de ``rangos``: el bit ``i`` es el i-ésimo anexo habilitado"""
+
+    def __init__(self, rangos, ocupados=()):
+        self.rangos = list(rangos)
+        self._inicios = [minimo for minimo, _ in self.rangos]
+        # Posición del primer anexo de cada rango dentro del mapa
+        self._desplazamientos = []
+        capacidad = 0
+        for minimo, maximo in self.rangos:
+            self._desplazamientos.append(capacidad)
+            capacidad += maximo - minimo + 1
+        self.capacidad = capacidad
+        self._todos = (1 << capacidad) - 1
+        self.bits = 0
+        for numero in ocupados:
+            posicion = self.posicion(numero)
+            if posicion is not None:
+                self.bits |= 1 << posicion
+
+    def posicion(self, numero):
+        """Bit del anexo ``numero``, o ``None`` si está fuera de los rangos"""
+        indice = bisect.bisect_right(self._inicios, numero) - 1
+        if indice < 0 or numero > self.rangos[indice][1]:
+            return None
+        return self._desplazamientos[indice] + numero - self.rangos[indice][0]
+
+    def numero(self, posicion):
+        indice = bisect.bisect_right(self._desplazamientos, posicion) - 1
+        return self.rangos[indice][0] + posicion - self._desplazamientos[indice]
+
+    def __contains__(self, numero):
+        return self.posicion(numero) is not None
+
+    def ocupado(self, numero):
+        posicion = self.posicion(numero)
+        return posicion is not None and bool(self.bits >> posicion & 1)
+
+    def _recorrer(self, bits):
+        while bits:
+            bajo = bits & -bits
+            yield self.numero(bajo.bit_length() - 1)
+            bits ^= bajo
+
+    def libres(self, desde=None):
+        """Anexos libres en orden, desde ``desde`` si se indica"""
+        libres = ~self.bits & self._todos
+        if desde is not None:
+            inicio = self._primera_posicion(desde)
+            if inicio is None:
+                return iter(())
+            libres = libres >> inicio << inicio
+        return self._recorrer(libres)
+
+    def ocupados(self):
+        return self._recorrer(self.bits)
+
+    def siguiente_libre(self, desde=None):
+        return next(self.libres(desde), None)
+
+    @property
+    def total_ocupados(self):
+        return self.bits.bit_count()
+
+    @property
+    def total_libres(self):
+        return self.capacidad - self.total_ocupados
+
+    def _primera_posicion(self, numero):
+        """Posición de ``numero`` o del primer anexo habilitado después de él"""
+        posicion = self.posicion(numero)
+        if posicion is not None:
+            return posicion
+        indice = bisect.bisect_right(self._inicios, numero)
+        return self._desplazamientos[indice] if indice < len(self.rangos) else None
+
+
+def version():
+    return versiones.firma(Funcionario)
+
+
+def invalidar():
+    """Obliga a reconstruir el mapa en la próxima consulta"""
+    global _mapa
+    _mapa = None
+
+
+def construir():
+    anexos = Funcionario.objects.exclude(anexo='').values_list('anexo', flat=True)
+    return MapaAnexos(rangos(), (int(anexo) for anexo in anexos if anexo.isdigit()))
+
+
+def mapa():
+    """Mapa de ocupación vigente, reconstruyéndolo si cambió la versión"""
+    global _mapa
+    actual = version()
+    vigente = _mapa
+    if vigente is not None and vigente[0] == actual:
+        return vigente[1]
+    with _lock:
+        if _mapa is None or _mapa[0] != actual:
+            _mapa = (actual, construir())
+        return _mapa[1]
+
+
+def _guardar_anexo(funcionario, numero):
+    """Intenta guardar el anexo; ``False`` si otro funcionario lo tomó antes"""
+    anterior = funcionario.anexo
+    funcionario.anexo = str(numero)
+    try:
+        with transaction.atomic():
+            funcionario.save()
+    except IntegrityError:
+        funcionario.anexo = anterior
+        return False
+    except ValidationError as error:
+        funcionario.anexo = anterior
+        # full_clean ya valida la restricción única y la reporta sobre el campo anexo
+        if 'anexo' in getattr(error, 'error_dict', {}):
+            return False
+        raise
+    return True
+
+
+def asignar(funcionario_id, anexo=None, desde=None):
+    """Asigna ``anexo`` al funcionario, o el siguiente libre si no se indica.
+
+    Devuelve ``(funcionario, numero)``. El funcionario queda bloqueado mientras
+    dura la asignación y la restricción única resuelve las carreras entre
+    procesos: si otro se adelanta con un anexo, se rechaza (anexo explícito) o
+    se prueba el siguiente libre.
+    """
+    actual = mapa()
+    if anexo is not None and anexo not in actual:
+        raise AnexoError(f'El anexo debe estar dentro de los rangos habilitados: {describir_rangos(actual.rangos)}')
+
+    with transaction.atomic():
+        try:
+            funcionario = Funcionario.objects.select_for_update().get(pk=funcionario_id)
+        except (Funcionario.DoesNotExist, ValueError, TypeError):
+            raise AnexoError('Funcionario no encontrado', status=404)
+        if not funcionario.estado:
+            raise AnexoError('No puedes asignar anexos a funcionarios inactivos')
+
+        if anexo is not None:
+            if funcionario.anexo == str(anexo):
+                return funcionario, anexo
+            ocupante = Funcionario.objects.filter(anexo=str(anexo)).exclude(pk=funcionario.pk).first()
+            if ocupante is not None or not _guardar_anexo(funcionario, anexo):
+                nombre = ocupante.nombre_funcionario if ocupante else 'otro funcionario'
+                raise AnexoError(f'El anexo {anexo} ya está asignado a {nombre}', status=409)
+            return funcionario, anexo
+
+        probados = 0
+        for numero in actual.libres(desde):
+            if _guardar_anexo(funcionario, numero):
+                return funcionario, numero
+            probados += 1
+            if probados == INTENTOS_SIGUIENTE:
+                raise AnexoError('Los anexos libres se están asignando en este momento; intenta nuevamente', status=409)
+    raise AnexoError('No quedan anexos libres en los rangos habilitados', status=409)
+
+
+def liberar(anexo):
+    """Quita ``anexo`` a quien lo tenga y devuelve el funcionario que lo tenía"""
+    with transaction.atomic():
+        funcionario = Funcionario.objects.select_for_update().filter(anexo=str(anexo)).first()
+        if funcionario is None:
+            raise AnexoError(f'No hay ningún funcionario con el anexo {anexo}', status=404)
+        funcionario.anexo = ''
+        funcionario.save()
+    return funcionario
@@ -5,3 +5,6 @@ class FuncionariosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'funcionarios'
     verbose_name = 'Funcionarios'
+
+    def ready(self):
+        from . import signals  # noqa: F401
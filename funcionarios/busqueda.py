@@ -0,0 +1,123 @@
+"""
+Búsqueda de funcionarios sobre el índice FTS5 de SQLite.
+
+La tabla ``funcionarios_funcionario_fts`` (migración 0003) indexa nombre, RUT,
+anexo, número público y cargo con el tokenizador ``unicode61
+remove_diacritics 2``, así que "Gonzalez" encuentra "González". Los triggers
+la mantienen al día en cada insert, update y delete, incluidos los de
+``bulk_create``/``bulk_update``.
+
+Cada término se busca como prefijo y todos deben aparecer (igual que
+``SearchFilter``); los RUT se normalizan sin puntos ni guion. Si la base no es
+SQLite o la tabla no existe, se vuelve a la búsqueda con ``icontains``.
+
+Para ordenar por relevancia el índice se une a la consulta a través del modelo
+``FuncionarioIndice``, así bm25 se calcula en la misma búsqueda y no con una
+subconsulta por fila.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Lookup, Q
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from .models import FuncionarioIndice
+
+TABLA = FuncionarioIndice._meta.db_table
+
+# Peso de cada columna en el ranking bm25: nombre, rut, anexo, número público, cargo
+PESOS = (10.0, 5.0, 5.0, 2.0, 1.0)
+
+RUT = re.compile(r'^[\d.]+(-?[\dkK])?$')
+
+# Campos para la búsqueda sin índice
+CAMPOS_ICONTAINS = ('nombre_funcionario', 'rut', 'anexo', 'numero_publico', 'cargo')
+
+class Match(Lookup):
+    """``indice__match=consulta``: ``<tabla>.<tabla> MATCH consulta`` en FTS5"""
+
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', (*lhs_params, *rhs_params)
+
+
+FuncionarioIndice._meta.get_field('indice').register_lookup(Match)
+
+
+def disponible(alias='default'):
+    """Si la base ``alias`` tiene el índice de texto completo.
+
+    Se consulta cada vez (es una lectura de ``sqlite_master``), para no seguir
+    usando un índice que se borró al revertir la migración.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [TABLA])
+        return cursor.fetchone() is not None
+
+
+def _termino(termino):
+    if RUT.match(termino):
+        termino = termino.replace('.', '').replace('-', '')
+    if not any(caracter.isalnum() for caracter in termino):
+        return None
+    return '"{}"*'.format(termino.replace('"', '""'))
+
+
+def consulta_fts(terminos):
+    """Expresión MATCH para ``terminos``, o ``None`` si no queda nada que buscar"""
+    partes = [parte for parte in map(_termino, terminos) if parte]
+    return ' '.join(partes) or None
+
+
+def buscar(queryset, terminos, ordenar=True):
+    """Filtra ``queryset`` a los funcionarios que calzan con todos los ``terminos``.
+
+    Con ``ordenar`` los resultados quedan por relevancia (bm25) y luego por
+    nombre.
+    """
+    terminos = [termino for termino in terminos if termino]
+    if not terminos:
+        return queryset
+    if not disponible(queryset.db):
+        condicion = Q()
+        for termino in terminos:
+            condicion &= Q(*(Q(**{f'{campo}__icontains': termino}) for campo in CAMPOS_ICONTAINS), _connector=Q.OR)
+        return queryset.filter(condicion)
+
+    consulta = consulta_fts(terminos)
+    if consulta is None:
+        return queryset.none()
+    if not ordenar:
+        return queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {TABLA} WHERE {TABLA} MATCH %s', (consulta,)))
+    # bm25 recibe la tabla unida por indice_busqueda, que Django nombra como la tabla
+    pesos = ', '.join(str(peso) for peso in PESOS)
+    return (
+        queryset.filter(indice_busqueda__indice__match=consulta)
+        .annotate(relevancia=RawSQL(f'bm25({TABLA}, {pesos})', ()))
+        .order_by('relevancia', 'nombre_funcionario')
+    )
+
+
+class FuncionarioSearchFilter(filters.SearchFilter):
+    """``?search=`` sobre el índice de texto completo.
+
+    Sin ``?ordering=`` los resultados se ordenan por relevancia; la paginación
+    por cursor sigue ordenando por los campos de ``ordering`` de la vista.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terminos = self.get_search_terms(request)
+        paginador = getattr(view, 'paginator', None)
+        ordenar = not (
+            request.query_params.get(filters.OrderingFilter.ordering_param)
+            or getattr(view, 'action', None) != 'list'
+            or (paginador is not None and getattr(paginador, 'is_requested', lambda request: True)(request))
+        )
+        return buscar(queryset, terminos, ordenar=ordenar)
@@ -0,0 +1,130 @@
+"""
+Estadísticas de funcionarios para el dashboard.
+
+Los totales y desgloses salen de una sola consulta agrupada sobre
+Funcionario (más una sobre la estructura organizacional) y se guardan en la
+caché de Django bajo la firma de esas tablas (ver ``versiones``), así que
+cualquier escritura, hecha desde cualquier proceso, deja obsoletas las
+entradas anteriores.
+"""
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from . import versiones
+from .models import Subdireccion, Departamento, Unidad, Funcionario
+
+# Parámetros que no cambian el resultado y no deben separar entradas de caché
+PARAMETROS_IGNORADOS = {'ordering', 'fields', 'page_size', 'cursor', 'format'}
+
+COLUMNAS = (
+    'subdireccion_id', 'subdireccion__nombre',
+    'departamento_id', 'departamento__nombre',
+    'unidad_id', 'unidad__nombre',
+    'cargo', 'estado',
+)
+
+SIN_ASIGNAR = 'Sin asignar'
+
+
+def version():
+    return versiones.firma(Subdireccion, Departamento, Unidad, Funcionario)
+
+
+def _grupo(desglose, clave, datos):
+    grupo = desglose.get(clave)
+    if grupo is None:
+        grupo = desglose[clave] = {**datos, 'total': 0, 'activos': 0}
+    return grupo
+
+
+def _ordenar(desglose):
+    return sorted(desglose.values(), key=lambda grupo: (-grupo['activos'], -grupo['total'], grupo['nombre']))
+
+
+def calcular(queryset):
+    """Totales, activos y desgloses por subdirección, departamento, unidad y cargo"""
+    filas = (
+        queryset.order_by().prefetch_related(None)
+        .values(*COLUMNAS)
+        .annotate(cantidad=Count('id'))
+    )
+    total = activos = 0
+    subdirecciones, departamentos, unidades, cargos = {}, {}, {}, {}
+    for fila in filas:
+        cantidad = fila['cantidad']
+        activos_fila = cantidad if fila['estado'] else 0
+        total += cantidad
+        activos += activos_fila
+        subdireccion = fila['subdireccion__nombre'] or SIN_ASIGNAR
+        grupos = (
+            _grupo(subdirecciones, fila['subdireccion_id'], {
+                'id': fila['subdireccion_id'], 'nombre': subdireccion,
+            }),
+            _grupo(departamentos, fila['departamento_id'], {
+                'id': fila['departamento_id'],
+                'nombre': fila['departamento__nombre'] or SIN_ASIGNAR,
+                'subdireccion': subdireccion,
+            }),
+            _grupo(unidades, fila['unidad_id'], {
+                'id': fila['unidad_id'],
+                'nombre': fila['unidad__nombre'] or SIN_ASIGNAR,
+                'departamento': fila['departamento__nombre'] or SIN_ASIGNAR,
+            }),
+            _grupo(cargos, fila['cargo'], {'nombre': fila['cargo'] or 'Sin cargo'}),
+        )
+        for grupo in grupos:
+            grupo['total'] += cantidad
+            grupo['activos'] += activos_fila
+
+    # Estructura organizacional, con todas las subdirecciones aunque no tengan funcionarios
+    estructura = list(
+        Subdireccion.objects.order_by('nombre').values('id', 'nombre').annotate(
+            total_departamentos=Count('departamentos', distinct=True),
+            total_unidades=Count('departamentos__unidades', distinct=True),
+        )
+    )
+    por_subdireccion = {fila['nombre']: 0 for fila in estructura}
+    for grupo in subdirecciones.values():
+        if grupo['id'] is not None:
+            por_subdireccion[grupo['nombre']] = grupo['activos']
+
+    return {
+        'total': total,
+        'activos': activos,
+        'inactivos': total - activos,
+        'por_subdireccion': por_subdireccion,
+        'por_departamento': _ordenar(departamentos),
+        'por_unidad': _ordenar(unidades),
+        'por_cargo': _ordenar(cargos),
+        'por_subdireccion_detalle': _ordenar(subdirecciones),
+        'estructura': {
+            'subdirecciones': len(estructura),
+            'departamentos': sum(fila['total_departamentos'] for fila in estructura),
+            'unidades': sum(fila['total_unidades'] for fila in estructura),
+        },
+    }
+
+
+def clave_cache(query_params):
+    parametros = sorted(
+        (nombre, valor)
+        for nombre, valores in query_params.lists()
+        if nombre not in PARAMETROS_IGNORADOS
+        for valor in valores
+    )
+    huella = hashlib.md5(urlencode(parametros).encode()).hexdigest()
+    return f'funcionarios:estadisticas:{version()}:{huella}'
+
+
+def estadisticas(queryset, query_params):
+    """Estadísticas de ``queryset`` (ya filtrado según ``query_params``), desde la caché si es posible"""
+    clave = clave_cache(query_params)
+    datos = cache.get(clave)
+    if datos is None:
+        datos = calcular(queryset)
+        cache.set(clave, datos, getattr(settings, 'FUNCIONARIOS_ESTADISTICAS_TTL', 300))
+    return datos
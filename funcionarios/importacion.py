@@ -0,0 +1,375 @@
+"""
+Importación masiva de funcionarios desde CSV o XLSX.
+
+El archivo se lee fila a fila y se procesa por lotes: cada lote se valida en
+memoria (RUT, largo de campos, anexo, estado), se revisa contra la base con
+una consulta por regla (RUT existentes, anexos ocupados) y se escribe con
+``bulk_create``/``bulk_update``. La estructura organizacional se carga una
+sola vez al comienzo, así que importar miles de filas cuesta unas pocas
+consultas por lote en vez de varias por funcionario.
+
+Las filas con errores no se guardan y se informan con su número de línea;
+el resto del archivo se importa igual. Como las operaciones masivas no
+disparan signals, al terminar se invalidan a mano las cachés que dependen de
+los funcionarios.
+"""
+import csv
+import io
+import unicodedata
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import anexos, organigrama
+from .models import Subdireccion, Departamento, Unidad, Funcionario, validate_rut
+
+# Encabezados aceptados (sin tildes, en minúsculas) para cada campo
+COLUMNAS = {
+    'rut': 'rut',
+    'nombre': 'nombre_funcionario',
+    'nombre_funcionario': 'nombre_funcionario',
+    'nombre_completo': 'nombre_funcionario',
+    'anexo': 'anexo',
+    'cargo': 'cargo',
+    'estado': 'estado',
+    'activo': 'estado',
+    'subdireccion': 'subdireccion',
+    'departamento': 'departamento',
+    'unidad': 'unidad',
+}
+
+VERDADEROS = {'1', 'si', 'true', 'verdadero', 'activo', 'x'}
+FALSOS = {'0', 'no', 'false', 'falso', 'inactivo'}
+
+# Niveles de la estructura organizacional, de arriba hacia abajo
+NIVELES = ('subdireccion', 'departamento', 'unidad')
+
+# Campos que una fila puede cambiar en un funcionario existente
+CAMPOS_ACTUALIZABLES = ('nombre_funcionario', 'anexo', 'cargo', 'estado', 'subdireccion', 'departamento', 'unidad')
+
+
+class ImportacionError(Exception):
+    """El archivo completo no se puede importar (formato, encabezados, dependencias)"""
+
+
+def _normalizar(texto):
+    """Minúsculas, sin tildes y sin espacios repetidos, para comparar nombres y encabezados"""
+    texto = unicodedata.normalize('NFKD', str(texto or '')).encode('ascii', 'ignore').decode()
+    return ' '.join(texto.lower().split())
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)  # las planillas guardan los anexos como números
+    return str(valor).strip()
+
+
+def _leer_csv(archivo, encoding):
+    texto = io.TextIOWrapper(archivo, encoding=encoding, newline='')
+    try:
+        muestra = texto.read(4096)
+        texto.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+        except csv.Error:
+            dialecto = csv.excel
+        yield from csv.reader(texto, dialecto)
+    except UnicodeDecodeError:
+        raise ImportacionError(f'El archivo no está codificado en {encoding}; indica otra codificación (por ejemplo latin-1).')
+
+
+def _leer_xlsx(archivo):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportacionError('Para importar archivos XLSX instala openpyxl, o guarda la planilla como CSV.')
+    try:
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+    except Exception as error:
+        raise ImportacionError(f'No se pudo leer la planilla: {error}')
+    try:
+        for fila in libro.worksheets[0].iter_rows(values_only=True):
+            yield [_texto(valor) for valor in fila]
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo, nombre, encoding='utf-8-sig'):
+    """``(línea, {campo: valor})`` por cada fila de datos de un CSV o XLSX binario"""
+    if nombre.lower().endswith(('.xlsx', '.xlsm')):
+        filas = _leer_xlsx(archivo)
+    elif nombre.lower().endswith(('.csv', '.txt')):
+        filas = _leer_csv(archivo, encoding)
+    else:
+        raise ImportacionError('Formato no soportado: usa un archivo .csv o .xlsx.')
+
+    encabezado = next(filas, None)
+    if encabezado is None:
+        raise ImportacionError('El archivo está vacío.')
+    campos = [COLUMNAS.get(_normalizar(nombre).replace(' ', '_')) for nombre in encabezado]
+    faltantes = {'rut', 'nombre_funcionario'} - set(campos)
+    if faltantes:
+        raise ImportacionError(f"Faltan columnas obligatorias: {', '.join(sorted(faltantes))}")
+
+    for linea, fila in enumerate(filas, start=2):
+        if not any(_texto(valor) for valor in fila):
+            continue
+        yield linea, {campo: _texto(valor) for campo, valor in zip(campos, fila) if campo}
+
+
+class Estructura:
+    """Subdirecciones, departamentos y unidades por nombre, cargados una vez"""
+
+    def __init__(self):
+        self.subdirecciones = {}
+        self.por_nombre = {'subdireccion': {}, 'departamento': {}, 'unidad': {}}
+        for sub in Subdireccion.objects.all():
+            self.subdirecciones[sub.id] = sub
+            self.por_nombre['subdireccion'].setdefault(_normalizar(sub.nombre), []).append(sub)
+        self.departamentos = {}
+        for dept in Departamento.objects.all():
+            self.departamentos[dept.id] = dept
+            self.por_nombre['departamento'].setdefault(_normalizar(dept.nombre), []).append(dept)
+        self.unidades = {}
+        for unidad in Unidad.objects.all():
+            self.unidades[unidad.id] = unidad
+            self.por_nombre['unidad'].setdefault(_normalizar(unidad.nombre), []).append(unidad)
+
+    def _buscar(self, nivel, nombre, padre, errores):
+        """El ``nivel`` llamado ``nombre``, dentro de ``padre`` si se conoce"""
+        candidatos = self.por_nombre[nivel].get(_normalizar(nombre), [])
+        if padre is not None:
+            campo_padre = 'subdireccion_id' if nivel == 'departamento' else 'departamento_id'
+            candidatos = [item for item in candidatos if getattr(item, campo_padre) == padre.id]
+        if len(candidatos) == 1:
+            return candidatos[0]
+        if candidatos:
+            mensaje = f'Hay varias unidades organizacionales llamadas "{nombre}"; indica el nivel superior.'
+        elif padre is not None and self.por_nombre[nivel].get(_normalizar(nombre)):
+            mensaje = f'"{nombre}" no pertenece a "{padre.nombre}".'
+        else:
+            mensaje = f'No existe "{nombre}".'
+        errores.setdefault(nivel, []).append(mensaje)
+        return None
+
+    def resolver(self, datos, errores):
+        """``(subdireccion, departamento, unidad)`` de la fila; cada nivel debe colgar del anterior.
+
+        Un nivel intermedio que falta se deduce del inferior cuando el nombre
+        de éste no se repite.
+        """
+        subdireccion = departamento = unidad = None
+        if datos.get('subdireccion'):
+            subdireccion = self._buscar('subdireccion', datos['subdireccion'], None, errores)
+            if subdireccion is None:
+                return None, None, None
+        if datos.get('departamento'):
+            departamento = self._buscar('departamento', datos['departamento'], subdireccion, errores)
+            if departamento is None:
+                return subdireccion, None, None
+        if datos.get('unidad'):
+            unidad = self._buscar('unidad', datos['unidad'], departamento, errores)
+            if unidad is None:
+                return subdireccion, departamento, None
+        if unidad is not None and departamento is None:
+            departamento = self.departamentos[unidad.departamento_id]
+            if subdireccion is not None and departamento.subdireccion_id != subdireccion.id:
+                errores.setdefault('unidad', []).append(
+                    f'"{datos["unidad"]}" no pertenece a "{subdireccion.nombre}".'
+                )
+                return subdireccion, None, None
+        if departamento is not None and subdireccion is None:
+            subdireccion = self.subdirecciones[departamento.subdireccion_id]
+        return subdireccion, departamento, unidad
+
+    def validar_jerarquia(self, funcionario, errores):
+        """Errores si los niveles que el archivo no trae ya no cuelgan de los nuevos"""
+        if funcionario.departamento_id and funcionario.subdireccion_id:
+            departamento = self.departamentos[funcionario.departamento_id]
+            if departamento.subdireccion_id != funcionario.subdireccion_id:
+                errores.setdefault('departamento', []).append(
+                    f'El departamento actual "{departamento.nombre}" no pertenece a '
+                    f'"{self.subdirecciones[funcionario.subdireccion_id].nombre}"; incluye la columna departamento.'
+                )
+        if funcionario.unidad_id:
+            unidad = self.unidades[funcionario.unidad_id]
+            if unidad.departamento_id != funcionario.departamento_id:
+                errores.setdefault('unidad', []).append(
+                    f'La unidad actual "{unidad.nombre}" no pertenece al departamento indicado; incluye la columna unidad.'
+                )
+
+
+def _estado(valor, errores):
+    normalizado = _normalizar(valor)
+    if normalizado in VERDADEROS:
+        return True
+    if normalizado in FALSOS:
+        return False
+    errores.setdefault('estado', []).append(f'Estado "{valor}" no reconocido; usa sí/no.')
+    return None
+
+
+def _normalizar_rut(valor):
+    """``12.345.678-k`` -> ``12345678-K``"""
+    return valor.replace('.', '').replace(' ', '').upper()
+
+
+def validar_fila(datos, estructura):
+    """Valores listos para el modelo y errores por campo, sin consultar la base"""
+    errores = {}
+    valores = {'rut': _normalizar_rut(datos.get('rut', ''))}
+    try:
+        validate_rut(valores['rut'])
+    except ValidationError as error:
+        errores['rut'] = error.messages
+
+    nombre = datos.get('nombre_funcionario', '')
+    if not nombre:
+        errores['nombre_funcionario'] = ['El nombre es obligatorio.']
+    for campo in ('nombre_funcionario', 'anexo', 'cargo'):
+        if campo not in datos:
+            continue
+        valor = datos[campo]
+        largo = Funcionario._meta.get_field(campo).max_length
+        if len(valor) > largo:
+            errores.setdefault(campo, []).append(f'Máximo {largo} caracteres.')
+        valores[campo] = valor
+    if valores.get('anexo') and not valores['anexo'].isdigit():
+        errores.setdefault('anexo', []).append('El anexo solo puede contener números.')
+
+    if 'estado' in datos:
+        valores['estado'] = _estado(datos['estado'], errores) if datos['estado'] else True
+
+    presentes = [nivel for nivel in NIVELES if nivel in datos]
+    if presentes:
+        # Se asignan los niveles del archivo y los superiores al más bajo con
+        # valor, que se deducen de él; los demás quedan como estaban
+        resueltos = dict(zip(NIVELES, estructura.resolver(datos, errores)))
+        con_valor = [NIVELES.index(nivel) for nivel in presentes if datos[nivel]]
+        deducidos = NIVELES[:con_valor[-1] + 1] if con_valor else ()
+        valores.update((nivel, resueltos[nivel]) for nivel in NIVELES if nivel in presentes or nivel in deducidos)
+
+    # Igual que Funcionario.save: un inactivo no conserva anexo
+    if valores.get('estado') is False:
+        valores['anexo'] = ''
+    return valores, errores
+
+
+def _lote(filas, estructura, ruts_vistos, anexos_vistos, resultado, dry_run):
+    """Valida y guarda un lote de ``(línea, datos)``"""
+    validas = []
+    for linea, datos in filas:
+        valores, errores = validar_fila(datos, estructura)
+        rut = valores['rut']
+        if 'rut' not in errores:
+            if rut in ruts_vistos:
+                errores['rut'] = [f'RUT repetido en el archivo (línea {ruts_vistos[rut]}).']
+            else:
+                ruts_vistos[rut] = linea
+        anexo = valores.get('anexo')
+        if anexo and 'anexo' not in errores:
+            if anexo in anexos_vistos:
+                errores['anexo'] = [f'Anexo repetido en el archivo (línea {anexos_vistos[anexo]}).']
+            else:
+                anexos_vistos[anexo] = linea
+        if errores:
+            resultado['errores'].append({'linea': linea, 'rut': rut, 'errores': errores})
+        else:
+            validas.append((linea, valores))
+    if not validas:
+        return
+
+    # Una consulta por regla para todo el lote
+    existentes = Funcionario.objects.in_bulk([valores['rut'] for _, valores in validas], field_name='rut')
+    ocupados = dict(
+        Funcionario.objects.filter(anexo__in=[valores['anexo'] for _, valores in validas if valores.get('anexo')])
+        .values_list('anexo', 'rut')
+    )
+
+    nuevos, actualizados, campos = [], [], set()
+    ahora = timezone.now()
+    for linea, valores in validas:
+        rut = valores['rut']
+        anexo = valores.get('anexo')
+        if anexo and ocupados.get(anexo, rut) != rut:
+            resultado['errores'].append({
+                'linea': linea, 'rut': rut,
+                'errores': {'anexo': [f'El anexo {anexo} ya está asignado al RUT {ocupados[anexo]}.']},
+            })
+            continue
+        funcionario = existentes.get(rut)
+        if funcionario is None:
+            funcionario = Funcionario(**valores)
+            nuevos.append((linea, funcionario))
+        else:
+            cambios = {campo: valor for campo, valor in valores.items() if campo in CAMPOS_ACTUALIZABLES}
+            for campo, valor in cambios.items():
+                setattr(funcionario, campo, valor)
+            errores = {}
+            estructura.validar_jerarquia(funcionario, errores)
+            if errores:
+                resultado['errores'].append({'linea': linea, 'rut': rut, 'errores': errores})
+                continue
+            if funcionario.estado is False:
+                funcionario.anexo = ''
+                cambios['anexo'] = ''
+            campos.update(cambios)
+            funcionario.actualizado_en = ahora
+            actualizados.append((linea, funcionario))
+        funcionario.numero_publico = f'227263{funcionario.anexo}' if funcionario.anexo else ''
+
+    if dry_run:
+        resultado['creados'] += len(nuevos)
+        resultado['actualizados'] += len(actualizados)
+        return
+    try:
+        with transaction.atomic():
+            Funcionario.objects.bulk_create([funcionario for _, funcionario in nuevos])
+            if actualizados:
+                campos.update({'numero_publico', 'actualizado_en'})
+                Funcionario.objects.bulk_update(
+                    [funcionario for _, funcionario in actualizados], sorted(campos)
+                )
+    except IntegrityError as error:
+        # Otro proceso tomó un RUT o un anexo entre la validación y la escritura
+        for linea, funcionario in nuevos + actualizados:
+            resultado['errores'].append({
+                'linea': linea, 'rut': funcionario.rut,
+                'errores': {'__all__': [f'No se pudo guardar el lote: {error}']},
+            })
+        return
+    resultado['creados'] += len(nuevos)
+    resultado['actualizados'] += len(actualizados)
+
+
+def importar(archivo, nombre, encoding='utf-8-sig', dry_run=False, batch_size=None):
+    """Importa funcionarios desde ``archivo`` (binario) y devuelve el resumen.
+
+    Los RUT que ya existen se actualizan solo en las columnas presentes en el
+    archivo (una celda vacía deja el campo vacío); los demás se crean. Con
+    ``dry_run`` se valida todo sin escribir.
+    """
+    batch_size = batch_size or getattr(settings, 'FUNCIONARIOS_IMPORT_BATCH_SIZE', 500)
+    resultado = {'filas': 0, 'creados': 0, 'actualizados': 0, 'errores': [], 'dry_run': dry_run}
+    estructura = Estructura()
+    ruts_vistos, anexos_vistos = {}, {}
+    lote = []
+    for fila in leer_filas(archivo, nombre, encoding):
+        resultado['filas'] += 1
+        lote.append(fila)
+        if len(lote) >= batch_size:
+            _lote(lote, estructura, ruts_vistos, anexos_vistos, resultado, dry_run)
+            lote = []
+    if lote:
+        _lote(lote, estructura, ruts_vistos, anexos_vistos, resultado, dry_run)
+
+    if not dry_run and (resultado['creados'] or resultado['actualizados']):
+        # bulk_create/bulk_update no disparan los signals que invalidan estas cachés
+        organigrama.invalidar()
+        anexos.invalidar()
+    resultado['errores'].sort(key=lambda error: error['linea'])
+    return resultado
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from funcionarios.importacion import ImportacionError, importar
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa funcionarios desde un archivo CSV o XLSX. Los RUT existentes se '
+        'actualizan con las columnas presentes en el archivo y los demás se crean.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Archivo .csv o .xlsx con encabezados (rut, nombre, anexo, cargo, ...).')
+        parser.add_argument('--encoding', default='utf-8-sig', help='Codificación del CSV (por ejemplo latin-1).')
+        parser.add_argument('--batch-size', type=int, help='Filas por lote (por defecto FUNCIONARIOS_IMPORT_BATCH_SIZE).')
+        parser.add_argument('--dry-run', action='store_true', help='Solo validar, sin guardar.')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = importar(
+                    archivo,
+                    options['archivo'],
+                    encoding=options['encoding'],
+                    dry_run=options['dry_run'],
+                    batch_size=options['batch_size'],
+                )
+        except OSError as error:
+            raise CommandError(f"No se pudo abrir {options['archivo']}: {error}")
+        except (ImportacionError, LookupError) as error:
+            raise CommandError(str(error))
+
+        for error in resultado['errores']:
+            detalle = '; '.join(
+                f"{campo}: {' '.join(mensajes)}" for campo, mensajes in error['errores'].items()
+            )
+            self.stdout.write(f"línea {error['linea']:<6} {error['rut'] or '-':<12} {detalle}")
+
+        resumen = (
+            f"{resultado['filas']} filas: {resultado['creados']} nuevos, "
+            f"{resultado['actualizados']} actualizados, {len(resultado['errores'])} con errores"
+        )
+        if options['dry_run']:
+            self.stdout.write(f'{resumen} (sin guardar).')
+        elif resultado['errores']:
+            self.stdout.write(self.style.WARNING(resumen))
+        else:
+            self.stdout.write(self.style.SUCCESS(resumen))
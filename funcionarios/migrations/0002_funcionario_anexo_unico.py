@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:10
+
+from django.db import migrations, models
+
+
+def verificar_anexos_repetidos(apps, schema_editor):
+    """Detiene la migración si hay anexos repetidos, listando los RUT de cada uno.
+
+    No se elige automáticamente a quién quitarle el anexo: hay que corregirlos
+    a mano (por ejemplo desde el admin o con ``/api/control-anexos/liberar/``)
+    y volver a migrar.
+    """
+    Funcionario = apps.get_model('funcionarios', 'Funcionario')
+    repetidos = (
+        Funcionario.objects.exclude(anexo='').values('anexo')
+        .annotate(cantidad=models.Count('pk')).filter(cantidad__gt=1).values_list('anexo', flat=True)
+    )
+    ruts = {}
+    for anexo, rut in Funcionario.objects.filter(anexo__in=list(repetidos)).order_by('anexo', 'rut').values_list('anexo', 'rut'):
+        ruts.setdefault(anexo, []).append(rut)
+    if ruts:
+        detalle = '\n'.join(f'  anexo {anexo}: {", ".join(lista)}' for anexo, lista in ruts.items())
+        raise RuntimeError(
+            'No se puede exigir un anexo único: estos anexos están asignados a más de un funcionario.\n'
+            f'{detalle}\nDeja cada anexo con un solo funcionario y vuelve a ejecutar migrate.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funcionarios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(verificar_anexos_repetidos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='funcionario',
+            constraint=models.UniqueConstraint(condition=models.Q(('anexo', ''), _negated=True), fields=('anexo',), name='funcionario_anexo_unico', violation_error_code='unique', violation_error_message='Este anexo ya está asignado a otro funcionario.'),
+        ),
+    ]
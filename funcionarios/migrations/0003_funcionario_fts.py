@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:20
+
+from django.db import migrations
+
+# Índice de texto completo para la búsqueda de funcionarios (ver funcionarios/busqueda.py).
+# El RUT se indexa tal cual y sin guion, para encontrar "12345678-9" y "123456789".
+COLUMNAS = 'nombre_funcionario, rut, anexo, numero_publico, cargo'
+
+
+def _valores(fila):
+    return (
+        f"{fila}.nombre_funcionario, {fila}.rut || ' ' || replace({fila}.rut, '-', ''), "
+        f"{fila}.anexo, {fila}.numero_publico, {fila}.cargo"
+    )
+
+
+CREAR = [
+    f"""CREATE VIRTUAL TABLE funcionarios_funcionario_fts USING fts5(
+        {COLUMNAS}, tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    f"""INSERT INTO funcionarios_funcionario_fts (rowid, {COLUMNAS})
+        SELECT id, {_valores('funcionarios_funcionario')} FROM funcionarios_funcionario""",
+    f"""CREATE TRIGGER funcionarios_funcionario_fts_ai AFTER INSERT ON funcionarios_funcionario BEGIN
+        INSERT INTO funcionarios_funcionario_fts (rowid, {COLUMNAS}) VALUES (new.id, {_valores('new')});
+    END""",
+    """CREATE TRIGGER funcionarios_funcionario_fts_ad AFTER DELETE ON funcionarios_funcionario BEGIN
+        DELETE FROM funcionarios_funcionario_fts WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER funcionarios_funcionario_fts_au
+        AFTER UPDATE OF {COLUMNAS} ON funcionarios_funcionario BEGIN
+        DELETE FROM funcionarios_funcionario_fts WHERE rowid = old.id;
+        INSERT INTO funcionarios_funcionario_fts (rowid, {COLUMNAS}) VALUES (new.id, {_valores('new')});
+    END""",
+]
+
+BORRAR = [
+    'DROP TRIGGER IF EXISTS funcionarios_funcionario_fts_au',
+    'DROP TRIGGER IF EXISTS funcionarios_funcionario_fts_ad',
+    'DROP TRIGGER IF EXISTS funcionarios_funcionario_fts_ai',
+    'DROP TABLE IF EXISTS funcionarios_funcionario_fts',
+]
+
+
+def _ejecutar(sentencias):
+    def ejecutar(apps, schema_editor):
+        # Solo SQLite tiene FTS5; en otras bases la búsqueda sigue usando LIKE
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sentencia in sentencias:
+            schema_editor.execute(sentencia)
+    return ejecutar
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funcionarios', '0002_funcionario_anexo_unico'),
+    ]
+
+    operations = [
+        migrations.RunPython(_ejecutar(CREAR), _ejecutar(BORRAR)),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funcionarios', '0003_funcionario_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='funcionario',
+            index=models.Index(fields=['actualizado_en'], name='funcionario_actuali_e98e5b_idx'),
+        ),
+    ]
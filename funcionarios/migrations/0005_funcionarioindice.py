@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funcionarios', '0004_funcionario_actualizado_en_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FuncionarioIndice',
+            fields=[
+                ('funcionario', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='indice_busqueda', serialize=False, to='funcionarios.funcionario')),
+                ('indice', models.TextField(db_column='funcionarios_funcionario_fts')),
+            ],
+            options={
+                'db_table': 'funcionarios_funcionario_fts',
+                'managed': False,
+            },
+        ),
+    ]
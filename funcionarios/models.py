@@ -33,6 +33,30 @@ def validate_rut(rut):
         raise ValidationError(_("Dígito verificador de RUT inválido"))
 
 
+class SubdireccionQuerySet(models.QuerySet):
+    def con_totales(self):
+        """Anota total_departamentos y total_funcionarios en la misma consulta"""
+        return self.annotate(
+            total_departamentos=models.Count("departamentos", distinct=True),
+            total_funcionarios=models.Count("funcionarios", distinct=True),
+        )
+
+
+class DepartamentoQuerySet(models.QuerySet):
+    def con_totales(self):
+        """Anota total_unidades y total_funcionarios en la misma consulta"""
+        return self.annotate(
+            total_unidades=models.Count("unidades", distinct=True),
+            total_funcionarios=models.Count("funcionarios", distinct=True),
+        )
+
+
+class UnidadQuerySet(models.QuerySet):
+    def con_totales(self):
+        """Anota total_funcionarios en la misma consulta"""
+        return self.annotate(total_funcionarios=models.Count("funcionarios", distinct=True))
+
+
 class Subdireccion(models.Model):
     """Subdirección - Nivel superior de la jerarquía organizacional"""
     nombre = models.CharField("Nombre", max_length=120, unique=True)
@@ -41,6 +65,8 @@ class Subdireccion(models.Model):
     creado_en = models.DateTimeField(auto_now_add=True)
     actualizado_en = models.DateTimeField(auto_now=True)
 
+    objects = SubdireccionQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Subdirección"
         verbose_name_plural = "Subdirecciones"
@@ -63,6 +89,8 @@ class Departamento(models.Model):
     creado_en = models.DateTimeField(auto_now_add=True)
     actualizado_en = models.DateTimeField(auto_now=True)
 
+    objects = DepartamentoQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Departamento"
         verbose_name_plural = "Departamentos"
@@ -86,6 +114,8 @@ class Unidad(models.Model):
     creado_en = models.DateTimeField(auto_now_add=True)
     actualizado_en = models.DateTimeField(auto_now=True)
 
+    objects = UnidadQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Unidad"
         verbose_name_plural = "Unidades"
@@ -166,6 +196,17 @@ class Funcionario(models.Model):
             models.Index(fields=['rut']),
             models.Index(fields=['nombre_funcionario']),
             models.Index(fields=['anexo']),
+            models.Index(fields=['actualizado_en']),
+        ]
+        constraints = [
+            # Un anexo pertenece a un solo funcionario; vacío significa sin anexo
+            models.UniqueConstraint(
+                fields=["anexo"],
+                condition=~models.Q(anexo=""),
+                name="funcionario_anexo_unico",
+                violation_error_code="unique",
+                violation_error_message=_("Este anexo ya está asignado a otro funcionario."),
+            ),
         ]
 
     def __str__(self):
@@ -208,3 +249,25 @@ class Funcionario(models.Model):
         self.numero_publico = f"227263{self.anexo}" if self.anexo else ""
         
         super().save(*args, **kwargs)
+
+
+class FuncionarioIndice(models.Model):
+    """Fila del índice de texto completo (tabla FTS5 de la migración 0003).
+
+    Solo existe en SQLite y la mantienen los triggers de la base; el modelo
+    permite unirla a Funcionario en las búsquedas (ver ``busqueda.py``).
+    """
+    funcionario = models.OneToOneField(
+        Funcionario,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name="indice_busqueda",
+    )
+    # La columna oculta con el nombre de la tabla recibe las consultas MATCH
+    indice = models.TextField(db_column="funcionarios_funcionario_fts")
+
+    class Meta:
+        managed = False
+        db_table = "funcionarios_funcionario_fts"
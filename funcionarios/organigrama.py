@@ -0,0 +1,83 @@
+"""
+Árbol Subdirección → Departamento → Unidad con sus totales, para /api/org-tree/.
+
+El árbol se arma con tres consultas anotadas y queda en memoria del proceso
+junto con su ETag. Cada consulta compara primero la firma de las tablas (ver
+``versiones``), así que un cambio hecho desde otro proceso también lo
+reconstruye; los signals además descartan la copia del proceso que hizo el
+cambio.
+"""
+import hashlib
+import json
+import threading
+
+from . import versiones
+from .models import Subdireccion, Departamento, Unidad, Funcionario
+
+_lock = threading.Lock()
+_arbol = None  # (versión, etag, datos)
+
+
+def version():
+    return versiones.firma(Subdireccion, Departamento, Unidad, Funcionario)
+
+
+def invalidar():
+    """Obliga a reconstruir el árbol en la próxima consulta"""
+    global _arbol
+    _arbol = None
+
+
+def construir():
+    """Lista de subdirecciones con sus departamentos y unidades anidados"""
+    subdirecciones = [
+        {
+            'id': sub.id,
+            'nombre': sub.nombre,
+            'piso': sub.piso,
+            'activo': sub.activo,
+            'total_departamentos': sub.total_departamentos,
+            'total_funcionarios': sub.total_funcionarios,
+            'departamentos': [],
+        }
+        for sub in Subdireccion.objects.con_totales().order_by('nombre')
+    ]
+    por_subdireccion = {sub['id']: sub for sub in subdirecciones}
+
+    departamentos = {}
+    for dept in Departamento.objects.con_totales().order_by('nombre'):
+        departamentos[dept.id] = {
+            'id': dept.id,
+            'nombre': dept.nombre,
+            'activo': dept.activo,
+            'total_unidades': dept.total_unidades,
+            'total_funcionarios': dept.total_funcionarios,
+            'unidades': [],
+        }
+        por_subdireccion[dept.subdireccion_id]['departamentos'].append(departamentos[dept.id])
+
+    for unidad in Unidad.objects.con_totales().order_by('nombre'):
+        departamentos[unidad.departamento_id]['unidades'].append({
+            'id': unidad.id,
+            'nombre': unidad.nombre,
+            'activo': unidad.activo,
+            'total_funcionarios': unidad.total_funcionarios,
+        })
+
+    return subdirecciones
+
+
+def arbol():
+    """``(etag, datos)`` del árbol vigente, reconstruyéndolo si cambió la versión"""
+    global _arbol
+    actual = version()
+    vigente = _arbol
+    if vigente is not None and vigente[0] == actual:
+        return vigente[1], vigente[2]
+    with _lock:
+        if _arbol is None or _arbol[0] != actual:
+            datos = construir()
+            # El ETag depende del contenido, así coincide entre procesos con el mismo árbol
+            etag = hashlib.md5(json.dumps(datos, sort_keys=True).encode()).hexdigest()
+            _arbol = (actual, etag, datos)
+        return _arbol[1], _arbol[2]
@@ -1,7 +1,14 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from .models import Subdireccion, Departamento, Unidad, Funcionario
 
 
+def _total(obj, nombre, relacion):
+    """Total anotado por con_totales(); si la instancia no viene anotada, se cuenta"""
+    valor = getattr(obj, nombre, None)
+    return valor if valor is not None else getattr(obj, relacion).count()
+
+
 class SubdireccionSerializer(serializers.ModelSerializer):
     """Serializer para Subdirección con contador de departamentos"""
     total_departamentos = serializers.SerializerMethodField()
@@ -12,10 +19,10 @@ class SubdireccionSerializer(serializers.ModelSerializer):
         fields = '__all__'
     
     def get_total_departamentos(self, obj):
-        return obj.departamentos.count()
+        return _total(obj, 'total_departamentos', 'departamentos')
     
     def get_total_funcionarios(self, obj):
-        return obj.funcionarios.count()
+        return _total(obj, 'total_funcionarios', 'funcionarios')
 
 
 class DepartamentoSerializer(serializers.ModelSerializer):
@@ -29,10 +36,10 @@ class DepartamentoSerializer(serializers.ModelSerializer):
         fields = '__all__'
     
     def get_total_unidades(self, obj):
-        return obj.unidades.count()
+        return _total(obj, 'total_unidades', 'unidades')
     
     def get_total_funcionarios(self, obj):
-        return obj.funcionarios.count()
+        return _total(obj, 'total_funcionarios', 'funcionarios')
 
 
 class UnidadSerializer(serializers.ModelSerializer):
@@ -47,7 +54,7 @@ class UnidadSerializer(serializers.ModelSerializer):
         fields = '__all__'
     
     def get_total_funcionarios(self, obj):
-        return obj.funcionarios.count()
+        return _total(obj, 'total_funcionarios', 'funcionarios')
 
 
 class FuncionarioSerializer(serializers.ModelSerializer):
@@ -69,6 +76,11 @@ class FuncionarioSerializer(serializers.ModelSerializer):
             'numero_publico': {'read_only': True},
             'creado_en': {'read_only': True},
             'actualizado_en': {'read_only': True},
+            # Misma regla que la restricción funcionario_anexo_unico: vacío no cuenta
+            'anexo': {'validators': [UniqueValidator(
+                queryset=Funcionario.objects.exclude(anexo=''),
+                message='Este anexo ya está asignado a otro funcionario.'
+            )]},
         }
     
     def validate_rut(self, value):
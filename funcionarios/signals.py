@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import anexos, organigrama
+from .models import Subdireccion, Departamento, Unidad, Funcionario
+
+
+@receiver(post_save, sender=Funcionario)
+@receiver(post_delete, sender=Funcionario)
+@receiver(post_save, sender=Subdireccion)
+@receiver(post_delete, sender=Subdireccion)
+@receiver(post_save, sender=Departamento)
+@receiver(post_delete, sender=Departamento)
+@receiver(post_save, sender=Unidad)
+@receiver(post_delete, sender=Unidad)
+def invalidar_caches(sender, **kwargs):
+    """Cualquier cambio en funcionarios o en la estructura deja obsoleto el árbol"""
+    organigrama.invalidar()
+
+
+@receiver(post_save, sender=Funcionario)
+@receiver(post_delete, sender=Funcionario)
+def invalidar_mapa_anexos(sender, **kwargs):
+    """El mapa de ocupación de anexos se reconstruye tras cualquier cambio de funcionario"""
+    anexos.invalidar()
@@ -1,3 +1,235 @@
-from django.test import TestCase
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase, override_settings
 
-# Create your tests here.
+from . import anexos, estadisticas
+from .busqueda import buscar, consulta_fts
+from .importacion import Estructura, validar_fila
+from .models import Subdireccion, Departamento, Unidad, Funcionario
+
+
+def rut(numero):
+    """RUT con su dígito verificador, para crear funcionarios válidos"""
+    suma, multiplo = 0, 2
+    for digito in reversed(str(numero)):
+        suma += int(digito) * multiplo
+        multiplo = multiplo + 1 if multiplo < 7 else 2
+    dv = {11: '0', 10: 'K'}.get(11 - suma % 11, str(11 - suma % 11))
+    return f'{numero}-{dv}'
+
+
+class MapaAnexosTests(SimpleTestCase):
+    def test_posiciones_en_varios_rangos(self):
+        mapa = anexos.MapaAnexos([(400, 402), (500, 501)], ocupados=[401, 500, 999])
+        self.assertEqual(mapa.capacidad, 5)
+        self.assertEqual(list(mapa.ocupados()), [401, 500])
+        self.assertEqual(list(mapa.libres()), [400, 402, 501])
+        self.assertEqual(mapa.siguiente_libre(401), 402)
+        self.assertEqual(mapa.siguiente_libre(450), 501)
+        self.assertIsNone(mapa.siguiente_libre(600))
+        self.assertNotIn(999, mapa)
+        self.assertEqual(mapa.total_libres, 3)
+
+    @override_settings(FUNCIONARIOS_ANEXO_RANGOS=[(500, 510), (400, 420), (421, 430)])
+    def test_rangos_ordenados_y_unidos(self):
+        self.assertEqual(anexos.rangos(), [(400, 430), (500, 510)])
+
+
+@override_settings(FUNCIONARIOS_ANEXO_RANGOS=[(400, 402)])
+class AsignarAnexoTests(TestCase):
+    def setUp(self):
+        self.subdireccion = Subdireccion.objects.create(nombre='Administración')
+        self.funcionarios = [
+            Funcionario.objects.create(nombre_funcionario=f'Funcionario {numero}', rut=rut(10000000 + numero),
+                                       subdireccion=self.subdireccion)
+            for numero in range(4)
+        ]
+
+    def test_asigna_el_siguiente_libre(self):
+        funcionario, numero = anexos.asignar(self.funcionarios[0].pk)
+        self.assertEqual(numero, 400)
+        self.assertEqual(funcionario.numero_publico, '227263400')
+        _, numero = anexos.asignar(self.funcionarios[1].pk)
+        self.assertEqual(numero, 401)
+        self.assertEqual(anexos.mapa().total_ocupados, 2)
+
+    def test_anexo_ocupado(self):
+        anexos.asignar(self.funcionarios[0].pk, 401)
+        with self.assertRaises(anexos.AnexoError) as error:
+            anexos.asignar(self.funcionarios[1].pk, 401)
+        self.assertEqual(error.exception.status, 409)
+
+    def test_anexo_fuera_de_rango(self):
+        with self.assertRaises(anexos.AnexoError) as error:
+            anexos.asignar(self.funcionarios[0].pk, 500)
+        self.assertEqual(error.exception.status, 400)
+
+    def test_sin_anexos_libres(self):
+        for funcionario in self.funcionarios[:3]:
+            anexos.asignar(funcionario.pk)
+        with self.assertRaises(anexos.AnexoError) as error:
+            anexos.asignar(self.funcionarios[3].pk)
+        self.assertEqual(error.exception.status, 409)
+
+    def test_mapa_desactualizado_no_duplica(self):
+        anexos.mapa()
+        # Escritura que no pasa por los signals, como la de otro proceso
+        Funcionario.objects.filter(pk=self.funcionarios[0].pk).update(anexo='400')
+        _, numero = anexos.asignar(self.funcionarios[1].pk)
+        self.assertEqual(numero, 401)
+
+    def test_inactivo(self):
+        self.funcionarios[0].estado = False
+        self.funcionarios[0].save()
+        with self.assertRaises(anexos.AnexoError):
+            anexos.asignar(self.funcionarios[0].pk)
+
+    def test_liberar(self):
+        anexos.asignar(self.funcionarios[0].pk, 402)
+        funcionario = anexos.liberar(402)
+        self.assertEqual(funcionario.pk, self.funcionarios[0].pk)
+        self.assertEqual(anexos.mapa().siguiente_libre(402), 402)
+        with self.assertRaises(anexos.AnexoError) as error:
+            anexos.liberar(402)
+        self.assertEqual(error.exception.status, 404)
+
+
+class ValidarFilaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.subdireccion = Subdireccion.objects.create(nombre='Gestión')
+        cls.otra = Subdireccion.objects.create(nombre='Finanzas')
+        cls.departamento = Departamento.objects.create(nombre='Personas', subdireccion=cls.subdireccion)
+        cls.unidad = Unidad.objects.create(nombre='Remuneraciones', departamento=cls.departamento)
+
+    def setUp(self):
+        self.estructura = Estructura()
+
+    def test_fila_valida(self):
+        valores, errores = validar_fila(
+            {'rut': '12.345.678-5', 'nombre_funcionario': 'Ana', 'anexo': '410', 'estado': 'sí'}, self.estructura
+        )
+        self.assertEqual(errores, {})
+        self.assertEqual(valores, {'rut': '12345678-5', 'nombre_funcionario': 'Ana', 'anexo': '410', 'estado': True})
+
+    def test_errores_por_campo(self):
+        _, errores = validar_fila(
+            {'rut': '12345678-0', 'nombre_funcionario': '', 'anexo': '4a', 'estado': 'quizás'}, self.estructura
+        )
+        self.assertEqual(set(errores), {'rut', 'nombre_funcionario', 'anexo', 'estado'})
+
+    def test_inactivo_sin_anexo(self):
+        valores, _ = validar_fila(
+            {'rut': '12345678-5', 'nombre_funcionario': 'Ana', 'anexo': '410', 'estado': 'no'}, self.estructura
+        )
+        self.assertEqual(valores['anexo'], '')
+
+    def test_deduce_niveles_superiores(self):
+        valores, errores = validar_fila(
+            {'rut': '12345678-5', 'nombre_funcionario': 'Ana', 'unidad': 'remuneraciones'}, self.estructura
+        )
+        self.assertEqual(errores, {})
+        self.assertEqual(
+            (valores['subdireccion'], valores['departamento'], valores['unidad']),
+            (self.subdireccion, self.departamento, self.unidad),
+        )
+
+    def test_solo_asigna_los_niveles_del_archivo(self):
+        valores, errores = validar_fila(
+            {'rut': '12345678-5', 'nombre_funcionario': 'Ana', 'subdireccion': 'Finanzas'}, self.estructura
+        )
+        self.assertEqual(errores, {})
+        self.assertEqual(valores['subdireccion'], self.otra)
+        self.assertNotIn('departamento', valores)
+        self.assertNotIn('unidad', valores)
+
+    def test_nivel_que_no_pertenece(self):
+        _, errores = validar_fila(
+            {'rut': '12345678-5', 'nombre_funcionario': 'Ana', 'subdireccion': 'Finanzas', 'departamento': 'Personas'},
+            self.estructura,
+        )
+        self.assertIn('departamento', errores)
+
+    def test_jerarquia_de_un_funcionario_existente(self):
+        funcionario = Funcionario(subdireccion=self.otra, departamento=self.departamento, unidad=self.unidad)
+        errores = {}
+        self.estructura.validar_jerarquia(funcionario, errores)
+        self.assertEqual(set(errores), {'departamento'})
+
+
+class ConsultaFtsTests(SimpleTestCase):
+    def test_terminos_como_prefijos(self):
+        self.assertEqual(consulta_fts(['gonzalez', 'ana']), '"gonzalez"* "ana"*')
+
+    def test_rut_sin_puntos_ni_guion(self):
+        self.assertEqual(consulta_fts(['12.345.678-5']), '"123456785"*')
+        self.assertEqual(consulta_fts(['12345678-k']), '"12345678k"*')
+
+    def test_comillas_escapadas(self):
+        self.assertEqual(consulta_fts(['o"brien']), '"o""brien"*')
+
+    def test_sin_nada_que_buscar(self):
+        self.assertIsNone(consulta_fts(['-', '...']))
+        self.assertIsNone(consulta_fts([]))
+
+
+class BuscarTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        subdireccion = Subdireccion.objects.create(nombre='Gestión')
+        for numero, nombre, cargo in [
+            (12345678, 'María González Soto', 'Analista'),
+            (11111111, 'José Muñoz', 'Soto Jefe'),
+            (22222222, 'Pedro Soto Soto', 'Analista'),
+        ]:
+            Funcionario.objects.create(nombre_funcionario=nombre, rut=rut(numero), cargo=cargo, subdireccion=subdireccion)
+
+    def nombres(self, terminos, **opciones):
+        return list(buscar(Funcionario.objects.all(), terminos, **opciones).values_list('nombre_funcionario', flat=True))
+
+    def test_sin_tildes_y_por_prefijo(self):
+        self.assertEqual(self.nombres(['gonzalez', 'mar']), ['María González Soto'])
+        self.assertEqual(self.nombres(['MUNOZ']), ['José Muñoz'])
+
+    def test_rut_con_y_sin_formato(self):
+        self.assertEqual(self.nombres(['12.345.678-5']), ['María González Soto'])
+        self.assertEqual(self.nombres(['123456785']), ['María González Soto'])
+
+    def test_relevancia_prefiere_el_nombre(self):
+        self.assertEqual(self.nombres(['soto']), ['Pedro Soto Soto', 'María González Soto', 'José Muñoz'])
+
+    def test_sin_orden_filtra_por_id(self):
+        queryset = buscar(Funcionario.objects.order_by('nombre_funcionario'), ['soto'], ordenar=False)
+        self.assertNotIn('bm25', str(queryset.query))
+        self.assertEqual(queryset.count(), 3)
+
+    def test_terminos_vacios(self):
+        self.assertEqual(buscar(Funcionario.objects.all(), ['']).count(), 3)
+        self.assertEqual(buscar(Funcionario.objects.all(), ['...']).count(), 0)
+
+    def test_sigue_el_indice_tras_actualizar(self):
+        funcionario = Funcionario.objects.get(nombre_funcionario='José Muñoz')
+        funcionario.nombre_funcionario = 'José Riquelme'
+        funcionario.save()
+        self.assertEqual(self.nombres(['riquelme']), ['José Riquelme'])
+        self.assertEqual(self.nombres(['munoz']), [])
+
+
+class EstadisticasCacheTests(TestCase):
+    def setUp(self):
+        self.subdireccion = Subdireccion.objects.create(nombre='Gestión')
+        self.funcionario = Funcionario.objects.create(nombre_funcionario='Ana', rut=rut(12345678),
+                                                      subdireccion=self.subdireccion)
+
+    def activos(self):
+        return estadisticas.estadisticas(Funcionario.objects.all(), QueryDict())['activos']
+
+    def test_escrituras_cambian_la_clave(self):
+        self.assertEqual(self.activos(), 1)
+        self.assertEqual(self.activos(), 1)
+        self.funcionario.estado = False
+        self.funcionario.save()
+        self.assertEqual(self.activos(), 0)
+        Funcionario.objects.create(nombre_funcionario='Pedro', rut=rut(11111111), subdireccion=self.subdireccion)
+        self.assertEqual(self.activos(), 1)
+        self.funcionario.delete()
+        self.assertEqual(estadisticas.estadisticas(Funcionario.objects.all(), QueryDict())['total'], 1)
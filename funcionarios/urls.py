@@ -5,7 +5,8 @@ from .views import (
     DepartamentoViewSet,
     UnidadViewSet,
     FuncionarioViewSet,
-    ControlAnexosViewSet
+    ControlAnexosViewSet,
+    OrganigramaViewSet
 )
 
 router = DefaultRouter()
@@ -14,6 +15,7 @@ router.register('departamentos', DepartamentoViewSet)
 router.register('unidades', UnidadViewSet)
 router.register('funcionarios', FuncionarioViewSet)
 router.register('control-anexos', ControlAnexosViewSet, basename='control-anexos')
+router.register('org-tree', OrganigramaViewSet, basename='org-tree')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -0,0 +1,28 @@
+"""
+Versión de las cachés en memoria del proceso, derivada de la base de datos.
+
+Cada proceso (por ejemplo, cada worker de gunicorn) guarda su propia copia
+del organigrama, del mapa de anexos y de las estadísticas, así que la versión
+no puede vivir en una caché local: se calcula con una consulta que cuenta las
+filas y toma la última fecha de actualización de cada tabla. Cualquier alta,
+baja o modificación hecha desde cualquier proceso la cambia; ``bulk_update``
+también, porque la importación actualiza ``actualizado_en``.
+"""
+import hashlib
+
+from django.db import connection
+
+
+def firma(*modelos):
+    """Resumen de las tablas de ``modelos`` que cambia con cada escritura, en una consulta"""
+    quote = connection.ops.quote_name
+    # Una subconsulta por agregado, para que MAX use el índice de actualizado_en
+    partes = []
+    for modelo in modelos:
+        tabla = quote(modelo._meta.db_table)
+        columna = quote(modelo._meta.get_field('actualizado_en').column)
+        partes.append(f'(SELECT COUNT(*) FROM {tabla}), (SELECT MAX({columna}) FROM {tabla})')
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT ' + ', '.join(partes))
+        fila = cursor.fetchone()
+    return hashlib.md5(repr(fila).encode()).hexdigest()
@@ -1,8 +1,18 @@
+from django.db.models import Prefetch
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 
+from core.mixins import SparseFieldsMixin
+from core.pagination import OptionalCursorPagination
+
+from . import anexos, organigrama
+from .busqueda import FuncionarioSearchFilter, buscar
+from .estadisticas import estadisticas as obtener_estadisticas
+from .importacion import ImportacionError, importar as importar_funcionarios
 from .models import Subdireccion, Departamento, Unidad, Funcionario
 from .serializers import (
     SubdireccionSerializer,
@@ -15,7 +25,7 @@ from .serializers import (
 
 class SubdireccionViewSet(viewsets.ModelViewSet):
     """ViewSet para Subdirecciones"""
-    queryset = Subdireccion.objects.all()
+    queryset = Subdireccion.objects.con_totales()
     serializer_class = SubdireccionSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre']
@@ -25,7 +35,7 @@ class SubdireccionViewSet(viewsets.ModelViewSet):
 
 class DepartamentoViewSet(viewsets.ModelViewSet):
     """ViewSet para Departamentos con filtro por subdirección"""
-    queryset = Departamento.objects.select_related('subdireccion').all()
+    queryset = Departamento.objects.select_related('subdireccion').con_totales()
     serializer_class = DepartamentoSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['subdireccion', 'activo']
@@ -36,7 +46,7 @@ class DepartamentoViewSet(viewsets.ModelViewSet):
 
 class UnidadViewSet(viewsets.ModelViewSet):
     """ViewSet para Unidades con filtro por departamento"""
-    queryset = Unidad.objects.select_related('departamento', 'departamento__subdireccion').all()
+    queryset = Unidad.objects.select_related('departamento', 'departamento__subdireccion').con_totales()
     serializer_class = UnidadSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['departamento', 'departamento__subdireccion', 'activo']
@@ -45,17 +55,19 @@ class UnidadViewSet(viewsets.ModelViewSet):
     ordering = ['departamento__subdireccion__nombre', 'departamento__nombre', 'nombre']
 
 
-class FuncionarioViewSet(viewsets.ModelViewSet):
+class FuncionarioViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """ViewSet para Funcionarios con búsqueda y filtros avanzados"""
     queryset = Funcionario.objects.select_related(
         'subdireccion', 'departamento', 'unidad',
         'departamento__subdireccion', 'unidad__departamento'
     ).all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # La búsqueda va después del orden para poder ordenar por relevancia
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FuncionarioSearchFilter]
     filterset_fields = ['subdireccion', 'departamento', 'unidad', 'estado']
     search_fields = ['nombre_funcionario', 'rut', 'anexo', 'numero_publico', 'cargo']
     ordering_fields = ['nombre_funcionario', 'rut', 'cargo', 'creado_en']
     ordering = ['nombre_funcionario']
+    pagination_class = OptionalCursorPagination
     
     def get_serializer_class(self):
         """Usar serializer simplificado para listados"""
@@ -74,6 +86,15 @@ class FuncionarioViewSet(viewsets.ModelViewSet):
         elif activos == 'false':
             queryset = queryset.filter(estado=False)
         
+        # El detalle anida subdirección, departamento y unidad con sus totales:
+        # se traen anotados en tres consultas en vez de un COUNT por total
+        if self.action != 'list' and not self.get_requested_fields():
+            queryset = queryset.select_related(None).prefetch_related(
+                Prefetch('subdireccion', queryset=Subdireccion.objects.con_totales()),
+                Prefetch('departamento', queryset=Departamento.objects.select_related('subdireccion').con_totales()),
+                Prefetch('unidad', queryset=Unidad.objects.select_related('departamento__subdireccion').con_totales()),
+            )
+        
         return queryset
     
     @action(detail=True, methods=['post'])
@@ -85,116 +106,117 @@ class FuncionarioViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(funcionario)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def importar(self, request):
+        """Importar funcionarios desde un CSV o XLSX (campo ``archivo``)
+
+        Responde el resumen con los errores por línea; las filas válidas se
+        guardan aunque otras fallen. Con ``dry_run=true`` solo valida.
+        """
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response(
+                {'error': 'Debes adjuntar un archivo CSV o XLSX'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            resultado = importar_funcionarios(
+                archivo.file,
+                archivo.name,
+                encoding=request.data.get('encoding') or 'utf-8-sig',
+                dry_run=request.data.get('dry_run') in ('true', '1'),
+            )
+        except (ImportacionError, LookupError) as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultado)
+    
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
-        """Obtener estadísticas de funcionarios"""
-        total = self.get_queryset().count()
-        activos = self.get_queryset().filter(estado=True).count()
-        inactivos = total - activos
-        
-        # Por subdirección
-        por_subdireccion = {}
-        subdirecciones = Subdireccion.objects.all()
-        for sub in subdirecciones:
-            por_subdireccion[sub.nombre] = sub.funcionarios.filter(estado=True).count()
-        
-        return Response({
-            'total': total,
-            'activos': activos,
-            'inactivos': inactivos,
-            'por_subdireccion': por_subdireccion
-        })
+        """Obtener estadísticas de funcionarios
+
+        Acepta los mismos filtros que el listado (subdireccion, departamento,
+        unidad, estado, activos, search) y responde desde la caché mientras no
+        cambien los funcionarios ni la estructura organizacional.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(obtener_estadisticas(queryset, request.query_params))
 
 
 class ControlAnexosViewSet(viewsets.ViewSet):
-    """ViewSet para gestión centralizada de anexos telefónicos"""
-    
-    ANEXO_MIN = 400
-    ANEXO_MAX = 600
+    """ViewSet para gestión centralizada de anexos telefónicos
+
+    La disponibilidad sale del mapa de bits de ``funcionarios.anexos``; los
+    rangos habilitados se configuran en ``FUNCIONARIOS_ANEXO_RANGOS``.
+    """
     
     def list(self, request):
         """Obtener anexos disponibles y ocupados"""
-        # Generar rango de anexos
-        rango_anexos = list(range(self.ANEXO_MIN, self.ANEXO_MAX + 1))
+        mapa = anexos.mapa()
         
-        # Obtener funcionarios activos con anexo
+        # Solo se cargan los funcionarios que ocupan un anexo de los rangos
         funcionarios_con_anexo = Funcionario.objects.filter(
-            estado=True
-        ).exclude(
-            anexo__isnull=True
-        ).exclude(
-            anexo__exact=''
-        ).select_related('subdireccion', 'departamento')
+            anexo__in=[str(numero) for numero in mapa.ocupados()]
+        ).select_related('subdireccion', 'departamento').only(
+            'id', 'nombre_funcionario', 'rut', 'cargo', 'anexo',
+            'subdireccion__nombre', 'departamento__nombre'
+        )
         
         # Filtro de búsqueda
         search = request.query_params.get('search', '')
         if search:
-            funcionarios_con_anexo = funcionarios_con_anexo.filter(
-                nombre_funcionario__icontains=search
-            )
-        
-        # Procesar anexos ocupados
-        anexos_ocupados = []
-        anexos_ocupados_set = set()
+            funcionarios_con_anexo = buscar(funcionarios_con_anexo, search.split(), ordenar=False)
         
-        for func in funcionarios_con_anexo:
-            if func.anexo.isdigit():
-                numero = int(func.anexo)
-                if self.ANEXO_MIN <= numero <= self.ANEXO_MAX:
-                    anexos_ocupados.append({
-                        'anexo': numero,
-                        'funcionario': {
-                            'id': func.id,
-                            'nombre': func.nombre_funcionario,
-                            'rut': func.rut,
-                            'cargo': func.cargo or '',
-                            'subdireccion': func.subdireccion.nombre if func.subdireccion else '',
-                            'departamento': func.departamento.nombre if func.departamento else ''
-                        }
-                    })
-                    anexos_ocupados_set.add(numero)
-        
-        # Ordenar por anexo
+        anexos_ocupados = [
+            {
+                'anexo': int(func.anexo),
+                'funcionario': {
+                    'id': func.id,
+                    'nombre': func.nombre_funcionario,
+                    'rut': func.rut,
+                    'cargo': func.cargo or '',
+                    'subdireccion': func.subdireccion.nombre if func.subdireccion else '',
+                    'departamento': func.departamento.nombre if func.departamento else ''
+                }
+            }
+            for func in funcionarios_con_anexo
+        ]
         anexos_ocupados.sort(key=lambda x: x['anexo'])
         
-        # Calcular anexos disponibles
-        anexos_disponibles = [num for num in rango_anexos if num not in anexos_ocupados_set]
-        
-        # Obtener funcionarios activos para el select
-        funcionarios_activos = Funcionario.objects.filter(
-            estado=True
-        ).order_by('nombre_funcionario').values(
-            'id', 'nombre_funcionario', 'rut', 'anexo'
-        )
-        
         return Response({
-            'anexos_disponibles': anexos_disponibles,
+            'anexos_disponibles': list(mapa.libres()),
             'anexos_ocupados': anexos_ocupados,
-            'funcionarios_activos': list(funcionarios_activos),
-            'anexo_min': self.ANEXO_MIN,
-            'anexo_max': self.ANEXO_MAX
+            'rangos': mapa.rangos,
+            'capacidad': mapa.capacidad,
+            'total_ocupados': mapa.total_ocupados,
+            'siguiente_libre': mapa.siguiente_libre(),
+            'anexo_min': mapa.rangos[0][0],
+            'anexo_max': mapa.rangos[-1][1]
         })
     
+    @action(detail=False, methods=['get'])
+    def siguiente(self, request):
+        """Siguiente anexo libre, opcionalmente desde ?desde="""
+        desde = request.query_params.get('desde')
+        if desde is not None and not desde.isdigit():
+            return Response(
+                {'error': 'Número de anexo inválido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({'anexo': anexos.mapa().siguiente_libre(int(desde) if desde else None)})
+    
     @action(detail=False, methods=['post'])
     def asignar(self, request):
-        """Asignar anexo a un funcionario"""
+        """Asignar un anexo a un funcionario; sin anexo se asigna el siguiente libre"""
         anexo = request.data.get('anexo')
         funcionario_id = request.data.get('funcionario_id')
         
         # Validar anexo
-        if not anexo or not str(anexo).isdigit():
+        if anexo not in (None, '') and not str(anexo).isdigit():
             return Response(
                 {'error': 'Número de anexo inválido'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        numero_anexo = int(anexo)
-        if not (self.ANEXO_MIN <= numero_anexo <= self.ANEXO_MAX):
-            return Response(
-                {'error': f'El anexo debe estar entre {self.ANEXO_MIN} y {self.ANEXO_MAX}'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         # Validar funcionario
         if not funcionario_id:
             return Response(
@@ -203,37 +225,15 @@ class ControlAnexosViewSet(viewsets.ViewSet):
             )
         
         try:
-            funcionario = Funcionario.objects.get(pk=funcionario_id)
-        except Funcionario.DoesNotExist:
-            return Response(
-                {'error': 'Funcionario no encontrado'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Validar que el funcionario esté activo
-        if not funcionario.estado:
-            return Response(
-                {'error': 'No puedes asignar anexos a funcionarios inactivos'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Verificar que el anexo no esté ocupado por otro funcionario
-        anexo_ocupado = Funcionario.objects.filter(
-            anexo=str(numero_anexo)
-        ).exclude(pk=funcionario.pk).first()
-        
-        if anexo_ocupado:
-            return Response(
-                {'error': f'El anexo {numero_anexo} ya está asignado a {anexo_ocupado.nombre_funcionario}'},
-                status=status.HTTP_400_BAD_REQUEST
+            funcionario, numero_anexo = anexos.asignar(
+                funcionario_id, int(anexo) if anexo not in (None, '') else None
             )
-        
-        # Asignar anexo
-        funcionario.anexo = str(numero_anexo)
-        funcionario.save()
+        except anexos.AnexoError as error:
+            return Response({'error': str(error)}, status=error.status)
         
         return Response({
             'success': True,
+            'anexo': numero_anexo,
             'message': f'Anexo {numero_anexo} asignado a {funcionario.nombre_funcionario}'
         })
     
@@ -250,24 +250,34 @@ class ControlAnexosViewSet(viewsets.ViewSet):
             )
         
         numero_anexo = int(anexo)
-        
-        # Buscar funcionario con ese anexo
-        funcionarios = Funcionario.objects.filter(anexo=str(numero_anexo))
-        
-        if not funcionarios.exists():
-            return Response(
-                {'error': f'No hay ningún funcionario con el anexo {numero_anexo}'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Liberar anexo
-        count = 0
-        for func in funcionarios:
-            func.anexo = ''
-            func.save()
-            count += 1
+        try:
+            funcionario = anexos.liberar(numero_anexo)
+        except anexos.AnexoError as error:
+            return Response({'error': str(error)}, status=error.status)
         
         return Response({
             'success': True,
-            'message': f'Anexo {numero_anexo} liberado ({count} funcionario(s) actualizado(s))'
+            'message': f'Anexo {numero_anexo} liberado ({funcionario.nombre_funcionario})'
         })
+
+
+class OrganigramaViewSet(viewsets.ViewSet):
+    """Árbol completo Subdirección → Departamento → Unidad con totales
+
+    Se sirve desde memoria con un ETag; si el cliente envía el mismo ETag en
+    If-None-Match recibe 304 sin cuerpo.
+    """
+
+    def list(self, request):
+        etag, datos = organigrama.arbol()
+        etag = quote_etag(etag)
+        # If-None-Match usa comparación débil: W/"x" coincide con "x"
+        enviados = [valor.removeprefix('W/') for valor in parse_etags(request.headers.get('If-None-Match', ''))]
+        if etag in enviados or '*' in enviados:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(datos)
+        response['ETag'] = etag
+        # El navegador guarda la respuesta pero la revalida en cada uso
+        response['Cache-Control'] = 'private, no-cache'
+        return response
@@ -0,0 +1,187 @@
+import json
+import logging
+import urllib.request
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Printer, PrinterAlertEvent
+from .summary import COLORS, toner_thresholds
+
+logger = logging.getLogger(__name__)
+
+OFFLINE = "offline"
+CRITICAL_ERRORS = {"Sin papel", "Atasco de papel", "Toner agotado", "Requiere servicio"}
+COLOR_NAMES = {"black": "negro", "cyan": "cian", "magenta": "magenta", "yellow": "amarillo"}
+
+Condition = Tuple[str, str]  # (severity, message)
+
+def _debounce() -> int:
+    return max(1, getattr(settings, "PRINTER_ALERT_DEBOUNCE", 2))
+
+def result_conditions(result) -> Dict[str, Condition]:
+    """Alert conditions present in a successful poll, keyed by a stable name."""
+    conditions: Dict[str, Condition] = {}
+    for label in result.errors:
+        severity = PrinterAlertEvent.SEVERITY_CRITICAL if label in CRITICAL_ERRORS else PrinterAlertEvent.SEVERITY_WARNING
+        conditions[f"error:{label}"] = (severity, label)
+    levels = result.to_levels()
+    thresholds = sorted(toner_thresholds().items(), key=lambda item: item[1])
+    for color in COLORS:
+        level = levels.get(color)
+        if level is None:
+            continue
+        for name, limit in thresholds:
+            if level < limit:
+                severity = PrinterAlertEvent.SEVERITY_CRITICAL if name == "critical" else PrinterAlertEvent.SEVERITY_WARNING
+                conditions[f"toner:{name}:{color}"] = (
+                    severity,
+                    f"Toner {COLOR_NAMES[color]} bajo {limit}% ({level}%)",
+                )
+    return conditions
+
+def failure_conditions(error: str) -> Dict[str, Condition]:
+    return {OFFLINE: (PrinterAlertEvent.SEVERITY_CRITICAL, f"Sin respuesta: {error}"[:200])}
+
+def evaluate(
+    printer: Printer,
+    observed: Dict[str, Condition],
+    scope: Optional[Set[str]] = None,
+) -> List[PrinterAlertEvent]:
+    """Fold one poll's conditions into ``printer.alert_state`` and return the transitions.
+
+    A condition has to be seen (or missed) in ``PRINTER_ALERT_DEBOUNCE``
+    consecutive polls before it is raised (or cleared), so a flapping state
+    produces no events. Only keys in ``scope`` are judged when it is given: a
+    failed poll says nothing about paper or toner. The returned events are
+    unsaved; the caller writes them with the printer.
+    """
+    debounce = _debounce()
+    state = dict(printer.alert_state or {})
+    events = []
+    for key in sorted(set(state) | set(observed)):
+        if scope is not None and key not in scope:
+            continue
+        entry = dict(state.get(key) or {"active": False, "streak": 0, "severity": "", "message": ""})
+        seen = key in observed
+        if seen:
+            entry["severity"], entry["message"] = observed[key]
+        if seen == entry["active"]:
+            entry["streak"] = 0
+        else:
+            entry["streak"] += 1
+            if entry["streak"] >= debounce:
+                entry["active"] = seen
+                entry["streak"] = 0
+                events.append(
+                    PrinterAlertEvent(
+                        printer=printer,
+                        kind=PrinterAlertEvent.KIND_RAISED if seen else PrinterAlertEvent.KIND_CLEARED,
+                        condition=key[:120],
+                        severity=entry["severity"] or PrinterAlertEvent.SEVERITY_WARNING,
+                        message=entry["message"][:255],
+                    )
+                )
+        if entry["active"] or entry["streak"]:
+            state[key] = entry
+        else:
+            state.pop(key, None)
+    printer.alert_state = state
+    return events
+
+def evaluate_result(printer: Printer, result) -> List[PrinterAlertEvent]:
+    return evaluate(printer, result_conditions(result))
+
+def evaluate_failure(printer: Printer, error: str) -> List[PrinterAlertEvent]:
+    return evaluate(printer, failure_conditions(error), scope={OFFLINE})
+
+# -- dispatch ---------------------------------------------------------------
+
+def _describe(event: PrinterAlertEvent) -> str:
+    prefix = "ALERTA" if event.kind == PrinterAlertEvent.KIND_RAISED else "Resuelta"
+    return f"[{prefix}] {event.printer.name} ({event.printer.ip_address}): {event.message}"
+
+def log_sink(events: Sequence[PrinterAlertEvent]):
+    for event in events:
+        level = logging.WARNING if event.kind == PrinterAlertEvent.KIND_RAISED else logging.INFO
+        logger.log(level, _describe(event))
+
+def email_sink(events: Sequence[PrinterAlertEvent]):
+    recipients = getattr(settings, "PRINTER_ALERT_EMAILS", [])
+    if not recipients:
+        return
+    raised = sum(event.kind == PrinterAlertEvent.KIND_RAISED for event in events)
+    send_mail(
+        subject=f"Impresoras: {raised} alertas nuevas, {len(events) - raised} resueltas",
+        message="\n".join(_describe(event) for event in events),
+        from_email=None,
+        recipient_list=recipients,
+    )
+
+def webhook_sink(events: Sequence[PrinterAlertEvent]):
+    url = getattr(settings, "PRINTER_ALERT_WEBHOOK_URL", "")
+    if not url:
+        return
+    payload = [
+        {
+            "id": event.id,
+            "printer_id": event.printer_id,
+            "printer": event.printer.name,
+            "ip_address": event.printer.ip_address,
+            "kind": event.kind,
+            "condition": event.condition,
+            "severity": event.severity,
+            "message": event.message,
+            "created_at": event.created_at.isoformat(),
+        }
+        for event in events
+    ]
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=10):
+        pass
+
+SINKS: List[Callable[[Sequence[PrinterAlertEvent]], None]] = [log_sink, email_sink, webhook_sink]
+
+def dispatch_pending(batch_size: Optional[int] = None) -> int:
+    """Deliver one batch of undispatched events to every sink; returns how many were sent.
+
+    A failing sink leaves the batch pending for the next run, until an event
+    has used up ``PRINTER_ALERT_MAX_ATTEMPTS`` and is given up on.
+    """
+    batch_size = batch_size or getattr(settings, "PRINTER_ALERT_BATCH_SIZE", 100)
+    events = list(
+        PrinterAlertEvent.objects.filter(dispatched_at__isnull=True).select_related("printer")[:batch_size]
+    )
+    if not events:
+        return 0
+    ids = [event.id for event in events]
+    try:
+        for sink in SINKS:
+            sink(events)
+    except Exception as exc:
+        logger.exception("Printer alert dispatch failed")
+        pending = PrinterAlertEvent.objects.filter(pk__in=ids)
+        pending.update(attempts=F("attempts") + 1, last_error=str(exc)[:1000])
+        max_attempts = getattr(settings, "PRINTER_ALERT_MAX_ATTEMPTS", 5)
+        pending.filter(attempts__gte=max_attempts).update(dispatched_at=timezone.now())
+        return 0
+    PrinterAlertEvent.objects.filter(pk__in=ids).update(dispatched_at=timezone.now(), attempts=F("attempts") + 1)
+    return len(events)
+
+def prune_dispatched(now=None) -> int:
+    now = now or timezone.now()
+    days = getattr(settings, "PRINTER_ALERT_RETENTION_DAYS", 30)
+    deleted, _ = PrinterAlertEvent.objects.filter(
+        dispatched_at__isnull=False,
+        dispatched_at__lt=now - timedelta(days=days),
+    ).delete()
+    return deleted
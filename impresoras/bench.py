@@ -0,0 +1,193 @@
+"""Polling benchmarks against simulated printers (``manage.py bench_printers``).
+
+Every scenario polls the same printers through one of the real entry points
+and reports throughput, latency percentiles, CPU seconds per poll and SNMP
+requests per poll. CPU is process time of the benchmark process, so it
+covers the shared SNMP loop and database writes but not the agents, which
+run in their own process.
+"""
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from django.db import close_old_connections
+
+from .jobs import start_refresh_job
+from .models import Printer, PrinterRefreshJob
+from .monitor import PrinterMonitor
+from .services import PollingError, poll_fleet, poll_printer, store_poll_outcomes
+
+# Printer state a poll learns and later polls rely on; cleared before each
+# scenario so they all start from the same cold fleet.
+_LEARNED_STATE = {
+    "last_check": None,
+    "last_ok": None,
+    "last_community": "",
+    "last_mp_model": None,
+    "consecutive_failures": 0,
+    "breaker_open_until": None,
+    "supply_map": {},
+    "supply_fingerprint": "",
+    "alert_state": {},
+}
+
+@dataclass
+class Sample:
+    latencies: List[float] = field(default_factory=list)
+    ok: int = 0
+    failed: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+    requests: int = 0
+
+    def add(self, latency: float, ok: bool):
+        self.latencies.append(latency)
+        if ok:
+            self.ok += 1
+        else:
+            self.failed += 1
+
+    def merge(self, other: "Sample"):
+        self.latencies += other.latencies
+        self.ok += other.ok
+        self.failed += other.failed
+        self.wall += other.wall
+        self.cpu += other.cpu
+        self.requests += other.requests
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+def summarize(sample: Sample) -> dict:
+    polls = sample.ok + sample.failed
+    return {
+        "polls": polls,
+        "ok": sample.ok,
+        "failed": sample.failed,
+        "wall_seconds": round(sample.wall, 3),
+        "polls_per_second": round(polls / sample.wall, 2) if sample.wall else None,
+        "latency_ms": {
+            "p50": _ms(percentile(sample.latencies, 0.50)),
+            "p99": _ms(percentile(sample.latencies, 0.99)),
+            "max": _ms(max(sample.latencies, default=None)),
+            "mean": _ms(sum(sample.latencies) / len(sample.latencies)) if sample.latencies else None,
+        },
+        "cpu_ms_per_poll": _ms(sample.cpu / polls) if polls else None,
+        "requests_per_poll": round(sample.requests / polls, 2) if polls else None,
+    }
+
+def reset_printers(printers: List[Printer]):
+    Printer.objects.filter(pk__in=[printer.pk for printer in printers]).update(**_LEARNED_STATE)
+
+def warm_up(printers: List[Printer], concurrency: Optional[int] = None):
+    """Poll and store every printer once, so the measured rounds see a steady fleet."""
+    outcomes = [
+        (outcome.printer, outcome.result, outcome.error)
+        for outcome in poll_fleet(printers, concurrency=concurrency)
+    ]
+    store_poll_outcomes(outcomes)
+
+def _fresh(printers: List[Printer]) -> List[Printer]:
+    close_old_connections()
+    return list(Printer.objects.filter(pk__in=[printer.pk for printer in printers]).order_by("pk"))
+
+# -- scenarios ----------------------------------------------------------------
+
+def run_poll_printer(printers: List[Printer], sample: Sample, **options):
+    """One ``poll_printer`` call at a time, results not stored."""
+    for printer in printers:
+        started = time.perf_counter()
+        try:
+            poll_printer(printer)
+            ok = True
+        except PollingError:
+            ok = False
+        sample.add(time.perf_counter() - started, ok)
+
+def run_poll_fleet(printers: List[Printer], sample: Sample, concurrency: Optional[int] = None, **options):
+    """``poll_fleet`` over every printer, results not stored."""
+    for outcome in poll_fleet(printers, concurrency=concurrency):
+        sample.add(outcome.elapsed, outcome.ok)
+
+def run_refresh_all(printers: List[Printer], sample: Sample, **options):
+    """The ``refresh_all`` job, results stored; latency is job start to result row."""
+    job = start_refresh_job(printers)
+    while True:
+        job.refresh_from_db(fields=["status"])
+        if job.finished:
+            break
+        time.sleep(0.05)
+    if job.status != PrinterRefreshJob.STATUS_DONE:
+        raise RuntimeError(f"Refresh job ended as {job.status}.")
+    for result in job.results.all():
+        sample.add((result.created_at - job.created_at).total_seconds(), result.ok)
+
+class _TimedMonitor(PrinterMonitor):
+    def __init__(self, printers: List[Printer], sample: Sample, **options):
+        super().__init__(compact_interval=None, **options)
+        self.printers = printers
+        self.sample = sample
+
+    async def load_printers(self) -> List[Printer]:
+        return self.printers
+
+    async def _poll(self, schedule, semaphore):
+        started = time.perf_counter()
+        await super()._poll(schedule, semaphore)
+        self.sample.add(time.perf_counter() - started, schedule.failures == 0)
+
+def run_monitor(printers: List[Printer], sample: Sample, concurrency: Optional[int] = None, **options):
+    """One ``PrinterMonitor`` pass (``monitor_printers --once``), results stored."""
+    monitor = _TimedMonitor(printers, sample, concurrency=concurrency)
+    asyncio.run(monitor.run(asyncio.Event(), once=True))
+
+SCENARIOS: Dict[str, Callable] = {
+    "poll_printer": run_poll_printer,
+    "poll_fleet": run_poll_fleet,
+    "refresh_all": run_refresh_all,
+    "monitor": run_monitor,
+}
+
+def run_scenario(
+    name: str,
+    printers: List[Printer],
+    rounds: int = 3,
+    warmup: int = 1,
+    requests: Optional[Callable[[], int]] = None,
+    **options,
+) -> dict:
+    """Run scenario ``name`` from a cold fleet.
+
+    ``warmup`` unmeasured fleet polls are stored first (pass 0 to measure
+    cold printers); ``requests`` returns the agents' request counter, for
+    requests per poll.
+    """
+    scenario = SCENARIOS[name]
+    reset_printers(printers)
+    for _ in range(warmup):
+        warm_up(_fresh(printers), options.get("concurrency"))
+    total = Sample()
+    for _ in range(rounds):
+        sample = Sample()
+        current = _fresh(printers)
+        requests_before = requests() if requests else 0
+        cpu_before = time.process_time()
+        started = time.perf_counter()
+        scenario(current, sample, **options)
+        sample.wall = time.perf_counter() - started
+        sample.cpu = time.process_time() - cpu_before
+        sample.requests = requests() - requests_before if requests else 0
+        total.merge(sample)
+    summary = summarize(total)
+    if not requests:
+        summary["requests_per_poll"] = None
+    return summary
@@ -0,0 +1,275 @@
+import asyncio
+import ipaddress
+import math
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Collection, Dict, Iterable, List, Optional, Sequence
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Printer
+from .services import SERIAL_OID, SHARED_WAIT_GRACE, SUPPLY_COLUMNS, PollingError, _as_text, _run_shared, _snmp_pool
+from .snmp import Missing, SnmpError
+from .supplies import CYAN, MAGENTA, YELLOW, classify
+
+# Columns probed with one GETNEXT: each lands on instance .0/.1 when the agent
+# has the object, or somewhere past the column when it does not.
+PROBE_COLUMNS = (
+    ("sys_object_id", "1.3.6.1.2.1.1.2"),
+    ("sys_descr", "1.3.6.1.2.1.1.1"),
+    ("sys_name", "1.3.6.1.2.1.1.5"),
+    ("printer_name", "1.3.6.1.2.1.43.5.1.1.16"),  # prtGeneralPrinterName
+    ("serial_number", SERIAL_OID.rpartition(".")[0]),  # prtGeneralSerialNumber
+)
+
+PROBE_TIMEOUT = 1
+MAX_SWEEP_HOSTS = 4096
+# Supply rows read from a responder to tell colour printers from black and white.
+MAX_SUPPLY_ROWS = 16
+
+class DiscoveryError(Exception):
+    """Raised for sweep requests that cannot be run (bad or oversized ranges)."""
+
+@dataclass
+class DiscoveredDevice:
+    ip_address: str
+    community: str
+    sys_object_id: str = ""
+    sys_descr: str = ""
+    sys_name: str = ""
+    printer_name: str = ""
+    serial_number: str = ""
+    supplies: List[str] = field(default_factory=list)
+
+    @property
+    def is_printer(self) -> bool:
+        return bool(self.printer_name or self.serial_number)
+
+    @property
+    def printer_type(self) -> str:
+        """Colour when any supply is a cyan, magenta or yellow toner."""
+        kinds = {classify(description) for description in self.supplies}
+        return Printer.TYPE_COLOR if kinds & {CYAN, MAGENTA, YELLOW} else Printer.TYPE_BW
+
+def parse_networks(networks: Iterable[str]) -> List[ipaddress.IPv4Network]:
+    parsed = []
+    for network in networks:
+        try:
+            parsed.append(ipaddress.IPv4Network(str(network).strip(), strict=False))
+        except ValueError as exc:
+            raise DiscoveryError(f"Rango inválido: {network} ({exc})")
+    total = sum(n.num_addresses for n in parsed)
+    if total > MAX_SWEEP_HOSTS:
+        raise DiscoveryError(f"El barrido supera el máximo de {MAX_SWEEP_HOSTS} direcciones.")
+    return parsed
+
+class _RateLimiter:
+    """Spaces probe starts evenly so the sweep never exceeds ``rate`` per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / max(rate, 1)
+        self.next_at = 0.0
+
+    async def wait(self):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start_at = max(now, self.next_at)
+        self.next_at = start_at + self.interval
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+def _text(value) -> str:
+    if value is None or isinstance(value, Missing):
+        return ""
+    return _as_text(value)
+
+async def _probe(client, host: str, port: int, communities: Sequence[str]) -> Optional[DiscoveredDevice]:
+    columns = [column for _, column in PROBE_COLUMNS]
+    for community in communities:
+        try:
+            error_status, _, var_binds = await client.get_next(
+                host, port, community, columns, timeout=PROBE_TIMEOUT, retries=1
+            )
+        except SnmpError:
+            continue
+        if error_status or len(var_binds) != len(columns):
+            continue
+        values = {}
+        for (name, column), (oid, value) in zip(PROBE_COLUMNS, var_binds):
+            values[name] = _text(value) if oid.startswith(column + ".") else ""
+        device = DiscoveredDevice(ip_address=host, community=community, **values)
+        if device.is_printer:
+            try:
+                rows = await client.walk(
+                    host, port, community, SUPPLY_COLUMNS["description"],
+                    max_rows=MAX_SUPPLY_ROWS, timeout=PROBE_TIMEOUT, retries=1,
+                )
+            except SnmpError:
+                rows = []
+            device.supplies = [_text(value) for _, value in rows]
+        return device
+    return None
+
+def sweep_hosts(networks: Sequence[ipaddress.IPv4Network]) -> List[str]:
+    """Addresses probed for ``networks``: every host, or both ends of /31 and /32."""
+    return [str(host) for network in networks for host in (network.hosts() if network.prefixlen < 31 else network)]
+
+SWEEP_CONCURRENCY = 256
+
+def sweep_timeout(
+    networks: Sequence[ipaddress.IPv4Network],
+    communities: Optional[Sequence[str]] = None,
+    rate: Optional[float] = None,
+    concurrency: int = SWEEP_CONCURRENCY,
+    **options,
+) -> float:
+    """Longest a sweep of ``networks`` can take when no host answers, plus a grace period."""
+    hosts = len(sweep_hosts(networks))
+    communities = communities or getattr(settings, "PRINTER_DISCOVERY_COMMUNITIES", ["public"])
+    rate = rate or getattr(settings, "PRINTER_DISCOVERY_RATE", 200)
+    # Each probe tries every community twice; a printer then walks its supplies.
+    probe = len(communities) * PROBE_TIMEOUT * 2
+    return hosts / max(rate, 1) + math.ceil(hosts / concurrency) * probe + MAX_SUPPLY_ROWS * PROBE_TIMEOUT * 2 + SHARED_WAIT_GRACE
+
+async def sweep(
+    networks: Sequence[ipaddress.IPv4Network],
+    communities: Optional[Sequence[str]] = None,
+    rate: Optional[float] = None,
+    concurrency: int = SWEEP_CONCURRENCY,
+    port: int = 161,
+) -> List[DiscoveredDevice]:
+    """Probe every host address in ``networks`` and return the printers that answered.
+
+    All probes share one UDP socket; ``rate`` caps how many start per second
+    and ``concurrency`` how many are waiting for an answer at once.
+    """
+    communities = list(communities or getattr(settings, "PRINTER_DISCOVERY_COMMUNITIES", ["public"]))
+    limiter = _RateLimiter(rate or getattr(settings, "PRINTER_DISCOVERY_RATE", 200))
+    semaphore = asyncio.Semaphore(concurrency)
+    client = await _snmp_pool().raw_client()
+
+    async def run(host: str):
+        async with semaphore:
+            await limiter.wait()
+            return await _probe(client, host, port, communities)
+
+    hosts = sweep_hosts(networks)
+    found = await asyncio.gather(*(run(host) for host in hosts))
+    return [device for device in found if device is not None and device.is_printer]
+
+def configured_networks() -> List[str]:
+    return list(getattr(settings, "PRINTER_DISCOVERY_RANGES", []))
+
+def sweep_networks(networks: Optional[Sequence[str]] = None) -> List[ipaddress.IPv4Network]:
+    """Parsed ``networks`` to sweep (default: the configured ranges)."""
+    parsed = parse_networks(configured_networks() if networks is None else networks)
+    if not parsed:
+        raise DiscoveryError("No hay rangos de red configurados para el descubrimiento.")
+    return parsed
+
+def discover(networks: Optional[Sequence[str]] = None, **options) -> Dict[str, list]:
+    """Sweep ``networks`` (default: the configured ranges) and match the responders.
+
+    Blocks until the sweep finishes; requests start a discovery job instead
+    (see ``jobs.start_discovery_job``).
+    """
+    parsed = sweep_networks(networks)
+    try:
+        devices = _run_shared(sweep(parsed, **options), timeout=sweep_timeout(parsed, **options))
+    except PollingError:
+        raise DiscoveryError("El barrido no terminó en el tiempo esperado.")
+    return propose_changes(devices)
+
+def propose_changes(devices: Sequence[DiscoveredDevice]) -> Dict[str, list]:
+    """Match responders to existing printers by serial number, then by IP.
+
+    A known serial at a different address becomes an IP change; an unknown
+    serial at an unknown address becomes a new printer proposal. Both carry an
+    ``id`` so callers can apply only some of them.
+    """
+    printers = list(Printer.objects.only("id", "name", "ip_address", "serial_number"))
+    by_serial = {p.serial_number.strip().upper(): p for p in printers if p.serial_number.strip()}
+    by_ip = {p.ip_address: p for p in printers}
+    proposals = {"known": [], "ip_changes": [], "new": []}
+    for device in devices:
+        printer = by_serial.get(device.serial_number.strip().upper()) if device.serial_number else None
+        if printer is not None and printer.ip_address != device.ip_address:
+            proposals["ip_changes"].append(
+                {
+                    "id": f"ip:{printer.id}",
+                    "printer_id": printer.id,
+                    "name": printer.name,
+                    "old_ip": printer.ip_address,
+                    "new_ip": device.ip_address,
+                    "device": asdict(device),
+                }
+            )
+            continue
+        printer = printer or by_ip.get(device.ip_address)
+        if printer is not None:
+            proposals["known"].append({"printer_id": printer.id, "name": printer.name, "device": asdict(device)})
+            continue
+        proposals["new"].append(
+            {
+                "id": f"new:{device.ip_address}",
+                "name": (device.printer_name or device.sys_name or device.sys_descr or device.ip_address)[:120],
+                "ip_address": device.ip_address,
+                "serial_number": device.serial_number[:120],
+                "community": device.community,
+                "type": device.printer_type,
+                "device": asdict(device),
+            }
+        )
+    return proposals
+
+def apply_proposals(proposals: Dict[str, list], ids: Optional[Collection[str]] = None) -> Dict[str, object]:
+    """Create the proposed printers and move the ones whose IP changed.
+
+    Only the proposals whose ``id`` is in ``ids`` are applied (all of them when
+    ``ids`` is ``None``). A proposal that would leave two printers on one
+    address, counting the other moves applied with it, is skipped and
+    reported in ``conflicts``.
+    """
+    wanted = lambda item: ids is None or item["id"] in ids
+    changes = [change for change in proposals["ip_changes"] if wanted(change)]
+    new_printers = [new for new in proposals["new"] if wanted(new)]
+    conflicts = []
+    with transaction.atomic():
+        addresses = dict(Printer.objects.select_for_update().values_list("id", "ip_address"))
+        moves = {}
+        for change in changes:
+            if change["printer_id"] in addresses:
+                moves[change["printer_id"]] = change
+            else:
+                conflicts.append({"id": change["id"], "error": "La impresora ya no existe."})
+        while True:
+            final = {**addresses, **{printer_id: change["new_ip"] for printer_id, change in moves.items()}}
+            holders = Counter(final.values())
+            clashes = [printer_id for printer_id, change in moves.items() if holders[change["new_ip"]] > 1]
+            if not clashes:
+                break
+            for printer_id in clashes:
+                change = moves.pop(printer_id)
+                conflicts.append({"id": change["id"], "error": f"La IP {change['new_ip']} ya está en uso por otra impresora."})
+        for printer_id, change in moves.items():
+            Printer.objects.filter(pk=printer_id).update(ip_address=change["new_ip"])
+        taken = set(final.values())
+        created = 0
+        # One save per printer so the fleet summary counts them.
+        for new in new_printers:
+            if new["ip_address"] in taken:
+                conflicts.append({"id": new["id"], "error": f"La IP {new['ip_address']} ya está en uso por otra impresora."})
+                continue
+            taken.add(new["ip_address"])
+            Printer.objects.create(
+                name=new["name"],
+                location="Por asignar",
+                ip_address=new["ip_address"],
+                serial_number=new["serial_number"],
+                community=new["community"],
+                type=new.get("type", Printer.TYPE_BW),
+                notes="Agregada por descubrimiento automático.",
+            )
+            created += 1
+    return {"ip_changes": len(moves), "created": created, "conflicts": conflicts}
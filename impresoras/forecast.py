@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+
+from .models import Printer, TonerForecast
+
+# A rise of this many points means the cartridge was replaced: the fit restarts.
+REFILL_JUMP = 15.0
+MIN_SAMPLES = 3
+MIN_SPAN_DAYS = 0.5
+
+def _days(delta: timedelta) -> float:
+    return delta.total_seconds() / 86400
+
+def _half_life_days() -> float:
+    return getattr(settings, "PRINTER_FORECAST_HALF_LIFE_DAYS", 30)
+
+def _reset(forecast: TonerForecast, at: datetime):
+    forecast.origin = at
+    forecast.samples = 0
+    forecast.sum_w = forecast.sum_t = forecast.sum_y = forecast.sum_tt = forecast.sum_ty = 0.0
+
+def add_sample(forecast: TonerForecast, level: float, at: datetime):
+    """Fold one reading into the running fit.
+
+    Older samples decay with a half-life so the rate follows changes in usage,
+    and small upward wiggles are kept as noise for the regression to average
+    out. Only a jump of ``REFILL_JUMP`` points is treated as a new cartridge.
+    """
+    if forecast.samples == 0 or level - forecast.last_level >= REFILL_JUMP:
+        _reset(forecast, at)
+    else:
+        elapsed = max(_days(at - forecast.last_at), 0.0)
+        decay = 0.5 ** (elapsed / _half_life_days())
+        forecast.sum_w *= decay
+        forecast.sum_t *= decay
+        forecast.sum_y *= decay
+        forecast.sum_tt *= decay
+        forecast.sum_ty *= decay
+    t = _days(at - forecast.origin)
+    forecast.sum_w += 1
+    forecast.sum_t += t
+    forecast.sum_y += level
+    forecast.sum_tt += t * t
+    forecast.sum_ty += t * level
+    forecast.samples += 1
+    forecast.last_level = level
+    forecast.last_at = at
+
+def update_forecasts(printer: Printer, levels: Dict[str, Optional[float]], at: datetime):
+    """Update the fit of every colour present in ``levels``; called for each stored reading."""
+    update_forecasts_batch([(printer, levels, at)])
+
+def update_forecasts_batch(readings: Iterable[Tuple[Printer, Dict[str, Optional[float]], datetime]]):
+    """``update_forecasts`` for many readings: one query to load the fits, bulk writes to save them."""
+    readings = [(printer, levels, at) for printer, levels, at in readings if any(v is not None for v in levels.values())]
+    if not readings:
+        return
+    existing = {
+        (f.printer_id, f.color): f
+        for f in TonerForecast.objects.select_for_update().filter(printer_id__in={p.pk for p, _, _ in readings})
+    }
+    created = []
+    for printer, levels, at in readings:
+        for color, level in levels.items():
+            if level is None:
+                continue
+            forecast = existing.get((printer.pk, color))
+            if forecast is None:
+                forecast = existing[(printer.pk, color)] = TonerForecast(
+                    printer=printer, color=color, origin=at, last_at=at, last_level=level
+                )
+                created.append(forecast)
+            add_sample(forecast, level, at)
+    updated = [f for f in existing.values() if f.pk is not None]
+    TonerForecast.objects.bulk_create(created)
+    TonerForecast.objects.bulk_update(
+        updated,
+        ["origin", "last_at", "last_level", "samples", "sum_w", "sum_t", "sum_y", "sum_tt", "sum_ty"],
+    )
+
+def estimate(forecast: TonerForecast, now: datetime) -> Dict[str, object]:
+    """Current fitted level, depletion rate (points/day) and days until empty."""
+    result = {
+        "level": forecast.last_level,
+        "rate_per_day": None,
+        "days_until_empty": None,
+        "empty_on": None,
+        "samples": forecast.samples,
+    }
+    span = _days(forecast.last_at - forecast.origin)
+    denominator = forecast.sum_w * forecast.sum_tt - forecast.sum_t ** 2
+    if forecast.samples < MIN_SAMPLES or span < MIN_SPAN_DAYS or denominator <= 1e-9:
+        return result
+    slope = (forecast.sum_w * forecast.sum_ty - forecast.sum_t * forecast.sum_y) / denominator
+    intercept = (forecast.sum_y - slope * forecast.sum_t) / forecast.sum_w
+    result["rate_per_day"] = round(-slope, 3) or 0.0
+    if slope >= 0:
+        return result
+    current = min(max(intercept + slope * _days(now - forecast.origin), 0.0), 100.0)
+    days_left = current / -slope
+    result["level"] = round(current, 1)
+    result["days_until_empty"] = round(days_left, 1)
+    result["empty_on"] = (now + timedelta(days=days_left)).date()
+    return result
+
+def fleet_forecast(printers, now: datetime):
+    """Per-printer estimates for every cartridge, from one prefetch of the stored fits."""
+    rows = []
+    for printer in printers.prefetch_related("forecasts"):
+        cartridges = {f.color: estimate(f, now) for f in printer.forecasts.all()}
+        days = [c["days_until_empty"] for c in cartridges.values() if c["days_until_empty"] is not None]
+        rows.append(
+            {
+                "id": printer.id,
+                "name": printer.name,
+                "location": printer.location,
+                "cartridges": cartridges,
+                "days_until_first_empty": min(days) if days else None,
+            }
+        )
+    return rows
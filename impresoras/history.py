@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .forecast import update_forecasts_batch
+from .models import Printer, PrinterLevelRollup, PrinterReading
+
+COLORS = ("black", "cyan", "magenta", "yellow")
+
+RESOLUTION_RAW = "raw"
+RESOLUTION_HOUR = "hour"
+RESOLUTION_DAY = "day"
+_ROLLUP_CODES = {
+    RESOLUTION_HOUR: PrinterLevelRollup.RESOLUTION_HOUR,
+    RESOLUTION_DAY: PrinterLevelRollup.RESOLUTION_DAY,
+}
+
+def _to_tenths(level: Optional[float]) -> Optional[int]:
+    if level is None:
+        return None
+    return int(round(min(max(level, 0), 100) * 10))
+
+def _from_tenths(value: Optional[float]) -> Optional[float]:
+    if value is None:
+        return None
+    return round(value / 10, 1)
+
+def _bucket_start(moment: datetime, code: str) -> datetime:
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if code == PrinterLevelRollup.RESOLUTION_DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+def _add_to_rollup(rollup: PrinterLevelRollup, ok: bool, levels: Dict[str, Optional[int]]):
+    rollup.samples += 1
+    if ok:
+        rollup.ok_samples += 1
+    for color, value in levels.items():
+        if value is None:
+            continue
+        count, total, low, high = rollup.levels.get(color, [0, 0, value, value])
+        rollup.levels[color] = [count + 1, total + value, min(low, value), max(high, value)]
+
+def record_reading(printer: Printer, ok: bool, levels: Dict[str, Optional[float]], taken_at: datetime):
+    """Append a raw reading and fold it into its rollups and depletion forecasts."""
+    record_readings([(printer, ok, levels, taken_at)])
+
+def record_readings(readings: Iterable[Tuple[Printer, bool, Dict[str, Optional[float]], datetime]]):
+    """``record_reading`` for many readings at once, with one bulk write per table."""
+    readings = list(readings)
+    if not readings:
+        return
+    rows = []
+    buckets = set()
+    for printer, ok, levels, taken_at in readings:
+        tenths = {color: _to_tenths(levels.get(color)) for color in COLORS}
+        rows.append((printer, ok, tenths, taken_at))
+        buckets.update(_bucket_start(taken_at, code) for code in _ROLLUP_CODES.values())
+    with transaction.atomic():
+        PrinterReading.objects.bulk_create(
+            [PrinterReading(printer=printer, taken_at=taken_at, ok=ok, **tenths) for printer, ok, tenths, taken_at in rows]
+        )
+        existing = PrinterLevelRollup.objects.select_for_update().filter(
+            printer_id__in={printer.pk for printer, _, _, _ in rows},
+            bucket__in=buckets,
+        )
+        rollups = {(r.printer_id, r.resolution, r.bucket): r for r in existing}
+        created = []
+        for printer, ok, tenths, taken_at in rows:
+            for code in _ROLLUP_CODES.values():
+                key = (printer.pk, code, _bucket_start(taken_at, code))
+                rollup = rollups.get(key)
+                if rollup is None:
+                    rollup = rollups[key] = PrinterLevelRollup(
+                        printer=printer, resolution=code, bucket=key[2], samples=0, ok_samples=0, levels={}
+                    )
+                    created.append(rollup)
+                _add_to_rollup(rollup, ok, tenths)
+        updated = [rollup for rollup in rollups.values() if rollup.pk is not None]
+        PrinterLevelRollup.objects.bulk_create(created)
+        PrinterLevelRollup.objects.bulk_update(updated, ["samples", "ok_samples", "levels"])
+        update_forecasts_batch([(printer, levels, taken_at) for printer, _, levels, taken_at in readings])
+
+def compact_history(now: Optional[datetime] = None) -> Dict[str, int]:
+    """Enforce retention: raw rows, then hourly and daily rollups, each with its own horizon.
+
+    Rollups are maintained as readings arrive, so dropping old raw rows loses
+    nothing the series endpoint needs.
+    """
+    now = now or timezone.now()
+    raw_days = getattr(settings, "PRINTER_HISTORY_RAW_DAYS", 14)
+    hourly_days = getattr(settings, "PRINTER_HISTORY_HOURLY_DAYS", 120)
+    daily_days = getattr(settings, "PRINTER_HISTORY_DAILY_DAYS", 730)
+    deleted = {}
+    deleted["raw"], _ = PrinterReading.objects.filter(taken_at__lt=now - timedelta(days=raw_days)).delete()
+    deleted["hour"], _ = PrinterLevelRollup.objects.filter(
+        resolution=PrinterLevelRollup.RESOLUTION_HOUR,
+        bucket__lt=now - timedelta(days=hourly_days),
+    ).delete()
+    deleted["day"], _ = PrinterLevelRollup.objects.filter(
+        resolution=PrinterLevelRollup.RESOLUTION_DAY,
+        bucket__lt=now - timedelta(days=daily_days),
+    ).delete()
+    return deleted
+
+def pick_resolution(start: datetime, end: datetime) -> str:
+    span = end - start
+    if span <= timedelta(days=1):
+        return RESOLUTION_RAW
+    if span <= timedelta(days=31):
+        return RESOLUTION_HOUR
+    return RESOLUTION_DAY
+
+def level_series(
+    printer: Printer,
+    start: datetime,
+    end: datetime,
+    resolution: Optional[str] = None,
+) -> Dict[str, object]:
+    """Toner levels for ``printer`` between ``start`` and ``end``.
+
+    Anything longer than a day is answered from the rollup tables, so the cost
+    depends on the number of points returned rather than on the polls stored.
+    """
+    resolution = resolution or pick_resolution(start, end)
+    points: List[Dict[str, object]] = []
+    if resolution == RESOLUTION_RAW:
+        readings = PrinterReading.objects.filter(
+            printer=printer, taken_at__gte=start, taken_at__lte=end
+        ).values_list("taken_at", "ok", *COLORS)
+        for taken_at, ok, *levels in readings:
+            point = {"time": taken_at, "ok": ok}
+            point.update({color: _from_tenths(value) for color, value in zip(COLORS, levels)})
+            points.append(point)
+    else:
+        code = _ROLLUP_CODES[resolution]
+        rollups = PrinterLevelRollup.objects.filter(
+            printer=printer,
+            resolution=code,
+            bucket__gte=_bucket_start(start, code),
+            bucket__lte=end,
+        ).values_list("bucket", "samples", "ok_samples", "levels")
+        for bucket, samples, ok_samples, levels in rollups:
+            point = {"time": bucket, "samples": samples, "ok_samples": ok_samples}
+            for color in COLORS:
+                count, total, low, high = levels.get(color, [0, 0, None, None])
+                point[color] = _from_tenths(total / count) if count else None
+                point[f"{color}_min"] = _from_tenths(low)
+                point[f"{color}_max"] = _from_tenths(high)
+            points.append(point)
+    return {"resolution": resolution, "start": start, "end": end, "points": points}
@@ -0,0 +1,197 @@
+import asyncio
+import concurrent.futures
+import json
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .discovery import propose_changes, sweep, sweep_hosts, sweep_networks, sweep_timeout
+from .models import Printer, PrinterRefreshJob, PrinterRefreshResult
+from .services import PollWriter, _get_shared_loop, poll_fleet
+
+logger = logging.getLogger(__name__)
+
+# Seconds between heartbeats written by a running job.
+HEARTBEAT_INTERVAL = 5.0
+
+def expire_stale_jobs(jobs=None) -> int:
+    """Fail queued or running jobs whose thread stopped beating.
+
+    The thread lives in the web worker that started the job, so a worker that
+    dies or is recycled leaves its job unfinished; it is failed once its
+    heartbeat (or, before the first one, its creation) is older than
+    ``PRINTER_JOB_STALE_AFTER``. Returns the number of jobs failed.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=getattr(settings, "PRINTER_JOB_STALE_AFTER", 60))
+    jobs = PrinterRefreshJob.objects.all() if jobs is None else jobs
+    return jobs.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, created_at__lt=cutoff),
+        status__in=[PrinterRefreshJob.STATUS_QUEUED, PrinterRefreshJob.STATUS_RUNNING],
+    ).update(
+        status=PrinterRefreshJob.STATUS_FAILED,
+        finished_at=now,
+        message="El proceso que ejecutaba esta actualización se detuvo antes de terminar.",
+    )
+
+def start_refresh_job(printers: Iterable[Printer]) -> PrinterRefreshJob:
+    """Create a refresh job and poll ``printers`` in a background thread.
+
+    The caller gets the job back immediately; per-printer outcomes are written
+    as ``PrinterRefreshResult`` rows while the fleet poll progresses, so any
+    worker process can report them.
+    """
+    printers = list(printers)
+    job = _create_job(PrinterRefreshJob.KIND_REFRESH, len(printers))
+    _start_thread(job, _run_job, printers)
+    return job
+
+def start_discovery_job(networks=None, **options) -> PrinterRefreshJob:
+    """Create a discovery job and sweep ``networks`` in a background thread.
+
+    The ranges are checked first, so a bad request raises ``DiscoveryError``
+    before any job exists. The proposals end up in ``job.data["proposals"]``.
+    """
+    parsed = sweep_networks(networks)
+    job = _create_job(PrinterRefreshJob.KIND_DISCOVERY, len(sweep_hosts(parsed)))
+    _start_thread(job, _run_discovery, parsed, options)
+    return job
+
+def _create_job(kind, total) -> PrinterRefreshJob:
+    # Jobs are only useful while someone is watching them; keep a day for debugging.
+    PrinterRefreshJob.objects.filter(created_at__lt=timezone.now() - timedelta(days=1)).delete()
+    expire_stale_jobs()
+    return PrinterRefreshJob.objects.create(kind=kind, total=total)
+
+def _start_thread(job, target, *args):
+    thread = threading.Thread(
+        target=target,
+        args=(job.pk, *args),
+        name=f"printer-{job.kind}-{job.pk}",
+        daemon=True,
+    )
+    transaction.on_commit(thread.start)
+
+def _record_results(job_id, written):
+    PrinterRefreshResult.objects.bulk_create(
+        [
+            PrinterRefreshResult(
+                job_id=job_id,
+                printer=printer,
+                ok=result is not None and store_error is None,
+                error=store_error or error or "",
+            )
+            for printer, result, error, store_error in written
+        ]
+    )
+
+def _run_job(job_id, printers):
+    jobs = PrinterRefreshJob.objects.filter(pk=job_id)
+    # Short flush interval: the stream only shows a printer once its batch is written.
+    writer = PollWriter(flush_interval=0.5)
+    try:
+        jobs.update(status=PrinterRefreshJob.STATUS_RUNNING, heartbeat_at=timezone.now())
+        next_beat = time.monotonic() + HEARTBEAT_INTERVAL
+        for outcome in poll_fleet(printers, idle_timeout=writer.flush_interval):
+            if outcome is None:
+                _record_results(job_id, writer.flush_due())
+            else:
+                _record_results(job_id, writer.add(outcome.printer, outcome.result, outcome.error))
+            if time.monotonic() >= next_beat:
+                jobs.update(heartbeat_at=timezone.now())
+                next_beat = time.monotonic() + HEARTBEAT_INTERVAL
+        _record_results(job_id, writer.flush())
+        jobs.update(status=PrinterRefreshJob.STATUS_DONE, finished_at=timezone.now())
+    except Exception as exc:
+        logger.exception("Printer refresh job %s failed", job_id)
+        jobs.update(status=PrinterRefreshJob.STATUS_FAILED, finished_at=timezone.now(), message=str(exc))
+    finally:
+        connection.close()
+
+def _run_discovery(job_id, networks, options):
+    jobs = PrinterRefreshJob.objects.filter(pk=job_id)
+    try:
+        jobs.update(status=PrinterRefreshJob.STATUS_RUNNING, heartbeat_at=timezone.now())
+        give_up_at = time.monotonic() + sweep_timeout(networks, **options)
+        future = asyncio.run_coroutine_threadsafe(sweep(networks, **options), _get_shared_loop())
+        try:
+            while True:
+                try:
+                    devices = future.result(timeout=HEARTBEAT_INTERVAL)
+                    break
+                except concurrent.futures.TimeoutError:
+                    if time.monotonic() >= give_up_at:
+                        raise RuntimeError("El barrido no terminó en el tiempo esperado.")
+                    jobs.update(heartbeat_at=timezone.now())
+        finally:
+            future.cancel()
+        jobs.update(
+            status=PrinterRefreshJob.STATUS_DONE,
+            finished_at=timezone.now(),
+            data={"proposals": propose_changes(devices)},
+        )
+    except Exception as exc:
+        logger.exception("Printer discovery job %s failed", job_id)
+        jobs.update(status=PrinterRefreshJob.STATUS_FAILED, finished_at=timezone.now(), message=str(exc))
+    finally:
+        connection.close()
+
+def job_results(job: PrinterRefreshJob, after: int = 0):
+    return job.results.filter(id__gt=after).select_related("printer")
+
+def stream_job(
+    job: PrinterRefreshJob,
+    serialize_printer: Callable[[Printer], dict],
+    encoder: Optional[type] = None,
+    poll_interval: float = 0.5,
+) -> Iterator[str]:
+    """Yield the job's results as JSON lines until it finishes.
+
+    Lines are ``{"type": "job"}`` first, one ``{"type": "result"}`` per printer
+    as soon as its row exists, and a final ``{"type": "done"}``.
+
+    The response holds a server worker, sleeping between database reads, for
+    as long as the job runs (up to ``PRINTER_POLL_DEADLINE`` + 30 seconds), so
+    only serve it from an async or threaded server (e.g. gunicorn with
+    ``--threads`` or ``gthread`` workers). Clients on sync workers should poll
+    the job with ``?after=`` instead, as the dashboard does.
+    """
+
+    def line(payload):
+        return json.dumps(payload, cls=encoder) + "\n"
+
+    deadline = time.monotonic() + getattr(settings, "PRINTER_POLL_DEADLINE", 60) + 30
+    last_id = 0
+    ok_count = 0
+    yield line({"type": "job", "id": str(job.pk), "total": job.total, "status": job.status})
+    while True:
+        # Status first: results written before it turned final are then always seen below.
+        expire_stale_jobs(PrinterRefreshJob.objects.filter(pk=job.pk))
+        job.refresh_from_db(fields=["status", "message", "finished_at"])
+        for result in job_results(job, last_id):
+            last_id = result.id
+            ok_count += result.ok
+            yield line(
+                {
+                    "type": "result",
+                    "seq": result.id,
+                    "id": result.printer_id,
+                    "ok": result.ok,
+                    "error": result.error,
+                    "printer": serialize_printer(result.printer),
+                }
+            )
+        if job.finished:
+            yield line({"type": "done", "status": job.status, "message": job.message, "ok": ok_count})
+            return
+        if time.monotonic() > deadline:
+            yield line({"type": "done", "status": "timeout", "message": "", "ok": ok_count})
+            return
+        time.sleep(poll_interval)
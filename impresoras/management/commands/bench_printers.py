@@ -0,0 +1,171 @@
+import json
+import os
+import platform
+import shutil
+import tempfile
+from importlib import metadata
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from impresoras.bench import SCENARIOS, run_scenario
+from impresoras.models import Printer
+from impresoras.simulator import AgentFarm, printer_mib
+
+def _version(package):
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark printer polling against simulated SNMP agents on localhost and "
+        "write throughput, latency percentiles and CPU per poll to a JSON file. "
+        "Runs on a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--agents", type=int, default=100, help="Number of simulated printers.")
+        parser.add_argument("--base-port", type=int, default=16100, help="UDP port of the first agent.")
+        parser.add_argument("--latency-ms", type=float, default=2.0, help="Agent response delay in milliseconds.")
+        parser.add_argument("--jitter", type=float, default=0.2, help="Random spread of the delay, as a fraction.")
+        parser.add_argument("--loss", type=float, default=0.0, help="Probability that an agent drops a request.")
+        parser.add_argument("--v1-share", type=float, default=0.0, help="Fraction of agents that only speak SNMPv1.")
+        parser.add_argument("--mib", help="JSON file of {oid: value} served by every agent instead of the default.")
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            choices=sorted(SCENARIOS),
+            help="Scenario to run (repeatable; default: all).",
+        )
+        parser.add_argument("--rounds", type=int, default=3, help="Measured rounds per scenario.")
+        parser.add_argument("--warmup", type=int, default=1, help="Unmeasured fleet polls before each scenario.")
+        parser.add_argument("--concurrency", type=int, help="Printers polled at once (default: PRINTER_POLL_CONCURRENCY).")
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=50,
+            help="Printers polled per round by the sequential poll_printer scenario.",
+        )
+        parser.add_argument("--seed", type=int, help="Seed for agent latency and loss.")
+        parser.add_argument("--label", default="", help="Free text stored with the results, e.g. a release.")
+        parser.add_argument("--output", help="Results file (default: bench-printers-<timestamp>.json).")
+
+    def handle(self, *args, **options):
+        if options["agents"] < 1:
+            raise CommandError("--agents must be at least 1.")
+        mib = None
+        if options["mib"]:
+            try:
+                with open(options["mib"], encoding="utf-8") as handle:
+                    mib = json.load(handle)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Could not read {options['mib']}: {exc}")
+
+        agents = options["agents"]
+        v1_agents = round(agents * options["v1_share"])
+        farms = []
+        if agents - v1_agents:
+            farms.append(self._farm(agents - v1_agents, options["base_port"], mib, options, v1_only=False))
+        if v1_agents:
+            farms.append(self._farm(v1_agents, options["base_port"] + agents - v1_agents, mib, options, v1_only=True))
+        scenarios = options["scenarios"] or list(SCENARIOS)
+        output = options["output"] or f"bench-printers-{timezone.now():%Y%m%d-%H%M%S}.json"
+
+        old_name = self._create_database()
+        try:
+            for farm in farms:
+                farm.start()
+            Printer.objects.bulk_create(
+                [
+                    Printer(
+                        name=f"Simulada {port}",
+                        location="Benchmark",
+                        ip_address="127.0.0.1",
+                        snmp_port=port,
+                        type=Printer.TYPE_COLOR,
+                    )
+                    for farm in farms
+                    for port in farm.ports
+                ]
+            )
+            printers = list(Printer.objects.order_by("pk"))
+            results = {}
+            for name in scenarios:
+                self.stdout.write(f"Running {name}...")
+                results[name] = run_scenario(
+                    name,
+                    printers[: options["samples"]] if name == "poll_printer" else printers,
+                    rounds=options["rounds"],
+                    warmup=options["warmup"],
+                    requests=lambda: sum(farm.requests() for farm in farms),
+                    concurrency=options["concurrency"],
+                )
+                self._report(name, results[name])
+        finally:
+            for farm in farms:
+                farm.stop()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            if self.scratch_dir:
+                shutil.rmtree(self.scratch_dir, ignore_errors=True)
+
+        report = {
+            "label": options["label"],
+            "created_at": timezone.now().isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "django": _version("Django"),
+                "pysnmp": _version("pysnmp"),
+            },
+            "config": {
+                key: options[key]
+                for key in (
+                    "agents", "latency_ms", "jitter", "loss", "v1_share", "mib",
+                    "rounds", "warmup", "concurrency", "samples", "seed",
+                )
+            },
+            "scenarios": results,
+        }
+        with open(output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+    def _farm(self, count, base_port, mib, options, v1_only):
+        if mib is None:
+            # Distinct serial numbers, so supply maps are learned per printer.
+            mib = lambda number: printer_mib(serial_number=f"SIM{base_port + number}")
+        return AgentFarm(
+            count,
+            base_port=base_port,
+            mib=mib,
+            latency=options["latency_ms"] / 1000,
+            jitter=options["jitter"],
+            loss=options["loss"],
+            v1_only=v1_only,
+            seed=options["seed"],
+        )
+
+    def _create_database(self):
+        """Switch to a fresh test database and return the real database name."""
+        old_name = connection.settings_dict["NAME"]
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        self.scratch_dir = None
+        if connection.vendor == "sqlite" and not test_settings.get("NAME"):
+            # In-memory SQLite is per connection; the pollers write from other threads.
+            self.scratch_dir = tempfile.mkdtemp(prefix="bench-printers-")
+            test_settings["NAME"] = os.path.join(self.scratch_dir, "db.sqlite3")
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        return old_name
+
+    def _report(self, name, result):
+        latency = result["latency_ms"]
+        self.stdout.write(
+            f"  {name}: {result['polls']} polls ({result['failed']} failed), "
+            f"{result['polls_per_second']} polls/s, p50 {latency['p50']} ms, p99 {latency['p99']} ms, "
+            f"{result['cpu_ms_per_poll']} ms CPU/poll, {result['requests_per_poll']} requests/poll"
+        )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from impresoras.history import compact_history
+
+class Command(BaseCommand):
+    help = "Delete printer readings and rollups older than their configured retention."
+
+    def handle(self, *args, **options):
+        deleted = compact_history()
+        self.stdout.write(
+            "Deleted {raw} raw readings, {hour} hourly and {day} daily rollups.".format(**deleted)
+        )
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from impresoras.discovery import DiscoveryError, apply_proposals, discover
+
+class Command(BaseCommand):
+    help = "Sweep network ranges for SNMP printers and propose new printers or IP changes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "networks",
+            nargs="*",
+            help="CIDR ranges to sweep (default: PRINTER_DISCOVERY_RANGES).",
+        )
+        parser.add_argument("--community", action="append", dest="communities", help="Community to try (repeatable).")
+        parser.add_argument("--rate", type=float, help="Maximum probes started per second.")
+        parser.add_argument("--port", type=int, default=161, help="SNMP port to probe.")
+        parser.add_argument("--apply", action="store_true", help="Create new printers and update changed IPs.")
+        parser.add_argument(
+            "--only",
+            action="append",
+            dest="ids",
+            help="With --apply, proposal id to apply (repeatable; default: all).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            proposals = discover(
+                options["networks"] or None,
+                communities=options["communities"],
+                rate=options["rate"],
+                port=options["port"],
+            )
+        except DiscoveryError as exc:
+            raise CommandError(str(exc))
+
+        for item in proposals["known"]:
+            self.stdout.write(f"known    {item['device']['ip_address']:<15}  {item['name']}")
+        for item in proposals["ip_changes"]:
+            self.stdout.write(f"moved    {item['old_ip']:<15}  -> {item['new_ip']}  {item['name']}  [{item['id']}]")
+        for item in proposals["new"]:
+            self.stdout.write(
+                f"new      {item['ip_address']:<15}  {item['name']}  type={item['type']}  "
+                f"serial={item['serial_number'] or '-'}  [{item['id']}]"
+            )
+
+        if options["apply"]:
+            applied = apply_proposals(proposals, options["ids"])
+            for conflict in applied["conflicts"]:
+                self.stderr.write(f"skipped  {conflict['id']}: {conflict['error']}")
+            self.stdout.write(
+                self.style.SUCCESS("Created {created} printers, updated {ip_changes} IP addresses.".format(**applied))
+            )
+        elif proposals["new"] or proposals["ip_changes"]:
+            self.stdout.write("Run again with --apply to save these changes.")
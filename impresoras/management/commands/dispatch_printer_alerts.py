@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from impresoras.alerts import dispatch_pending, prune_dispatched
+
+class Command(BaseCommand):
+    help = "Deliver pending printer alert events from the outbox in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Events per batch (default: PRINTER_ALERT_BATCH_SIZE).")
+        parser.add_argument("--loop", action="store_true", help="Keep draining the outbox until interrupted.")
+        parser.add_argument("--interval", type=float, default=30.0, help="Seconds between drains with --loop.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"] or getattr(settings, "PRINTER_ALERT_BATCH_SIZE", 100)
+        try:
+            while True:
+                sent = 0
+                while True:
+                    count = dispatch_pending(batch_size)
+                    sent += count
+                    if count < batch_size:
+                        break
+                pruned = prune_dispatched()
+                if sent or pruned or not options["loop"]:
+                    self.stdout.write(f"Dispatched {sent} alert events, pruned {pruned}.")
+                if not options["loop"]:
+                    return
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
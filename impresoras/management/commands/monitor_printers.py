@@ -0,0 +1,70 @@
+import asyncio
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from impresoras.monitor import PrinterMonitor
+from impresoras.workers import PollingSupervisor
+
+class Command(BaseCommand):
+    help = (
+        "Poll every enabled printer on a schedule and store the results, so the "
+        "API serves cached status without doing SNMP on the request path."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, help="Seconds between polls of the same printer.")
+        parser.add_argument("--jitter", type=float, help="Random spread applied to every delay, as a fraction.")
+        parser.add_argument("--max-backoff", type=float, help="Upper bound in seconds for unreachable printers.")
+        parser.add_argument("--concurrency", type=int, help="Maximum number of printers polled at once.")
+        parser.add_argument("--once", action="store_true", help="Poll every printer once and exit.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Poll from this many processes, sharded by printer (default: PRINTER_POLL_WORKERS).",
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"] or getattr(settings, "PRINTER_POLL_WORKERS", 1)
+        if workers > 1:
+            if options["once"]:
+                raise CommandError("--once polls from a single process; drop --workers.")
+            self._run_sharded(workers, options)
+            return
+        monitor = PrinterMonitor(
+            interval=options["interval"],
+            jitter=options["jitter"],
+            max_backoff=options["max_backoff"],
+            concurrency=options["concurrency"],
+        )
+        asyncio.run(self._run(monitor, options["once"]))
+
+    async def _run(self, monitor: PrinterMonitor, once: bool):
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: Ctrl+C still raises KeyboardInterrupt
+        if not once:
+            self.stdout.write(
+                f"Monitoring printers every {monitor.interval:g}s (max backoff {monitor.max_backoff:g}s)."
+            )
+        await monitor.run(stop, once=once)
+
+    def _run_sharded(self, workers: int, options):
+        supervisor = PollingSupervisor(
+            workers=workers,
+            interval=options["interval"],
+            jitter=options["jitter"],
+            max_backoff=options["max_backoff"],
+            concurrency=options["concurrency"],
+        )
+        stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *args: stop.set())
+        self.stdout.write(f"Monitoring printers from {workers} worker processes.")
+        supervisor.run(stop)
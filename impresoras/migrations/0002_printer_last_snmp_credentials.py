@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('impresoras', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='printer',
+            name='last_community',
+            field=models.CharField(blank=True, max_length=128),
+        ),
+        migrations.AddField(
+            model_name='printer',
+            name='last_mp_model',
+            field=models.PositiveSmallIntegerField(blank=True, choices=[(0, 'SNMPv1'), (1, 'SNMPv2c')], null=True),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('impresoras', '0002_printer_last_snmp_credentials'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrinterLevelRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('H', 'Hora'), ('D', 'Día')], max_length=1)),
+                ('bucket', models.DateTimeField()),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('ok_samples', models.PositiveIntegerField(default=0)),
+                ('levels', models.JSONField(default=dict)),
+                ('printer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='impresoras.printer')),
+            ],
+            options={
+                'verbose_name': 'Resumen de lecturas',
+                'verbose_name_plural': 'Resúmenes de lecturas',
+                'ordering': ['bucket'],
+                'unique_together': {('printer', 'resolution', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PrinterReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField()),
+                ('ok', models.BooleanField()),
+                ('black', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('cyan', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('magenta', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('yellow', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('printer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='readings', to='impresoras.printer')),
+            ],
+            options={
+                'verbose_name': 'Lectura de impresora',
+                'verbose_name_plural': 'Lecturas de impresoras',
+                'ordering': ['taken_at'],
+                'indexes': [models.Index(fields=['printer', 'taken_at'], name='impresoras__printer_0f5225_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('impresoras', '0003_printer_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TonerForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('color', models.CharField(max_length=10)),
+                ('origin', models.DateTimeField()),
+                ('last_at', models.DateTimeField()),
+                ('last_level', models.FloatField()),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('sum_w', models.FloatField(default=0)),
+                ('sum_t', models.FloatField(default=0)),
+                ('sum_y', models.FloatField(default=0)),
+                ('sum_tt', models.FloatField(default=0)),
+                ('sum_ty', models.FloatField(default=0)),
+                ('printer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecasts', to='impresoras.printer')),
+            ],
+            options={
+                'verbose_name': 'Pronóstico de tóner',
+                'verbose_name_plural': 'Pronósticos de tóner',
+                'unique_together': {('printer', 'color')},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:32
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('impresoras', '0004_tonerforecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrinterRefreshJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('queued', 'En cola'), ('running', 'En curso'), ('done', 'Terminado'), ('failed', 'Fallido')], default='queued', max_length=10)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('message', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Actualización de impresoras',
+                'verbose_name_plural': 'Actualizaciones de impresoras',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PrinterRefreshResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ok', models.BooleanField()),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='impresoras.printerrefreshjob')),
+                ('printer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='refresh_results', to='impresoras.printer')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('impresoras', '0005_printer_refresh_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='printer',
+            name='breaker_open_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='printer',
+            name='consecutive_failures',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('impresoras', '0006_printer_circuit_breaker'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='printer',
+            name='supply_fingerprint',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='printer',
+            name='supply_map',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('impresoras', '0007_printer_supply_map'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FleetSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('counts', models.JSONField(default=dict)),
+                ('thresholds', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen de impresoras',
+                'verbose_name_plural': 'Resumen de impresoras',
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('impresoras', '0008_fleetsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='printer',
+            name='alert_state',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.CreateModel(
+            name='PrinterAlertEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('raised', 'Activada'), ('cleared', 'Resuelta')], max_length=10)),
+                ('condition', models.CharField(max_length=120)),
+                ('severity', models.CharField(choices=[('warning', 'Advertencia'), ('critical', 'Crítica')], default='warning', max_length=10)),
+                ('message', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dispatched_at', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('printer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alert_events', to='impresoras.printer')),
+            ],
+            options={
+                'verbose_name': 'Alerta de impresora',
+                'verbose_name_plural': 'Alertas de impresoras',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['dispatched_at', 'id'], name='impresoras__dispatc_43bc8e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('impresoras', '0010_printerrefreshjob_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='printerrefreshjob',
+            name='data',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='printerrefreshjob',
+            name='kind',
+            field=models.CharField(choices=[('refresh', 'Actualización'), ('discovery', 'Descubrimiento')], default='refresh', max_length=10),
+        ),
+    ]
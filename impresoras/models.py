@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 
 class Printer(models.Model):
@@ -7,6 +9,12 @@ class Printer(models.Model):
         (TYPE_BW, "Blanco y negro"),
         (TYPE_COLOR, "Color"),
     ]
+    SNMP_V1 = 0
+    SNMP_V2C = 1
+    SNMP_VERSION_CHOICES = [
+        (SNMP_V1, "SNMPv1"),
+        (SNMP_V2C, "SNMPv2c"),
+    ]
 
     name = models.CharField(max_length=120)
     location = models.CharField(max_length=120)
@@ -29,6 +37,13 @@ class Printer(models.Model):
     serial_number = models.CharField(max_length=120, blank=True)
     last_connected = models.BooleanField(null=True, blank=True)
     last_woke = models.BooleanField(null=True, blank=True)
+    last_community = models.CharField(max_length=128, blank=True)
+    last_mp_model = models.PositiveSmallIntegerField(choices=SNMP_VERSION_CHOICES, null=True, blank=True)
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    breaker_open_until = models.DateTimeField(null=True, blank=True)
+    supply_map = models.JSONField(default=dict, blank=True)
+    supply_fingerprint = models.CharField(max_length=200, blank=True)
+    alert_state = models.JSONField(default=dict, blank=True)
 
     class Meta:
         ordering = ["name"]
@@ -49,3 +64,193 @@ class Printer(models.Model):
             "magenta": self.last_magenta,
             "yellow": self.last_yellow,
         }
+
+
+class PrinterReading(models.Model):
+    """Raw toner levels from one poll.
+
+    Levels are stored in tenths of a percent as small integers, which SQLite
+    packs into one or two bytes instead of an 8-byte REAL.
+    """
+
+    printer = models.ForeignKey(Printer, on_delete=models.CASCADE, related_name="readings")
+    taken_at = models.DateTimeField()
+    ok = models.BooleanField()
+    black = models.PositiveSmallIntegerField(null=True, blank=True)
+    cyan = models.PositiveSmallIntegerField(null=True, blank=True)
+    magenta = models.PositiveSmallIntegerField(null=True, blank=True)
+    yellow = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["taken_at"]
+        indexes = [models.Index(fields=["printer", "taken_at"])]
+        verbose_name = "Lectura de impresora"
+        verbose_name_plural = "Lecturas de impresoras"
+
+    def __str__(self):
+        return f"{self.printer_id} @ {self.taken_at:%Y-%m-%d %H:%M}"
+
+
+class PrinterLevelRollup(models.Model):
+    """Hourly or daily aggregate of a printer's readings, updated as each poll lands.
+
+    ``levels`` maps a colour to ``[count, sum, min, max]`` in tenths of a percent.
+    """
+
+    RESOLUTION_HOUR = "H"
+    RESOLUTION_DAY = "D"
+    RESOLUTION_CHOICES = [
+        (RESOLUTION_HOUR, "Hora"),
+        (RESOLUTION_DAY, "Día"),
+    ]
+
+    printer = models.ForeignKey(Printer, on_delete=models.CASCADE, related_name="rollups")
+    resolution = models.CharField(max_length=1, choices=RESOLUTION_CHOICES)
+    bucket = models.DateTimeField()
+    samples = models.PositiveIntegerField(default=0)
+    ok_samples = models.PositiveIntegerField(default=0)
+    levels = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ["bucket"]
+        unique_together = ("printer", "resolution", "bucket")
+        verbose_name = "Resumen de lecturas"
+        verbose_name_plural = "Resúmenes de lecturas"
+
+    def __str__(self):
+        return f"{self.printer_id} {self.resolution} {self.bucket:%Y-%m-%d %H:%M}"
+
+
+class TonerForecast(models.Model):
+    """Running depletion fit for one cartridge, updated with every reading.
+
+    The fit is an exponentially weighted least-squares line of level against
+    time (days since ``origin``); only the weighted sums are stored so each new
+    sample costs O(1) and old history never has to be re-read.
+    """
+
+    printer = models.ForeignKey(Printer, on_delete=models.CASCADE, related_name="forecasts")
+    color = models.CharField(max_length=10)
+    origin = models.DateTimeField()
+    last_at = models.DateTimeField()
+    last_level = models.FloatField()
+    samples = models.PositiveIntegerField(default=0)
+    sum_w = models.FloatField(default=0)
+    sum_t = models.FloatField(default=0)
+    sum_y = models.FloatField(default=0)
+    sum_tt = models.FloatField(default=0)
+    sum_ty = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ("printer", "color")
+        verbose_name = "Pronóstico de tóner"
+        verbose_name_plural = "Pronósticos de tóner"
+
+    def __str__(self):
+        return f"{self.printer_id} {self.color}"
+
+
+class PrinterRefreshJob(models.Model):
+    """A fleet refresh or discovery sweep running in the background.
+
+    Refresh results arrive as rows in ``results``; a discovery stores its
+    proposals in ``data`` when it finishes.
+    """
+
+    KIND_REFRESH = "refresh"
+    KIND_DISCOVERY = "discovery"
+    KIND_CHOICES = [
+        (KIND_REFRESH, "Actualización"),
+        (KIND_DISCOVERY, "Descubrimiento"),
+    ]
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "En cola"),
+        (STATUS_RUNNING, "En curso"),
+        (STATUS_DONE, "Terminado"),
+        (STATUS_FAILED, "Fallido"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=KIND_REFRESH)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    total = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Touched by the thread running the job; a job whose heartbeat stops is failed.
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    message = models.TextField(blank=True)
+    data = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Actualización de impresoras"
+        verbose_name_plural = "Actualizaciones de impresoras"
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
+    @property
+    def finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+
+class PrinterRefreshResult(models.Model):
+    job = models.ForeignKey(PrinterRefreshJob, on_delete=models.CASCADE, related_name="results")
+    printer = models.ForeignKey(Printer, on_delete=models.CASCADE, related_name="refresh_results")
+    ok = models.BooleanField()
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+class FleetSummary(models.Model):
+    """Single row of fleet-wide counters, kept current as printers are saved."""
+
+    counts = models.JSONField(default=dict)
+    thresholds = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumen de impresoras"
+        verbose_name_plural = "Resumen de impresoras"
+
+class PrinterAlertEvent(models.Model):
+    """Outbox row for one alert transition, drained by ``dispatch_printer_alerts``."""
+
+    KIND_RAISED = "raised"
+    KIND_CLEARED = "cleared"
+    KIND_CHOICES = [
+        (KIND_RAISED, "Activada"),
+        (KIND_CLEARED, "Resuelta"),
+    ]
+    SEVERITY_WARNING = "warning"
+    SEVERITY_CRITICAL = "critical"
+    SEVERITY_CHOICES = [
+        (SEVERITY_WARNING, "Advertencia"),
+        (SEVERITY_CRITICAL, "Crítica"),
+    ]
+
+    printer = models.ForeignKey(Printer, on_delete=models.CASCADE, related_name="alert_events")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    condition = models.CharField(max_length=120)
+    severity = models.CharField(max_length=10, choices=SEVERITY_CHOICES, default=SEVERITY_WARNING)
+    message = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["dispatched_at", "id"])]
+        verbose_name = "Alerta de impresora"
+        verbose_name_plural = "Alertas de impresoras"
+
+    def __str__(self):
+        return f"{self.printer_id} {self.kind} {self.condition}"
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .history import compact_history
+from .models import Printer
+from .services import PollingError, PollResult, PollWriter, async_poll_printer, close_snmp_pool
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class _Schedule:
+    printer: Printer
+    due: float
+    failures: int = 0
+    running: bool = False
+
+class PrinterMonitor:
+    """Long-lived scheduler that keeps ``Printer.last_*`` fresh in the background.
+
+    Every enabled printer is polled once per ``interval`` seconds, spread by
+    ``jitter`` (a fraction of the interval) so the fleet does not fire in bursts.
+    Printers that keep failing back off exponentially up to ``max_backoff``.
+    Results are written in batches with the same functions the API refresh
+    uses, so the API can serve cached state without doing SNMP itself.
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        jitter: Optional[float] = None,
+        max_backoff: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        reload_interval: float = 60,
+        compact_interval: Optional[float] = 3600,
+    ):
+        self.interval = interval if interval is not None else getattr(settings, "PRINTER_MONITOR_INTERVAL", 300)
+        self.jitter = jitter if jitter is not None else getattr(settings, "PRINTER_MONITOR_JITTER", 0.1)
+        self.max_backoff = (
+            max_backoff if max_backoff is not None else getattr(settings, "PRINTER_MONITOR_MAX_BACKOFF", 3600)
+        )
+        self.concurrency = concurrency or getattr(settings, "PRINTER_POLL_CONCURRENCY", 32)
+        self.reload_interval = reload_interval
+        self.compact_interval = compact_interval
+        self.writer = PollWriter()
+        self._schedules: Dict[int, _Schedule] = {}
+
+    def _spread(self, delay: float) -> float:
+        return max(0.0, delay * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def _next_delay(self, failures: int) -> float:
+        if not failures:
+            return self._spread(self.interval)
+        return self._spread(min(self.interval * (2 ** failures), self.max_backoff))
+
+    async def _reload(self, now: float, spread: bool = True):
+        printers = await self.load_printers()
+        current = {printer.id: printer for printer in printers}
+        for printer_id in list(self._schedules):
+            if printer_id not in current and not self._schedules[printer_id].running:
+                del self._schedules[printer_id]
+        for printer_id, printer in current.items():
+            schedule = self._schedules.get(printer_id)
+            if schedule is None:
+                # Newcomers start at a random point of the interval instead of all at once.
+                due = now + random.uniform(0, self.interval) if spread else now
+                self._schedules[printer_id] = _Schedule(printer, due=due)
+            elif not schedule.running:
+                schedule.printer = printer
+
+    async def load_printers(self) -> List[Printer]:
+        return await sync_to_async(self._load_printers)()
+
+    @staticmethod
+    def _load_printers() -> List[Printer]:
+        close_old_connections()
+        return list(Printer.objects.filter(enabled=True))
+
+    async def store(self, printer: Printer, result: Optional[PollResult], error: Optional[str]):
+        """Queue one outcome for the batched writer; the sharded workers override this
+        to hand it to their supervisor instead."""
+        self.writer.push(printer, result, error)
+        if self.writer.due():
+            await self._write_pending()
+
+    async def _write_pending(self):
+        await sync_to_async(PollWriter.write)(self.writer.take())
+
+    async def _poll(self, schedule: _Schedule, semaphore: asyncio.Semaphore):
+        printer = schedule.printer
+        loop = asyncio.get_running_loop()
+        try:
+            async with semaphore:
+                result = await async_poll_printer(printer)
+            await self.store(printer, result, None)
+            schedule.failures = 0
+        except PollingError as exc:
+            schedule.failures += 1
+            await self.store(printer, None, str(exc))
+            logger.info("Printer %s unreachable (%s failures): %s", printer, schedule.failures, exc)
+        except Exception:
+            schedule.failures += 1
+            logger.exception("Unexpected error polling printer %s", printer)
+        finally:
+            schedule.running = False
+            schedule.due = loop.time() + self._next_delay(schedule.failures)
+
+    async def run(self, stop: asyncio.Event, once: bool = False):
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+        tasks = set()
+        next_reload = loop.time()
+        next_compact = loop.time() + self.compact_interval if self.compact_interval else None
+        try:
+            while not stop.is_set():
+                now = loop.time()
+                if now >= next_reload:
+                    await self._reload(now, spread=not once)
+                    next_reload = now + self.reload_interval
+                if next_compact is not None and now >= next_compact:
+                    await sync_to_async(compact_history)()
+                    next_compact = now + self.compact_interval
+                for schedule in self._schedules.values():
+                    if not schedule.running and schedule.due <= now:
+                        schedule.running = True
+                        task = asyncio.ensure_future(self._poll(schedule, semaphore))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                if once:
+                    if tasks:
+                        await asyncio.wait(set(tasks))
+                    break
+                if self.writer.due():
+                    await self._write_pending()
+                pending = [s.due for s in self._schedules.values() if not s.running]
+                flush_in = self.writer.due_in()
+                if flush_in is not None:
+                    pending.append(loop.time() + flush_in)
+                wake_at = min(pending + [next_reload])
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=max(0.5, wake_at - loop.time()))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            await self._write_pending()
+            close_snmp_pool()
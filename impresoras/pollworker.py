@@ -0,0 +1,16 @@
+"""Entry point of the sharded polling worker processes.
+
+Spawned processes import their target before Django is configured, so this
+module must not import models at load time; see ``impresoras.workers``.
+"""
+import signal
+
+def main(shard, inbox, outbox, options):
+    # Ctrl+C reaches the whole process group; only the supervisor handles it.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import django
+
+    django.setup()
+    from .workers import run_worker
+
+    run_worker(shard, inbox, outbox, options)
@@ -28,6 +28,10 @@ class PrinterSerializer(serializers.ModelSerializer):
             "serial_number",
             "last_connected",
             "last_woke",
+            "last_community",
+            "last_mp_model",
+            "consecutive_failures",
+            "breaker_open_until",
             "toner",
         ]
         read_only_fields = [
@@ -42,6 +46,10 @@ class PrinterSerializer(serializers.ModelSerializer):
             "serial_number",
             "last_connected",
             "last_woke",
+            "last_community",
+            "last_mp_model",
+            "consecutive_failures",
+            "breaker_open_until",
         ]
 
     def get_toner(self, obj):
@@ -1,7 +1,17 @@
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from datetime import timedelta
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
-import subprocess
+import asyncio
+import concurrent.futures
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
 
 try:
     from pysnmp.hlapi.asyncio import (
@@ -11,19 +21,150 @@ try:
         ObjectType,
         SnmpEngine,
         UdpTransportTarget,
+        bulk_cmd,
         get_cmd,
-        walk_cmd,
+        next_cmd,
     )
     from pysnmp.proto.rfc1902 import OctetString as SnmpOctetString
+    from pysnmp.proto.rfc1905 import EndOfMibView, NoSuchInstance, NoSuchObject
+    _MISSING_VALUES = (EndOfMibView, NoSuchInstance, NoSuchObject)
 except Exception:
     CommunityData = None
     SnmpOctetString = None
+    _MISSING_VALUES = ()
 
-from .models import Printer
+from .alerts import evaluate_failure, evaluate_result
+from .history import record_readings
+from .models import Printer, PrinterAlertEvent
+from .snmp import Missing, SnmpV1Client
+from .supplies import COLOR_KINDS, classify, normalize_levels
+from .summary import SUMMARY_FIELDS, apply_change, contribution, toner_thresholds
+
+logger = logging.getLogger(__name__)
 
 class PollingError(Exception):
     """Raised when we cannot obtain SNMP status from a printer."""
 
+SNMP_TIMEOUT = 3
+SNMP_RETRIES = 1
+PROBE_TIMEOUT = 1
+RAW_TIMEOUT = 2
+
+class _SnmpPool:
+    """SNMP engine, transport targets and credentials shared by every poll on one loop.
+
+    Building an ``SnmpEngine`` loads MIBs and starts a dispatcher, and resolving a
+    ``UdpTransportTarget`` does a getaddrinfo round trip, so both are created once
+    per event loop and reused. The engine's dispatcher is bound to the loop that
+    first used it, which is why pools are never shared between loops.
+    """
+
+    def __init__(self):
+        self.engine = SnmpEngine()
+        self.context = ContextData()
+        self._targets: Dict[Tuple[str, int, float, int], "UdpTransportTarget"] = {}
+        self._communities: Dict[Tuple[str, int], "CommunityData"] = {}
+        self._raw_client: Optional[SnmpV1Client] = None
+        self._raw_client_lock = asyncio.Lock()
+
+    async def target(
+        self,
+        host: str,
+        port: int,
+        timeout: float = SNMP_TIMEOUT,
+        retries: int = SNMP_RETRIES,
+    ) -> "UdpTransportTarget":
+        key = (host, port, timeout, retries)
+        target = self._targets.get(key)
+        if target is None:
+            target = await UdpTransportTarget.create((host, port), timeout=timeout, retries=retries)
+            self._targets[key] = target
+        return target
+
+    def community(self, community: str, mp_model: int) -> "CommunityData":
+        key = (community, mp_model)
+        data = self._communities.get(key)
+        if data is None:
+            data = self._communities[key] = CommunityData(community, mpModel=mp_model)
+        return data
+
+    async def raw_client(self) -> SnmpV1Client:
+        async with self._raw_client_lock:
+            if self._raw_client is None:
+                self._raw_client = await SnmpV1Client.create()
+        return self._raw_client
+
+    def close(self):
+        self.engine.close_dispatcher()
+        self._targets.clear()
+        if self._raw_client is not None:
+            self._raw_client.close()
+            self._raw_client = None
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _SnmpPool]" = weakref.WeakKeyDictionary()
+_pools_lock = threading.Lock()
+
+def _snmp_pool() -> _SnmpPool:
+    loop = asyncio.get_running_loop()
+    with _pools_lock:
+        pool = _pools.get(loop)
+        if pool is None:
+            pool = _pools[loop] = _SnmpPool()
+    return pool
+
+def close_snmp_pool():
+    """Release the engine of the running loop; long-lived loops call this on shutdown."""
+    loop = asyncio.get_running_loop()
+    with _pools_lock:
+        pool = _pools.pop(loop, None)
+    if pool is not None:
+        pool.close()
+
+_shared_loop: Optional[asyncio.AbstractEventLoop] = None
+_shared_loop_lock = threading.Lock()
+
+def _get_shared_loop() -> asyncio.AbstractEventLoop:
+    """Background loop that synchronous callers submit their polls to."""
+    global _shared_loop
+    with _shared_loop_lock:
+        if _shared_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="snmp-loop", daemon=True).start()
+            _shared_loop = loop
+    return _shared_loop
+
+def _forget_shared_loop():
+    # A forked worker inherits the variable but not the thread running the loop.
+    global _shared_loop
+    _shared_loop = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_shared_loop)
+
+# Seconds a synchronous caller waits past PRINTER_POLL_DEADLINE for the shared
+# loop before giving up on it.
+SHARED_WAIT_GRACE = 10
+
+def _shared_timeout(deadline: Optional[float] = None) -> float:
+    if deadline is None:
+        deadline = getattr(settings, "PRINTER_POLL_DEADLINE", 60)
+    return deadline + SHARED_WAIT_GRACE
+
+def _run_shared(coro, timeout: Optional[float] = None):
+    """Run ``coro`` on the shared loop and wait at most ``timeout`` seconds.
+
+    The default is ``PRINTER_POLL_DEADLINE`` plus a grace period, so a stuck
+    loop cannot hold the calling thread forever. When the wait ends early the
+    coroutine is cancelled instead of being left running on the loop.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _get_shared_loop())
+    try:
+        return future.result(_shared_timeout() if timeout is None else timeout)
+    except concurrent.futures.TimeoutError:
+        raise PollingError("Tiempo límite de sondeo excedido.")
+    finally:
+        future.cancel()
+
 @dataclass
 class PollResult:
     black: Optional[float] = None
@@ -36,6 +177,11 @@ class PollResult:
     errors: List[str] = field(default_factory=list)
     ok: bool = True
     message: str = ""
+    community: Optional[str] = None
+    mp_model: Optional[int] = None
+    attempts: int = 0
+    supply_map: Optional[Dict[str, Optional[str]]] = None
+    supply_fingerprint: Optional[str] = None
 
     def to_levels(self) -> Dict[str, Optional[float]]:
         return {
@@ -77,32 +223,332 @@ def _decode_error_state(raw_value) -> List[str]:
             messages.append(label)
     return messages
 
-def _guess_color(description: str) -> Optional[str]:
-    desc = (description or "").lower()
-    if "black" in desc or "negro" in desc or "bk" in desc:
-        return "black"
-    if "cyan" in desc:
-        return "cyan"
-    if "magenta" in desc:
-        return "magenta"
-    if "yellow" in desc or "amar" in desc:
-        return "yellow"
-    return None
-
-def _safe_percent(level: Optional[int], maximum: Optional[int]) -> Optional[float]:
-    if level is None or maximum in (None, 0):
-        return None
-    try:
-        if int(level) < 0 or int(maximum) <= 0:
+def poll_printer(printer: Printer) -> PollResult:
+    if CommunityData is None:
+        raise PollingError("pysnmp not installed or import failed.")
+    return _run_shared(async_poll_printer(printer))
+
+SYS_DESCR_OID = "1.3.6.1.2.1.1.1.0"
+SYS_UPTIME_OID = "1.3.6.1.2.1.1.3.0"
+SERIAL_OID = "1.3.6.1.2.1.43.5.1.1.17.1"
+ERROR_STATE_OID = "1.3.6.1.2.1.25.3.5.1.2.1"
+SCALAR_OIDS = (SYS_DESCR_OID, SERIAL_OID, ERROR_STATE_OID)
+
+# prtMarkerSupplies columns for the first printer device (hrDeviceIndex 1).
+SUPPLY_COLUMNS = {
+    "description": "1.3.6.1.2.1.43.11.1.1.6.1",
+    "maximum": "1.3.6.1.2.1.43.11.1.1.8.1",
+    "level": "1.3.6.1.2.1.43.11.1.1.9.1",
+}
+_COLUMN_BY_OID = {oid: name for name, oid in SUPPLY_COLUMNS.items()}
+
+BULK_MAX_REPETITIONS = 8
+MAX_TABLE_ROUNDS = 16
+
+@dataclass
+class _SupplyTable:
+    scalars: Dict[str, object] = field(default_factory=dict)
+    columns: Dict[str, Dict[int, object]] = field(
+        default_factory=lambda: {name: {} for name in SUPPLY_COLUMNS}
+    )
+
+@dataclass(frozen=True)
+class _SupplyPlan:
+    """A printer's known supply layout, so a poll can be one exact GET.
+
+    Only the level and maximum of the indexes that map to a colour are read;
+    descriptions are not fetched again until the fingerprint changes.
+    """
+    serial_number: str
+    supply_map: Dict[int, Optional[str]]
+    probe_next: bool
+
+    @classmethod
+    def from_printer(cls, printer: Printer, probe_next: bool) -> Optional["_SupplyPlan"]:
+        if not printer.supply_fingerprint or not printer.supply_map:
             return None
-        return round(min(max((int(level) / int(maximum)) * 100, 0), 100), 1)
+        serial_number, count, printer_type = (printer.supply_fingerprint.rsplit("|", 2) + ["", ""])[:3]
+        try:
+            supply_map = {int(index): color for index, color in printer.supply_map.items()}
+        except (AttributeError, ValueError):
+            return None
+        # Changing the printer's type changes the fallbacks, so the map is rebuilt.
+        if printer_type != printer.type or count != str(len(supply_map)) or not any(supply_map.values()):
+            return None
+        return cls(serial_number=serial_number, supply_map=supply_map, probe_next=probe_next)
+
+    @property
+    def colors(self) -> Dict[int, str]:
+        return {index: color for index, color in self.supply_map.items() if color}
+
+    def growth_oid(self) -> str:
+        return f"{SUPPLY_COLUMNS['level']}.{max(self.supply_map) + 1}"
+
+    def oids(self) -> List[str]:
+        # A v1 agent fails the whole GET on a missing OID, so the serial is only
+        # asked for when the printer reported one.
+        oids = [oid for oid in SCALAR_OIDS if oid != SERIAL_OID or self.serial_number]
+        for index in sorted(self.colors):
+            oids.append(f"{SUPPLY_COLUMNS['maximum']}.{index}")
+            oids.append(f"{SUPPLY_COLUMNS['level']}.{index}")
+        if self.probe_next:
+            # v2c answers noSuchInstance per varbind, so new supplies can be spotted in the same GET.
+            oids.append(self.growth_oid())
+        return oids
+
+def _supply_fingerprint(printer: Printer, serial_number: Optional[str], supply_count: int) -> str:
+    return f"{serial_number or ''}|{supply_count}|{printer.type}"
+
+def _is_missing(value) -> bool:
+    return isinstance(value, _MISSING_VALUES) or isinstance(value, Missing)
+
+def _as_text(value) -> str:
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).decode("utf-8", errors="replace").strip("\x00 ").strip()
+    if hasattr(value, "asOctets"):
+        return bytes(value.asOctets()).decode("utf-8", errors="replace").strip("\x00 ").strip()
+    return str(value).strip()
+
+def _as_int(value) -> Optional[int]:
+    try:
+        return int(value)
     except Exception:
         return None
 
-def poll_printer(printer: Printer) -> PollResult:
+async def _read_planned(request, plan: _SupplyPlan) -> Optional[_SupplyTable]:
+    """Fetch the scalars and the known supply cells in a single GET.
+
+    Returns ``None`` when the fingerprint no longer matches: a different serial
+    number, a known supply gone or a new one after the last index. The caller
+    then walks the tables again and rebuilds the map.
+    """
+    error_status, var_binds = await request(
+        get_cmd, *[ObjectType(ObjectIdentity(oid)) for oid in plan.oids()]
+    )
+    if error_status:
+        return None
+    growth_oid = plan.growth_oid() if plan.probe_next else None
+    table = _SupplyTable()
+    for name, value in var_binds:
+        oid = str(name)
+        if oid == growth_oid:
+            if not _is_missing(value):
+                return None
+            continue
+        if oid in SCALAR_OIDS:
+            if not _is_missing(value):
+                table.scalars[oid] = value
+            continue
+        if _is_missing(value):
+            return None
+        column_oid, _, index = oid.rpartition(".")
+        column = _COLUMN_BY_OID.get(column_oid)
+        if column is None:
+            return None
+        table.columns[column][int(index)] = value
+    serial_number = _as_text(table.scalars[SERIAL_OID]) if SERIAL_OID in table.scalars else ""
+    if serial_number != plan.serial_number:
+        return None
+    return table
+
+async def _read_tables(request, bulk: bool) -> _SupplyTable:
+    """Read the scalars and all supply columns with as few PDUs as possible.
+
+    SNMPv2c agents get one GETBULK carrying the scalars as non-repeaters and the
+    three supply columns as repeaters; SNMPv1 agents get multi-varbind GETNEXTs
+    that advance all columns together. Further rounds only happen for columns
+    longer than ``BULK_MAX_REPETITIONS``.
+    """
+    table = _SupplyTable()
+    cursors = dict(SUPPLY_COLUMNS)
+    # GETNEXT on the parent of each scalar returns the scalar itself.
+    scalar_binds = [ObjectType(ObjectIdentity(oid.rpartition(".")[0])) for oid in SCALAR_OIDS]
+    for round_number in range(MAX_TABLE_ROUNDS):
+        names = list(cursors)
+        column_binds = [ObjectType(ObjectIdentity(cursors[name])) for name in names]
+        if bulk:
+            error_status, var_binds = await request(
+                bulk_cmd, len(scalar_binds), BULK_MAX_REPETITIONS, *scalar_binds, *column_binds
+            )
+        else:
+            error_status, var_binds = await request(next_cmd, *scalar_binds, *column_binds)
+        if error_status:
+            if round_number == 0:
+                raise PollingError(error_status.prettyPrint())
+            break  # v1 agents report the end of the MIB view as noSuchName
+
+        for name, value in var_binds[: len(scalar_binds)]:
+            if str(name) in SCALAR_OIDS and not _is_missing(value):
+                table.scalars[str(name)] = value
+
+        finished = set()
+        advanced = set()
+        for position, (name, value) in enumerate(var_binds[len(scalar_binds):]):
+            column = names[position % len(names)]
+            if column in finished:
+                continue
+            oid = str(name)
+            prefix = SUPPLY_COLUMNS[column] + "."
+            index = _as_int(oid[len(prefix):]) if oid.startswith(prefix) else None
+            if _is_missing(value) or index is None:
+                finished.add(column)
+                continue
+            table.columns[column][index] = value
+            cursors[column] = oid
+            advanced.add(column)
+        for column in names:
+            if column in finished or column not in advanced:
+                cursors.pop(column)
+        if not cursors:
+            break
+        scalar_binds = []
+    return table
+
+INDEX_COLORS = {
+    1: "black",
+    2: "cyan",
+    3: "magenta",
+    4: "yellow",
+}
+
+def _resolve_supply_map(printer: Printer, table: _SupplyTable) -> Dict[int, Optional[str]]:
+    """Colour of every supply index from its description; ``None`` for the rest.
+
+    Only supplies whose description names nothing at all fall back to a
+    position: the usual index order on colour printers, and the first of them
+    on a black and white printer whose supplies name no black cartridge.
+    Drums, waste boxes, fusers and the like never report a toner colour.
+    """
+    descriptions = table.columns["description"]
+    indexes = sorted(table.columns["level"])
+    supply_map: Dict[int, Optional[str]] = {}
+    unnamed: List[int] = []
+    for index in indexes:
+        kind = classify(_as_text(descriptions[index]) if index in descriptions else "")
+        color = kind if kind in COLOR_KINDS else None
+        if kind is None:
+            unnamed.append(index)
+            if printer.type == Printer.TYPE_COLOR:
+                color = INDEX_COLORS.get(index)
+        if color in supply_map.values():
+            color = None  # the first supply of a colour is the one reported
+        supply_map[index] = color
+    if printer.type == Printer.TYPE_BW and unnamed and "black" not in supply_map.values():
+        supply_map[unnamed[0]] = "black"
+    return supply_map
+
+def _build_result(
+    printer: Printer,
+    table: _SupplyTable,
+    supply_map: Optional[Dict[int, Optional[str]]] = None,
+) -> PollResult:
+    """Turn a table read into a result.
+
+    Without ``supply_map`` the table was walked: the map is resolved from the
+    descriptions and returned on the result with its fingerprint for storage.
+    """
+    woke = SYS_DESCR_OID in table.scalars
+    serial_number = None
+    if SERIAL_OID in table.scalars:
+        serial_number = _as_text(table.scalars[SERIAL_OID]) or None
+    errors: List[str] = []
+    if ERROR_STATE_OID in table.scalars:
+        errors.extend(_decode_error_state(table.scalars[ERROR_STATE_OID]))
+
+    levels = table.columns["level"]
+    maximums = table.columns["maximum"]
+    resolved = supply_map is None
+    if resolved:
+        supply_map = _resolve_supply_map(printer, table)
+    connected = woke or bool(levels)
+
+    color_levels: Dict[str, Optional[float]] = {
+        "black": None,
+        "cyan": None,
+        "magenta": None,
+        "yellow": None,
+    }
+    mapped = [(index, color) for index, color in supply_map.items() if color and index in levels]
+    percents = normalize_levels(
+        [levels[index] for index, _ in mapped],
+        [maximums.get(index) for index, _ in mapped],
+    )
+    for (_, color), percent in zip(mapped, percents):
+        color_levels[color] = percent
+
+    messages = []
+    is_ok = not errors and bool(levels)
+    if errors:
+        messages.append(", ".join(errors))
+    if not levels:
+        messages.append("No se encontraron datos de consumibles.")
+
+    result = PollResult(
+        black=color_levels["black"],
+        cyan=color_levels["cyan"],
+        magenta=color_levels["magenta"],
+        yellow=color_levels["yellow"],
+        errors=errors,
+        ok=is_ok,
+        message="; ".join(messages) if messages else "OK",
+        serial_number=serial_number,
+        connected=connected,
+        woke=woke,
+    )
+    if resolved:
+        result.supply_map = {str(index): color for index, color in supply_map.items()}
+        result.supply_fingerprint = _supply_fingerprint(printer, serial_number, len(levels))
+    return result
+
+def _snmp_attempt_order(printer: Printer, communities: List[str]) -> List[Tuple[str, int]]:
+    """Community/version pairs to try, starting with the one that last worked."""
+    order = [
+        (community, mp_model)
+        for community in communities
+        for mp_model in (Printer.SNMP_V2C, Printer.SNMP_V1)  # v2c first, then fallback to v1
+    ]
+    remembered = (printer.last_community, printer.last_mp_model)
+    # Only a pair still among the configured candidates is trusted; if the
+    # community was edited since, the full search starts from scratch.
+    if remembered in order:
+        order.remove(remembered)
+        order.insert(0, remembered)
+    return order
+
+def breaker_is_open(printer: Printer) -> bool:
+    return printer.breaker_open_until is not None and printer.breaker_open_until > timezone.now()
+
+async def _probe_printer(printer: Printer) -> bool:
+    """One sysUpTime GET with a short timeout and no retries."""
+    pool = _snmp_pool()
+    if printer.last_community and printer.last_mp_model is not None:
+        community_str, mp_model = printer.last_community, printer.last_mp_model
+    else:
+        community_str, mp_model = printer.community or "public", Printer.SNMP_V2C
+    try:
+        target = await pool.target(printer.ip_address, printer.snmp_port or 161, PROBE_TIMEOUT, 0)
+        error_indication, error_status, _, _ = await get_cmd(
+            pool.engine,
+            pool.community(community_str, mp_model),
+            target,
+            pool.context,
+            ObjectType(ObjectIdentity(SYS_UPTIME_OID)),
+            lookupMib=False,
+        )
+    except Exception:
+        return False
+    return not error_indication and not error_status
+
+async def async_poll_printer(printer: Printer) -> PollResult:
     if CommunityData is None:
         raise PollingError("pysnmp not installed or import failed.")
 
+    # While the breaker is open a dead printer costs one short probe instead of
+    # the whole community/version cascade; if it answers, poll it normally.
+    if breaker_is_open(printer) and not await _probe_printer(printer):
+        reopen_at = timezone.localtime(printer.breaker_open_until)
+        raise PollingError(f"Sin respuesta; sondeo completo suspendido hasta las {reopen_at:%H:%M}.")
+
     host = printer.ip_address
     port = printer.snmp_port or 161
     community_candidates = []
@@ -110,280 +556,127 @@ def poll_printer(printer: Printer) -> PollResult:
         community_candidates.append(printer.community)
     if "public" not in community_candidates:
         community_candidates.append("public")
+    attempt_order = _snmp_attempt_order(printer, community_candidates)
 
-    async def wake_printer(engine, community, target, context) -> bool:
-        try:
-            res = await get_cmd(
-                engine,
-                community,
-                target,
-                context,
-                ObjectType(ObjectIdentity("1.3.6.1.2.1.1.1.0")),
-            )
-            if res:
-                err_ind, err_status, _, _ = res
-                return not err_ind and not err_status
-        except Exception:
-            return False
-        return False
-
-    async def walk_values(engine, community, target, context, oid: str) -> Dict[int, int]:
-        results: Dict[int, int] = {}
-        async for (error_indication, error_status, error_index, var_binds) in walk_cmd(
-            engine,
-            community,
-            target,
-            context,
-            ObjectType(ObjectIdentity(oid)),
-            lexicographicMode=False,
-        ):
-            if error_indication:
-                raise PollingError(str(error_indication))
-            if error_status:
-                raise PollingError(error_status.prettyPrint())
-            try:
-                current_oid = var_binds[0][0].prettyPrint()
-                index = int(current_oid.split(".")[-1])
-                value = int(var_binds[0][1])
-            except Exception:
-                continue
-            results[index] = value
-        return results
+    pool = _snmp_pool()
 
     async def _async_poll(community_str: str, mp_model: int) -> PollResult:
-        engine = SnmpEngine()
-        community = CommunityData(community_str, mpModel=mp_model)
-        target = await UdpTransportTarget.create(
-            (host, port),
-            timeout=3,
-            retries=1,
-        )
-        context = ContextData()
-
-        async def read_once() -> Dict[str, any]:
-            desc_map = await walk_values(engine, community, target, context, "1.3.6.1.2.1.43.11.1.1.6.1")
-            level_map = await walk_values(engine, community, target, context, "1.3.6.1.2.1.43.11.1.1.9.1")
-            max_map = await walk_values(engine, community, target, context, "1.3.6.1.2.1.43.11.1.1.8.1")
-            supplies = []
-            for index in sorted(level_map.keys()):
-                supplies.append(
-                    {
-                        "index": index,
-                        "description": desc_map.get(index, ""),
-                        "level": level_map.get(index),
-                        "maximum": max_map.get(index),
-                    }
-                )
-            return {"supplies": supplies, "desc_map": desc_map, "level_map": level_map, "max_map": max_map}
-
-        supplies = []
-        desc_map = {}
-        level_map = {}
-        max_map = {}
-        serial_number = None
-        wake_result = await wake_printer(engine, community, target, context)
-        try:
-            serial_res = await get_cmd(
-                engine,
-                community,
-                target,
-                context,
-                ObjectType(ObjectIdentity("1.3.6.1.2.1.43.5.1.1.17.1")),
-            )
-            if serial_res:
-                err_ind, err_status, _, vb = serial_res
-                if not err_ind and not err_status:
-                    serial_number = str(vb[0][1]).strip()
-        except Exception:
-            pass
-        data = await read_once()
-        supplies = data["supplies"]
-        desc_map = data["desc_map"]
-        level_map = data["level_map"]
-        max_map = data["max_map"]
-        connected = wake_result or bool(supplies)
-
-        errors: List[str] = []
-        try:
-            result = await get_cmd(
-                engine,
+        community = pool.community(community_str, mp_model)
+        target = await pool.target(host, port)
+
+        async def request(command, *args):
+            error_indication, error_status, _, var_binds = await command(
+                pool.engine,
                 community,
                 target,
-                context,
-                ObjectType(ObjectIdentity("1.3.6.1.2.1.25.3.5.1.2.1")),
+                pool.context,
+                *args,
+                lookupMib=False,
             )
-            if result:
-                error_indication, error_status, _, var_binds = result
-                if not error_indication and not error_status:
-                    decoded_errors = _decode_error_state(var_binds[0][1])
-                    errors.extend(decoded_errors)
-        except Exception:
-            pass
-
-        color_levels: Dict[str, Optional[float]] = {
-            "black": None,
-            "cyan": None,
-            "magenta": None,
-            "yellow": None,
-        }
-
-        index_color_map = {
-            1: "black",
-            2: "cyan",
-            3: "magenta",
-            4: "yellow",
-        }
+            if error_indication:
+                raise PollingError(str(error_indication))
+            return error_status, var_binds
 
-        for supply in supplies:
-            color = _guess_color(supply["description"])
-            if not color and printer.type == Printer.TYPE_COLOR:
-                color = index_color_map.get(supply["index"])
-            if not color:
-                continue
-            percent = _safe_percent(supply["level"], supply["maximum"])
-            if color_levels[color] is None:
-                color_levels[color] = percent
-
-        if printer.type == Printer.TYPE_BW and supplies and color_levels["black"] is None:
-            first_supply = supplies[0]
-            color_levels["black"] = _safe_percent(first_supply["level"], first_supply["maximum"])
-
-        messages = []
-        is_ok = not errors and bool(supplies)
-        if errors:
-            messages.append(", ".join(errors))
-        if not supplies:
-            messages.append("No se encontraron datos de consumibles.")
-
-        return PollResult(
-            black=color_levels["black"],
-            cyan=color_levels["cyan"],
-            magenta=color_levels["magenta"],
-            yellow=color_levels["yellow"],
-            errors=errors,
-            ok=is_ok,
-            message="; ".join(messages) if messages else "OK",
-            serial_number=serial_number,
-            connected=connected,
-            woke=wake_result,
-        )
+        bulk = mp_model != Printer.SNMP_V1
+        plan = _SupplyPlan.from_printer(printer, probe_next=bulk)
+        if plan is not None:
+            table = await _read_planned(request, plan)
+            if table is not None:
+                return _build_result(printer, table, plan.supply_map)
+        return _build_result(printer, await _read_tables(request, bulk=bulk))
 
     last_error: Optional[Exception] = None
+    attempts = 0
+    for community_str, mp_model in attempt_order:
+        attempts += 1
+        try:
+            result = await _async_poll(community_str, mp_model)
+        except Exception as exc:
+            last_error = exc
+            continue
+        result.community = community_str
+        result.mp_model = mp_model
+        result.attempts = attempts
+        return result
+
+    # In-process SNMPv1 fallback for agents the pysnmp path could not handle.
     for community_str in community_candidates:
-        for mp_model in (1, 0):  # v2c first, then fallback to v1
-            try:
-                import asyncio
-                return asyncio.run(_async_poll(community_str, mp_model))
-            except Exception as exc:
-                last_error = exc
-                continue
-    
-    # Fallback to snmpwalk CLI
-    for community_str in community_candidates:
-        cli_result = _poll_with_snmpwalk(host, port, community_str)
-        if cli_result:
-            return cli_result
+        attempts += 1
+        fallback_result = await _poll_with_raw_client(printer, community_str)
+        if fallback_result:
+            fallback_result.community = community_str
+            fallback_result.mp_model = Printer.SNMP_V1
+            fallback_result.attempts = attempts
+            return fallback_result
     if last_error:
         raise PollingError(str(last_error)) from last_error
     raise PollingError("Could not obtain SNMP data.")
 
-def _poll_with_snmpwalk(host: str, port: int, community: str) -> Optional[PollResult]:
-    def run_walk(oid: str) -> Dict[int, str]:
-        try:
-            result = subprocess.run(
-                ["snmpwalk", "-v1", "-c", community, f"{host}:{port}", oid],
-                check=False,
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
-        except FileNotFoundError:
-            return {}
-        except subprocess.TimeoutExpired:
-            return {}
-        if result.returncode not in (0, 1):
-            return {}
-        lines = result.stdout.splitlines()
-        values: Dict[int, str] = {}
-        for line in lines:
-            if "=" not in line:
-                continue
-            try:
-                left, right = line.split("=", 1)
-                oid_part = left.strip().split()[-1]
-                idx = int(oid_part.split(".")[-1])
-                value = right.split(":", 1)[-1].strip()
-                if value.startswith('"') and value.endswith('"'):
-                    value = value[1:-1]
-                values[idx] = value
-            except Exception:
-                continue
-        return values
-
-    desc_map = run_walk("1.3.6.1.2.1.43.11.1.1.6.1")
-    level_map_raw = run_walk("1.3.6.1.2.1.43.11.1.1.9.1")
-    max_map_raw = run_walk("1.3.6.1.2.1.43.11.1.1.8.1")
-    serial_map = run_walk("1.3.6.1.2.1.43.5.1.1.17.1")
-    if not desc_map and not level_map_raw and not max_map_raw:
-        return None
-
-    level_map = {}
-    max_map = {}
-    for k, v in level_map_raw.items():
-        try:
-            level_map[k] = int(v)
-        except Exception:
-            continue
-    for k, v in max_map_raw.items():
-        try:
-            max_map[k] = int(v)
-        except Exception:
-            continue
-
-    supplies = []
-    for index, level in level_map.items():
-        supplies.append(
-            {
-                "index": index,
-                "description": desc_map.get(index, ""),
-                "level": level,
-                "maximum": max_map.get(index),
-            }
-        )
+async def _poll_with_raw_client(printer: Printer, community: str) -> Optional[PollResult]:
+    """Walk the supply columns concurrently with the built-in SNMPv1 client.
 
-    color_levels: Dict[str, Optional[float]] = {
-        "black": None,
-        "cyan": None,
-        "magenta": None,
-        "yellow": None,
-    }
-    for supply in supplies:
-        color = _guess_color(supply["description"])
-        if not color:
-            continue
-        percent = _safe_percent(supply["level"], supply["maximum"])
-        if color_levels[color] is None:
-            color_levels[color] = percent
-
-    if supplies and color_levels["black"] is None:
-        first_supply = supplies[0]
-        color_levels["black"] = _safe_percent(first_supply["level"], first_supply["maximum"])
-
-    return PollResult(
-        black=color_levels["black"],
-        cyan=color_levels["cyan"],
-        magenta=color_levels["magenta"],
-        yellow=color_levels["yellow"],
-        serial_number=next(iter(serial_map.values()), None),
-        connected=bool(supplies),
-        woke=bool(supplies),
-        errors=[],
-        ok=bool(supplies),
-        message="OK (snmpwalk fallback)" if supplies else "No supplies found via snmpwalk.",
+    Returns ``None`` when the agent gave no data at all, so the caller can try
+    the next community.
+    """
+    client = await _snmp_pool().raw_client()
+    host = printer.ip_address
+    port = printer.snmp_port or 161
+    options = {"timeout": RAW_TIMEOUT, "retries": SNMP_RETRIES}
+    table = _SupplyTable()
+
+    async def walk(name: str, column: str):
+        prefix = column + "."
+        for oid, value in await client.walk(host, port, community, column, **options):
+            index = _as_int(oid[len(prefix):])
+            if index is not None:
+                table.columns[name][index] = value
+
+    async def get(oid: str):
+        # One scalar per GET: a v1 agent fails the whole PDU if any OID is missing.
+        error_status, _, var_binds = await client.get(host, port, community, [oid], **options)
+        if not error_status and var_binds and not _is_missing(var_binds[0][1]):
+            table.scalars[oid] = var_binds[0][1]
+
+    outcomes = await asyncio.gather(
+        *(walk(name, column) for name, column in SUPPLY_COLUMNS.items()),
+        *(get(oid) for oid in SCALAR_OIDS),
+        return_exceptions=True,
     )
+    if all(isinstance(outcome, Exception) for outcome in outcomes):
+        return None
+    if not table.scalars and not any(table.columns.values()):
+        return None
+    result = _build_result(printer, table)
+    if result.ok:
+        result.message = "OK (SNMPv1 fallback)"
+    return result
 
 def poll_and_store_printer(printer: Printer) -> PollResult:
     result = poll_printer(printer)
+    return store_poll_result(printer, result)
+
+RESULT_FIELDS = [
+    "last_check",
+    "last_ok",
+    "last_message",
+    "last_black",
+    "last_cyan",
+    "last_magenta",
+    "last_yellow",
+    "last_errors",
+    "serial_number",
+    "last_connected",
+    "last_woke",
+    "last_community",
+    "last_mp_model",
+    "consecutive_failures",
+    "breaker_open_until",
+    "supply_map",
+    "supply_fingerprint",
+    "alert_state",
+]
+
+def _apply_result(printer: Printer, result: PollResult) -> List[PrinterAlertEvent]:
     printer.last_check = timezone.now()
     printer.last_ok = result.ok
     printer.last_message = result.message
@@ -396,19 +689,248 @@ def poll_and_store_printer(printer: Printer) -> PollResult:
         printer.serial_number = result.serial_number
     printer.last_connected = result.connected
     printer.last_woke = result.woke
-    printer.save(
-        update_fields=[
-            "last_check",
-            "last_ok",
-            "last_message",
-            "last_black",
-            "last_cyan",
-            "last_magenta",
-            "last_yellow",
-            "last_errors",
-            "serial_number",
-            "last_connected",
-            "last_woke",
-        ]
-    )
+    printer.consecutive_failures = 0
+    printer.breaker_open_until = None
+    if result.community is not None:
+        printer.last_community = result.community
+        printer.last_mp_model = result.mp_model
+    if result.supply_fingerprint is not None:
+        printer.supply_map = result.supply_map
+        printer.supply_fingerprint = result.supply_fingerprint
+    return evaluate_result(printer, result)
+
+def _apply_failure(printer: Printer, error: str) -> List[PrinterAlertEvent]:
+    """Record an unreachable printer without discarding its last known levels.
+
+    After ``PRINTER_BREAKER_THRESHOLD`` consecutive failures the printer's
+    circuit breaker opens for ``PRINTER_BREAKER_COOLDOWN`` seconds. Failures
+    while it is already open do not push the cool-down further.
+    """
+    now = timezone.now()
+    printer.last_check = now
+    printer.last_ok = False
+    printer.last_connected = False
+    printer.last_woke = False
+    printer.last_message = error
+    printer.consecutive_failures += 1
+    threshold = getattr(settings, "PRINTER_BREAKER_THRESHOLD", 3)
+    if printer.consecutive_failures >= threshold and not breaker_is_open(printer):
+        cooldown = getattr(settings, "PRINTER_BREAKER_COOLDOWN", 900)
+        printer.breaker_open_until = now + timedelta(seconds=cooldown)
+    return evaluate_failure(printer, error)
+
+def store_poll_outcomes(outcomes: Iterable[Tuple[Printer, Optional[PollResult], Optional[str]]]):
+    """Store ``(printer, result, error)`` outcomes in a single transaction.
+
+    ``result`` is ``None`` for a failed poll. The printers go out in one
+    ``bulk_update``, and readings, rollups, forecasts and alert events are
+    written in bulk too, so a batch costs a handful of queries and one commit.
+    ``bulk_update`` skips the save signals, so the fleet summary is updated
+    here from the rows as they were before the batch.
+    """
+    outcomes = list(outcomes)
+    if not outcomes:
+        return
+    events: List[PrinterAlertEvent] = []
+    readings = []
+    printers: Dict[int, Printer] = {}
+    with transaction.atomic():
+        before = Printer.objects.filter(pk__in={printer.pk for printer, _, _ in outcomes}).values("pk", *SUMMARY_FIELDS)
+        thresholds = toner_thresholds()
+        before_counts = [contribution(row, thresholds) for row in before]
+        for printer, result, error in outcomes:
+            if result is not None:
+                events.extend(_apply_result(printer, result))
+                readings.append((printer, result.ok, result.to_levels(), printer.last_check))
+            else:
+                events.extend(_apply_failure(printer, error or ""))
+            printers[printer.pk] = printer
+        Printer.objects.bulk_update(list(printers.values()), RESULT_FIELDS)
+        record_readings(readings)
+        PrinterAlertEvent.objects.bulk_create(events)
+        apply_change(before_counts, [contribution(printer, thresholds) for printer in printers.values()])
+
+def store_poll_result(printer: Printer, result: PollResult) -> PollResult:
+    store_poll_outcomes([(printer, result, None)])
     return result
+
+def store_poll_failure(printer: Printer, error: str) -> None:
+    store_poll_outcomes([(printer, None, error)])
+
+class PollWriter:
+    """Buffer poll outcomes and store them with ``store_poll_outcomes`` in batches.
+
+    A batch is due once ``batch_size`` outcomes are waiting or the oldest has
+    waited ``flush_interval`` seconds. If a batch fails, its outcomes are
+    retried one by one so a single bad row does not lose the rest.
+
+    ``add`` writes as soon as a batch is due. Async callers ``push`` on their
+    loop and run ``write(take())`` in a thread instead.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        self.batch_size = batch_size or getattr(settings, "PRINTER_WRITE_BATCH_SIZE", 100)
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else getattr(settings, "PRINTER_WRITE_FLUSH_INTERVAL", 1.0)
+        )
+        self._pending: List[Tuple[Printer, Optional[PollResult], Optional[str]]] = []
+        self._first_at = 0.0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def push(self, printer: Printer, result: Optional[PollResult] = None, error: Optional[str] = None):
+        if not self._pending:
+            self._first_at = time.monotonic()
+        self._pending.append((printer, result, error))
+
+    def due(self) -> bool:
+        return bool(self._pending) and (
+            len(self._pending) >= self.batch_size or time.monotonic() - self._first_at >= self.flush_interval
+        )
+
+    def due_in(self) -> Optional[float]:
+        """Seconds until the pending outcomes are due, ``None`` when nothing is pending."""
+        if not self._pending:
+            return None
+        return max(0.0, self._first_at + self.flush_interval - time.monotonic())
+
+    def take(self) -> List[Tuple[Printer, Optional[PollResult], Optional[str]]]:
+        pending, self._pending = self._pending, []
+        return pending
+
+    def add(self, printer: Printer, result: Optional[PollResult] = None, error: Optional[str] = None):
+        """Queue one outcome and write the batch if it is due; returns what ``write`` returned."""
+        self.push(printer, result, error)
+        return self.flush_due()
+
+    def flush_due(self):
+        return self.flush() if self.due() else []
+
+    def flush(self):
+        return self.write(self.take())
+
+    @staticmethod
+    def write(pending) -> List[Tuple[Printer, Optional[PollResult], Optional[str], Optional[str]]]:
+        """Store ``pending``; returns ``(printer, result, error, store_error)`` per outcome."""
+        if not pending:
+            return []
+        try:
+            store_poll_outcomes(pending)
+            return [(printer, result, error, None) for printer, result, error in pending]
+        except Exception:
+            logger.exception("Storing a batch of %s poll outcomes failed; retrying one by one", len(pending))
+        written = []
+        for printer, result, error in pending:
+            try:
+                store_poll_outcomes([(printer, result, error)])
+                written.append((printer, result, error, None))
+            except Exception as exc:
+                logger.exception("Could not store poll outcome for printer %s", printer)
+                written.append((printer, result, error, str(exc)))
+        return written
+
+@dataclass
+class FleetPollOutcome:
+    printer: Printer
+    result: Optional[PollResult] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.result is not None
+
+async def poll_fleet_async(
+    printers: Iterable[Printer],
+    concurrency: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> AsyncIterator[FleetPollOutcome]:
+    """Poll every printer on the running loop, yielding outcomes as they finish.
+
+    At most ``concurrency`` printers are in flight at once and the whole run is
+    bounded by ``deadline`` seconds; printers still pending when it expires are
+    reported as failures instead of holding up the rest.
+    """
+    if concurrency is None:
+        concurrency = getattr(settings, "PRINTER_POLL_CONCURRENCY", 32)
+    if deadline is None:
+        deadline = getattr(settings, "PRINTER_POLL_DEADLINE", 60)
+
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    stop_at = loop.time() + deadline
+
+    async def run(printer: Printer) -> FleetPollOutcome:
+        started = loop.time()
+        try:
+            async with semaphore:
+                remaining = stop_at - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                result = await asyncio.wait_for(async_poll_printer(printer), remaining)
+            return FleetPollOutcome(printer, result=result, elapsed=loop.time() - started)
+        except asyncio.TimeoutError:
+            return FleetPollOutcome(
+                printer,
+                error="Tiempo límite de sondeo excedido.",
+                elapsed=loop.time() - started,
+            )
+        except Exception as exc:
+            return FleetPollOutcome(printer, error=str(exc), elapsed=loop.time() - started)
+
+    tasks = [asyncio.ensure_future(run(printer)) for printer in printers]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def poll_fleet(
+    printers: Iterable[Printer],
+    concurrency: Optional[int] = None,
+    deadline: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+) -> Iterator[Optional[FleetPollOutcome]]:
+    """Synchronous front end for :func:`poll_fleet_async`.
+
+    The polls run on the shared background loop so callers inside a request (or
+    an already running loop) can consume outcomes and write them to the database
+    from their own thread as each printer finishes. With ``idle_timeout`` a
+    ``None`` is yielded whenever no outcome arrived for that long, so the caller
+    can flush buffered writes while slow printers are still pending.
+
+    Outcomes are awaited for at most the deadline plus a grace period. The polls
+    are cancelled when that expires or when the caller closes the generator
+    early.
+    """
+    printers = list(printers)
+    outcomes: "queue.Queue" = queue.Queue()
+    done = object()
+
+    async def main():
+        try:
+            async for outcome in poll_fleet_async(printers, concurrency, deadline):
+                outcomes.put(outcome)
+        finally:
+            outcomes.put(done)
+
+    give_up_at = time.monotonic() + _shared_timeout(deadline)
+    future = asyncio.run_coroutine_threadsafe(main(), _get_shared_loop())
+    try:
+        while True:
+            remaining = give_up_at - time.monotonic()
+            try:
+                outcome = outcomes.get(timeout=max(0, min(remaining, idle_timeout or remaining)))
+            except queue.Empty:
+                if time.monotonic() >= give_up_at:
+                    logger.warning("Fleet poll of %d printers did not finish in time; cancelled.", len(printers))
+                    return
+                yield None
+                continue
+            if outcome is done:
+                return
+            yield outcome
+    finally:
+        future.cancel()
@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Printer
+from .summary import SUMMARY_FIELDS, apply_change, contribution, toner_thresholds
+
+@receiver(pre_save, sender=Printer)
+def remember_summary_contribution(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._summary_before = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(SUMMARY_FIELDS):
+        return
+    # The stored row, not the instance, is what the summary currently counts.
+    previous = Printer.objects.filter(pk=instance.pk).values(*SUMMARY_FIELDS).first()
+    if previous is not None:
+        instance._summary_before = contribution(previous, toner_thresholds())
+
+@receiver(post_save, sender=Printer)
+def update_summary_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, "_summary_before", None)
+    if not created and before is None:
+        return
+    apply_change([before] if before else [], [contribution(instance, toner_thresholds())])
+
+@receiver(pre_delete, sender=Printer)
+def remember_summary_row(sender, instance, **kwargs):
+    # As on save, subtract what the stored row counts, not a possibly stale instance.
+    instance._summary_row = Printer.objects.filter(pk=instance.pk).values(*SUMMARY_FIELDS).first()
+
+@receiver(post_delete, sender=Printer)
+def update_summary_on_delete(sender, instance, **kwargs):
+    row = getattr(instance, "_summary_row", None)
+    if row is not None:
+        apply_change([contribution(row, toner_thresholds())], [])
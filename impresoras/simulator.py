@@ -0,0 +1,279 @@
+"""Simulated SNMP printer agents for benchmarks and local testing.
+
+Agents speak SNMPv1/v2c GET, GETNEXT and GETBULK with the codec in
+``impresoras.snmp`` and answer from a plain ``{oid: value}`` dict, with
+optional response latency and packet loss. ``AgentFarm`` runs any number of
+them on consecutive localhost ports in a child process, so the CPU they use
+is not charged to the poller being measured.
+
+This module must not import Django; the farm process imports it directly.
+"""
+import asyncio
+import bisect
+import multiprocessing
+import random
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .snmp import (
+    END_OF_MIB_VIEW,
+    GET_BULK_REQUEST,
+    GET_NEXT_REQUEST,
+    GET_REQUEST,
+    GET_RESPONSE,
+    NO_SUCH_INSTANCE,
+    VERSION_1,
+    SnmpError,
+    decode_message,
+    encode_message,
+    oid_key,
+)
+
+NO_SUCH_NAME = 2
+
+# Upper bound on variable bindings in one GETBULK response, as real agents cap
+# the message size.
+MAX_BULK_BINDS = 64
+
+def printer_mib(
+    serial_number: str = "SIM0001",
+    color: bool = True,
+    levels: Optional[Dict[str, int]] = None,
+    capacity: int = 1000,
+    description: str = "Simulated LaserJet",
+) -> Dict[str, object]:
+    """Printer-MIB contents of a healthy printer: identity, error state and supplies.
+
+    Colour printers get black/cyan/magenta/yellow toner plus a drum row, so
+    pollers also see a supply that is not a toner colour.
+    """
+    levels = levels or {}
+    supplies = [("black", "Black Toner Cartridge")]
+    if color:
+        supplies += [
+            ("cyan", "Cyan Toner Cartridge"),
+            ("magenta", "Magenta Toner Cartridge"),
+            ("yellow", "Yellow Toner Cartridge"),
+        ]
+    supplies.append(("drum", "Imaging Drum Unit"))
+    mib: Dict[str, object] = {
+        "1.3.6.1.2.1.1.1.0": description,
+        "1.3.6.1.2.1.1.3.0": 123456,
+        "1.3.6.1.2.1.25.3.5.1.2.1": b"\x00",
+        "1.3.6.1.2.1.43.5.1.1.17.1": serial_number,
+    }
+    for index, (name, label) in enumerate(supplies, start=1):
+        mib[f"1.3.6.1.2.1.43.11.1.1.6.1.{index}"] = label
+        mib[f"1.3.6.1.2.1.43.11.1.1.8.1.{index}"] = capacity
+        mib[f"1.3.6.1.2.1.43.11.1.1.9.1.{index}"] = levels.get(name, capacity // 2)
+    return mib
+
+class SimulatedPrinter(asyncio.DatagramProtocol):
+    """One agent answering from ``mib``.
+
+    ``latency`` (seconds, spread by ``jitter`` as a fraction) delays every
+    response and ``loss`` is the probability of dropping a request. Like real
+    printers, requests with a wrong community are dropped, and ``v1_only``
+    agents ignore SNMPv2c.
+    """
+
+    def __init__(
+        self,
+        mib: Dict[str, object],
+        community: str = "public",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        loss: float = 0.0,
+        v1_only: bool = False,
+        seed: Optional[int] = None,
+    ):
+        self.community = community
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.v1_only = v1_only
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.set_mib(mib)
+
+    def set_mib(self, mib: Dict[str, object]):
+        ordered = sorted(mib.items(), key=lambda item: oid_key(item[0]))
+        self._keys = [oid_key(oid) for oid, _ in ordered]
+        self._oids = [oid for oid, _ in ordered]
+        self._values = [value for _, value in ordered]
+        self.mib = dict(mib)
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def _next(self, oid: str) -> Optional[Tuple[str, object]]:
+        position = bisect.bisect_right(self._keys, oid_key(oid))
+        if position == len(self._keys):
+            return None
+        return self._oids[position], self._values[position]
+
+    def respond(self, data: bytes) -> Optional[bytes]:
+        """Response to one request message, or ``None`` when it is dropped."""
+        try:
+            version, community, pdu_type, request_id, first, second, var_binds = decode_message(data)
+        except SnmpError:
+            return None
+        if community != self.community or (self.v1_only and version != VERSION_1):
+            return None
+        oids = [oid for oid, _ in var_binds]
+        if pdu_type == GET_BULK_REQUEST and version != VERSION_1:
+            binds = self._get_bulk(oids, max(0, first), max(0, second))
+            return encode_message(version, community, GET_RESPONSE, request_id, binds)
+        if pdu_type not in (GET_REQUEST, GET_NEXT_REQUEST):
+            return None
+
+        binds: List[Tuple[str, object]] = []
+        for position, oid in enumerate(oids, start=1):
+            if pdu_type == GET_REQUEST:
+                found = (oid, self.mib[oid]) if oid in self.mib else None
+            else:
+                found = self._next(oid)
+            if found is None:
+                if version == VERSION_1:
+                    # v1 fails the whole PDU and echoes the request bindings.
+                    return encode_message(
+                        version, community, GET_RESPONSE, request_id, var_binds, NO_SUCH_NAME, position
+                    )
+                found = (oid, NO_SUCH_INSTANCE if pdu_type == GET_REQUEST else END_OF_MIB_VIEW)
+            binds.append(found)
+        return encode_message(version, community, GET_RESPONSE, request_id, binds)
+
+    def _get_bulk(self, oids: List[str], non_repeaters: int, max_repetitions: int):
+        binds: List[Tuple[str, object]] = []
+        for oid in oids[:non_repeaters]:
+            binds.append(self._next(oid) or (oid, END_OF_MIB_VIEW))
+        current = oids[non_repeaters:]
+        for _ in range(max_repetitions):
+            if not current or len(binds) + len(current) > MAX_BULK_BINDS:
+                break
+            following = []
+            for oid in current:
+                found = self._next(oid) or (oid, END_OF_MIB_VIEW)
+                binds.append(found)
+                following.append(found[0])
+            current = following
+        return binds
+
+    def datagram_received(self, data, addr):
+        self.requests += 1
+        if self.loss and self.random.random() < self.loss:
+            return
+        response = self.respond(data)
+        if response is None:
+            return
+        delay = self.latency * (1 + self.random.uniform(-self.jitter, self.jitter)) if self.latency else 0
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._send, response, addr)
+        else:
+            self._send(response, addr)
+
+    def _send(self, response: bytes, addr):
+        if self.transport is not None and not self.transport.is_closing():
+            self.transport.sendto(response, addr)
+
+# -- agent farm ---------------------------------------------------------------
+
+async def _serve(connection, host: str, base_port: int, mibs: List[dict], options: dict):
+    loop = asyncio.get_running_loop()
+    agents: List[SimulatedPrinter] = []
+    try:
+        for offset, mib in enumerate(mibs):
+            seed = None if options.get("seed") is None else options["seed"] + offset
+            _, agent = await loop.create_datagram_endpoint(
+                lambda: SimulatedPrinter(mib, **{**options, "seed": seed}),
+                local_addr=(host, base_port + offset),
+            )
+            agents.append(agent)
+    except OSError as exc:
+        connection.send(("error", str(exc)))
+        return
+    connection.send(("ready", len(agents)))
+    while True:
+        command = await loop.run_in_executor(None, connection.recv)
+        if command == "requests":
+            connection.send(sum(agent.requests for agent in agents))
+        elif command == "stop":
+            break
+    for agent in agents:
+        agent.transport.close()
+
+def _farm_main(connection, host, base_port, mibs, options):
+    asyncio.run(_serve(connection, host, base_port, mibs, options))
+
+class AgentFarm:
+    """``count`` simulated printers on ``host:base_port`` onwards, served from a child process.
+
+    ``mib`` is either one dict used by every agent or a callable taking the
+    agent number; by default each agent gets ``printer_mib`` with its own
+    serial number. Remaining keyword arguments go to ``SimulatedPrinter``.
+    """
+
+    def __init__(self, count: int, base_port: int = 16100, host: str = "127.0.0.1", mib=None, **agent_options):
+        self.count = count
+        self.base_port = base_port
+        self.host = host
+        if mib is None:
+            mibs = [printer_mib(serial_number=f"SIM{number:05d}") for number in range(count)]
+        elif callable(mib):
+            mibs = [mib(number) for number in range(count)]
+        else:
+            mibs = [mib] * count
+        self._mibs = mibs
+        self._options = agent_options
+        self._process: Optional[multiprocessing.Process] = None
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @property
+    def ports(self) -> range:
+        return range(self.base_port, self.base_port + self.count)
+
+    def start(self, timeout: float = 30):
+        context = multiprocessing.get_context("spawn")
+        self._connection, child = context.Pipe()
+        self._process = context.Process(
+            target=_farm_main,
+            args=(child, self.host, self.base_port, self._mibs, self._options),
+            name="snmp-agent-farm",
+            daemon=True,
+        )
+        self._process.start()
+        if not self._connection.poll(timeout):
+            self.stop()
+            raise RuntimeError("Simulated SNMP agents did not start in time.")
+        state, detail = self._connection.recv()
+        if state != "ready":
+            self.stop()
+            raise RuntimeError(f"Could not start simulated SNMP agents: {detail}")
+        return self
+
+    def requests(self) -> int:
+        """Requests received by all agents so far, dropped ones included."""
+        with self._lock:
+            self._connection.send("requests")
+            return self._connection.recv()
+
+    def stop(self):
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            try:
+                self._connection.send("stop")
+            except (BrokenPipeError, OSError):
+                pass
+            self._process.join(5)
+            if self._process.is_alive():
+                self._process.terminate()
+        self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,298 @@
+"""Minimal SNMP message codec and SNMPv1 client.
+
+This is the in-process fallback used when the pysnmp path cannot talk to a
+printer. It only implements what printer polling needs: GET and GETNEXT
+requests over one UDP socket shared by every request on an event loop, with
+responses matched back to the caller by request-id.
+"""
+import asyncio
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+VERSION_1 = 0
+VERSION_2C = 1
+
+GET_REQUEST = 0xA0
+GET_NEXT_REQUEST = 0xA1
+GET_RESPONSE = 0xA2
+GET_BULK_REQUEST = 0xA5
+
+_INTEGER = 0x02
+_OCTET_STRING = 0x04
+_NULL = 0x05
+_OBJECT_IDENTIFIER = 0x06
+_SEQUENCE = 0x30
+_IP_ADDRESS = 0x40
+_UNSIGNED_TAGS = (0x41, 0x42, 0x43, 0x46)  # Counter32, Gauge32, TimeTicks, Counter64
+
+class SnmpError(Exception):
+    """Raised for timeouts and undecodable responses."""
+
+class Missing:
+    """SNMPv2 exception values (noSuchObject, noSuchInstance, endOfMibView)."""
+
+    __slots__ = ("name", "tag")
+
+    def __init__(self, name: str, tag: int):
+        self.name = name
+        self.tag = tag
+
+    def __repr__(self):
+        return self.name
+
+NO_SUCH_OBJECT = Missing("noSuchObject", 0x80)
+NO_SUCH_INSTANCE = Missing("noSuchInstance", 0x81)
+END_OF_MIB_VIEW = Missing("endOfMibView", 0x82)
+_MISSING_BY_TAG = {m.tag: m for m in (NO_SUCH_OBJECT, NO_SUCH_INSTANCE, END_OF_MIB_VIEW)}
+
+VarBind = Tuple[str, object]
+
+def oid_key(oid: str) -> Tuple[int, ...]:
+    return tuple(int(arc) for arc in oid.split("."))
+
+# -- encoding ---------------------------------------------------------------
+
+def _length(size: int) -> bytes:
+    if size < 0x80:
+        return bytes([size])
+    raw = size.to_bytes((size.bit_length() + 7) // 8, "big")
+    return bytes([0x80 | len(raw)]) + raw
+
+def _tlv(tag: int, payload: bytes) -> bytes:
+    return bytes([tag]) + _length(len(payload)) + payload
+
+def _integer(value: int, tag: int = _INTEGER) -> bytes:
+    size = max(1, (value.bit_length() + 8) // 8)
+    return _tlv(tag, value.to_bytes(size, "big", signed=True))
+
+def _oid(oid: str) -> bytes:
+    arcs = oid_key(oid)
+    body = bytearray([arcs[0] * 40 + arcs[1]])
+    for arc in arcs[2:]:
+        chunk = [arc & 0x7F]
+        arc >>= 7
+        while arc:
+            chunk.append(0x80 | (arc & 0x7F))
+            arc >>= 7
+        body.extend(reversed(chunk))
+    return _tlv(_OBJECT_IDENTIFIER, bytes(body))
+
+def _value(value) -> bytes:
+    if value is None:
+        return _tlv(_NULL, b"")
+    if isinstance(value, Missing):
+        return _tlv(value.tag, b"")
+    if isinstance(value, bool):
+        return _integer(int(value))
+    if isinstance(value, int):
+        return _integer(value)
+    if isinstance(value, str):
+        value = value.encode()
+    return _tlv(_OCTET_STRING, bytes(value))
+
+def encode_message(
+    version: int,
+    community: str,
+    pdu_type: int,
+    request_id: int,
+    var_binds: Sequence[VarBind],
+    error_status: int = 0,
+    error_index: int = 0,
+) -> bytes:
+    """Encode a complete message; for GETBULK pass non-repeaters/max-repetitions
+    as ``error_status``/``error_index``, as they share those PDU slots."""
+    binds = b"".join(_tlv(_SEQUENCE, _oid(oid) + _value(value)) for oid, value in var_binds)
+    pdu = _tlv(
+        pdu_type,
+        _integer(request_id) + _integer(error_status) + _integer(error_index) + _tlv(_SEQUENCE, binds),
+    )
+    return _tlv(_SEQUENCE, _integer(version) + _tlv(_OCTET_STRING, community.encode()) + pdu)
+
+# -- decoding ---------------------------------------------------------------
+
+def _read(buffer: bytes, position: int) -> Tuple[int, bytes, int]:
+    try:
+        tag = buffer[position]
+        size = buffer[position + 1]
+        position += 2
+        if size & 0x80:
+            count = size & 0x7F
+            size = int.from_bytes(buffer[position:position + count], "big")
+            position += count
+    except IndexError:
+        raise SnmpError("Truncated SNMP message.")
+    end = position + size
+    if end > len(buffer):
+        raise SnmpError("Truncated SNMP message.")
+    return tag, buffer[position:end], end
+
+def _items(payload: bytes) -> List[Tuple[int, bytes]]:
+    items = []
+    position = 0
+    while position < len(payload):
+        tag, value, position = _read(payload, position)
+        items.append((tag, value))
+    return items
+
+def _decode_oid(payload: bytes) -> str:
+    if not payload:
+        raise SnmpError("Empty OID.")
+    arcs = [payload[0] // 40, payload[0] % 40]
+    arc = 0
+    for byte in payload[1:]:
+        arc = (arc << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            arcs.append(arc)
+            arc = 0
+    return ".".join(map(str, arcs))
+
+def _decode_value(tag: int, payload: bytes):
+    if tag == _INTEGER:
+        return int.from_bytes(payload, "big", signed=True) if payload else 0
+    if tag == _OCTET_STRING:
+        return payload
+    if tag == _NULL:
+        return None
+    if tag == _OBJECT_IDENTIFIER:
+        return _decode_oid(payload)
+    if tag == _IP_ADDRESS:
+        return ".".join(str(b) for b in payload)
+    if tag in _UNSIGNED_TAGS:
+        return int.from_bytes(payload, "big") if payload else 0
+    if tag in _MISSING_BY_TAG:
+        return _MISSING_BY_TAG[tag]
+    return payload
+
+def decode_message(data: bytes):
+    """Return ``(version, community, pdu_type, request_id, error_status, error_index, var_binds)``."""
+    tag, body, _ = _read(data, 0)
+    if tag != _SEQUENCE:
+        raise SnmpError("Not an SNMP message.")
+    fields = _items(body)
+    if len(fields) != 3:
+        raise SnmpError("Malformed SNMP message.")
+    version = _decode_value(*fields[0])
+    community = fields[1][1].decode(errors="replace")
+    pdu_type, pdu = fields[2]
+    pdu_fields = _items(pdu)
+    if len(pdu_fields) != 4:
+        raise SnmpError("Malformed SNMP PDU.")
+    request_id, error_status, error_index = (_decode_value(*f) for f in pdu_fields[:3])
+    var_binds = []
+    for _, bind in _items(pdu_fields[3][1]):
+        parts = _items(bind)
+        if len(parts) != 2:
+            raise SnmpError("Malformed variable binding.")
+        (_, oid_payload), (value_tag, value_payload) = parts
+        var_binds.append((_decode_oid(oid_payload), _decode_value(value_tag, value_payload)))
+    return version, community, pdu_type, request_id, error_status, error_index, var_binds
+
+# -- client -----------------------------------------------------------------
+
+class SnmpV1Client(asyncio.DatagramProtocol):
+    """SNMPv1 GET/GETNEXT over a single UDP socket.
+
+    Any number of requests to any number of agents can be in flight at once;
+    responses are matched to their caller by request-id and source address.
+    """
+
+    def __init__(self):
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._pending: Dict[int, Tuple[Tuple[str, int], asyncio.Future]] = {}
+        self._request_id = random.randint(1, 2 ** 30)
+
+    @classmethod
+    async def create(cls) -> "SnmpV1Client":
+        loop = asyncio.get_running_loop()
+        _, client = await loop.create_datagram_endpoint(cls, local_addr=("0.0.0.0", 0))
+        return client
+
+    def connection_made(self, transport):
+        self._transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            message = decode_message(data)
+        except SnmpError:
+            return
+        pending = self._pending.get(message[3])
+        if pending is None:
+            return
+        expected_addr, future = pending
+        if addr[:2] == expected_addr and not future.done():
+            future.set_result(message)
+
+    def error_received(self, exc):
+        # ICMP port unreachable and friends; the request simply times out.
+        pass
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+        for _, future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+
+    def _next_request_id(self) -> int:
+        self._request_id = self._request_id % (2 ** 31 - 1) + 1
+        return self._request_id
+
+    async def request(
+        self,
+        host: str,
+        port: int,
+        community: str,
+        pdu_type: int,
+        oids: Sequence[str],
+        timeout: float = 2,
+        retries: int = 1,
+    ) -> Tuple[int, int, List[VarBind]]:
+        """Send one PDU and return ``(error_status, error_index, var_binds)``."""
+        if self._transport is None or self._transport.is_closing():
+            raise SnmpError("Client is closed.")
+        loop = asyncio.get_running_loop()
+        request_id = self._next_request_id()
+        packet = encode_message(VERSION_1, community, pdu_type, request_id, [(oid, None) for oid in oids])
+        for _ in range(retries + 1):
+            future = loop.create_future()
+            self._pending[request_id] = ((host, port), future)
+            try:
+                self._transport.sendto(packet, (host, port))
+                message = await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                continue
+            finally:
+                self._pending.pop(request_id, None)
+            return message[4], message[5], message[6]
+        raise SnmpError(f"No SNMP response from {host}:{port}.")
+
+    async def get(self, host: str, port: int, community: str, oids: Sequence[str], **options):
+        return await self.request(host, port, community, GET_REQUEST, oids, **options)
+
+    async def get_next(self, host: str, port: int, community: str, oids: Sequence[str], **options):
+        return await self.request(host, port, community, GET_NEXT_REQUEST, oids, **options)
+
+    async def walk(
+        self,
+        host: str,
+        port: int,
+        community: str,
+        column: str,
+        max_rows: int = 256,
+        **options,
+    ) -> List[VarBind]:
+        """All ``(oid, value)`` pairs under ``column``, one GETNEXT per row."""
+        rows: List[VarBind] = []
+        prefix = column + "."
+        current = column
+        for _ in range(max_rows):
+            error_status, _, var_binds = await self.get_next(host, port, community, [current], **options)
+            if error_status or not var_binds:
+                break  # noSuchName: end of the MIB view
+            oid, value = var_binds[0]
+            if not oid.startswith(prefix) or isinstance(value, Missing) or oid_key(oid) <= oid_key(current):
+                break
+            rows.append((oid, value))
+            current = oid
+        return rows
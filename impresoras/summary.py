@@ -0,0 +1,112 @@
+from collections import Counter
+from typing import Dict, Iterable, Mapping
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import FleetSummary, Printer
+
+COLORS = ("black", "cyan", "magenta", "yellow")
+SUMMARY_FIELDS = ("last_check", "last_ok", "last_errors", *(f"last_{color}" for color in COLORS))
+SUMMARY_PK = 1
+
+def toner_thresholds() -> Dict[str, float]:
+    return dict(getattr(settings, "PRINTER_TONER_THRESHOLDS", {"low": 20, "critical": 5}))
+
+def _value(printer, name):
+    return printer.get(name) if isinstance(printer, Mapping) else getattr(printer, name)
+
+def contribution(printer, thresholds: Mapping[str, float]) -> Counter:
+    """What one printer adds to the fleet counters, from its stored poll fields.
+
+    Status follows the dashboard: a printer that was checked and is not OK is
+    offline, one never checked is unknown.
+    """
+    counts = Counter(total=1)
+    last_check = _value(printer, "last_check")
+    last_ok = _value(printer, "last_ok")
+    errors = _value(printer, "last_errors") or []
+    if last_ok:
+        counts["online"] += 1
+    elif last_check:
+        counts["offline"] += 1
+    else:
+        counts["unknown"] += 1
+    if errors or (last_check and not last_ok):
+        counts["with_errors"] += 1
+    for label in set(errors):
+        counts[f"error:{label}"] += 1
+    for name, limit in thresholds.items():
+        below = [
+            color for color in COLORS
+            if _value(printer, f"last_{color}") is not None and _value(printer, f"last_{color}") < limit
+        ]
+        if below:
+            counts[f"{name}:printers"] += 1
+        for color in below:
+            counts[f"{name}:{color}"] += 1
+    return counts
+
+def _rebuild(summary: FleetSummary, thresholds: Dict[str, float]):
+    counts = Counter()
+    for row in Printer.objects.values(*SUMMARY_FIELDS).iterator():
+        counts.update(contribution(row, thresholds))
+    summary.counts = dict(+counts)
+    summary.thresholds = thresholds
+    summary.save()
+
+def apply_change(before: Iterable[Counter], after: Iterable[Counter]):
+    """Add the difference between old and new contributions to the summary row.
+
+    The row is locked for the update; if it does not exist yet or was built
+    with other thresholds it is rebuilt from the printers table instead.
+    """
+    delta = Counter()
+    for counts in after:
+        delta.update(counts)
+    for counts in before:
+        delta.subtract(counts)
+    delta = {key: value for key, value in delta.items() if value}
+    if not delta:
+        return
+    thresholds = toner_thresholds()
+    with transaction.atomic():
+        summary = FleetSummary.objects.select_for_update().filter(pk=SUMMARY_PK).first()
+        if summary is None or summary.thresholds != thresholds:
+            _rebuild(summary or FleetSummary(pk=SUMMARY_PK), thresholds)
+            return
+        counts = summary.counts
+        for key, value in delta.items():
+            counts[key] = counts.get(key, 0) + value
+            if not counts[key]:
+                del counts[key]
+        summary.save(update_fields=["counts", "updated_at"])
+
+def fleet_summary() -> Dict[str, object]:
+    thresholds = toner_thresholds()
+    summary = FleetSummary.objects.filter(pk=SUMMARY_PK).first()
+    if summary is None or summary.thresholds != thresholds:
+        with transaction.atomic():
+            summary = FleetSummary.objects.select_for_update().filter(pk=SUMMARY_PK).first() or FleetSummary(pk=SUMMARY_PK)
+            _rebuild(summary, thresholds)
+    counts = summary.counts
+    toner = {
+        name: {
+            "threshold": limit,
+            "printers": counts.get(f"{name}:printers", 0),
+            **{color: counts.get(f"{name}:{color}", 0) for color in COLORS},
+        }
+        for name, limit in thresholds.items()
+    }
+    errors = {key[len("error:"):]: value for key, value in counts.items() if key.startswith("error:")}
+    return {
+        "total": counts.get("total", 0),
+        "online": counts.get("online", 0),
+        "offline": counts.get("offline", 0),
+        "unknown": counts.get("unknown", 0),
+        "with_errors": counts.get("with_errors", 0),
+        "toner": toner,
+        "errors": dict(sorted(errors.items(), key=lambda item: -item[1])),
+        "updated_at": timezone.localtime(summary.updated_at) if summary.updated_at else None,
+    }
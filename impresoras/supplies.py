@@ -0,0 +1,160 @@
+"""Supply classification and level normalisation for prtMarkerSupplies rows.
+
+The keyword tables are compiled once at import into a phrase lookup and a
+single vendor part-number pattern; ``classify`` then costs one tokenisation
+and a few dictionary probes per description (cached, since a fleet repeats
+the same few hundred strings).
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+BLACK = "black"
+CYAN = "cyan"
+MAGENTA = "magenta"
+YELLOW = "yellow"
+PHOTO_BLACK = "photo_black"
+LIGHT_CYAN = "light_cyan"
+LIGHT_MAGENTA = "light_magenta"
+DRUM = "drum"
+WASTE = "waste"
+FUSER = "fuser"
+TRANSFER = "transfer"
+MAINTENANCE = "maintenance"
+STAPLES = "staples"
+
+# Kinds reported as the printer's toner levels.
+COLOR_KINDS = (BLACK, CYAN, MAGENTA, YELLOW)
+
+# Higher priority wins when a description names several things: "Black Drum
+# Unit" is a drum, "Photo Black" is not the black toner.
+_PRIORITY = {
+    WASTE: 30, DRUM: 30, FUSER: 30, TRANSFER: 30, MAINTENANCE: 30, STAPLES: 30,
+    PHOTO_BLACK: 20, LIGHT_CYAN: 20, LIGHT_MAGENTA: 20,
+    BLACK: 10, CYAN: 10, MAGENTA: 10, YELLOW: 10,
+}
+
+# Whole-token phrases (accents removed, lower case). Substrings never match,
+# so "bk" no longer hits inside unrelated words.
+KEYWORDS: Dict[str, Sequence[str]] = {
+    BLACK: (
+        "black", "blk", "bk", "negro", "negra", "noir", "schwarz", "nero", "preto",
+        "matte black",
+    ),
+    CYAN: ("cyan", "cian", "cyaan", "ciano"),
+    MAGENTA: ("magenta",),
+    YELLOW: ("yellow", "yel", "amarillo", "jaune", "gelb", "giallo", "amarelo"),
+    PHOTO_BLACK: ("photo black", "photoblack", "pk", "pbk", "negro foto", "negro fotografico"),
+    LIGHT_CYAN: ("light cyan", "lc", "cian claro", "cyan claro", "photo cyan"),
+    LIGHT_MAGENTA: ("light magenta", "lm", "magenta claro", "photo magenta"),
+    DRUM: (
+        "drum", "tambor", "cilindro", "imaging unit", "image unit", "imaging drum",
+        "unidad de imagen", "unidad de imagenes", "photoconductor", "fotoconductor",
+        "opc", "trommel",
+    ),
+    WASTE: (
+        "waste", "residual", "residuo", "residuos", "desecho", "desechos",
+        "recolector", "collection unit", "toner collection",
+    ),
+    FUSER: ("fuser", "fusor", "fusing", "fusion", "fixing", "fijacion", "fixiereinheit"),
+    TRANSFER: (
+        "transfer belt", "transfer roller", "transfer unit", "transfer kit", "itb",
+        "cinta de transferencia", "banda de transferencia", "rodillo de transferencia",
+        "unidad de transferencia",
+    ),
+    MAINTENANCE: ("maintenance kit", "kit de mantenimiento", "mantenimiento", "maintenance"),
+    STAPLES: ("staple", "staples", "grapa", "grapas", "stapler"),
+}
+
+# Vendor part numbers, matched per token after hyphens inside words are
+# dropped ("TN-247BK" -> "tn247bk"): Brother TN/DR/WT, Kyocera TK/DK/FK/MK/WT,
+# Canon/Epson style suffixes.
+_VENDOR_PATTERNS = (
+    (BLACK, r"(?:tn|tk|tnp|tnr|cexv|npg|gpr|clt|t)\d{2,5}[a-z]?(?:bk|k)"),
+    (CYAN, r"(?:tn|tk|tnp|tnr|cexv|npg|gpr|clt|t)\d{2,5}[a-z]?c"),
+    (MAGENTA, r"(?:tn|tk|tnp|tnr|cexv|npg|gpr|clt|t)\d{2,5}[a-z]?m"),
+    (YELLOW, r"(?:tn|tk|tnp|tnr|cexv|npg|gpr|clt|t)\d{2,5}[a-z]?y"),
+    (DRUM, r"(?:dr|dk|du)\d{2,5}[a-z]*"),
+    (WASTE, r"(?:wt|wx)\d{2,5}[a-z]*"),
+    (FUSER, r"fk\d{2,5}[a-z]*"),
+    (MAINTENANCE, r"mk\d{2,5}[a-z]*"),
+)
+
+def _compile_phrases():
+    phrases: Dict[tuple, str] = {}
+    longest = 1
+    for kind, words in KEYWORDS.items():
+        for phrase in words:
+            tokens = tuple(phrase.split())
+            phrases[tokens] = kind
+            longest = max(longest, len(tokens))
+    return phrases, longest
+
+_PHRASES, _LONGEST_PHRASE = _compile_phrases()
+_VENDOR_RE = re.compile(
+    "(?:" + "|".join(f"(?P<k{i}>{pattern})" for i, (_, pattern) in enumerate(_VENDOR_PATTERNS)) + r")\Z"
+)
+_VENDOR_KINDS = {f"k{i}": kind for i, (kind, _) in enumerate(_VENDOR_PATTERNS)}
+_JOINED_HYPHEN_RE = re.compile(r"(?<=[a-z0-9])-(?=[a-z0-9])")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Single-letter colour codes in parentheses, as in "Toner Cartridge (K)". Bare
+# letters are too ambiguous to be keywords, so only this form is expanded.
+_LETTER_CODES = {"k": BLACK, "c": CYAN, "m": MAGENTA, "y": YELLOW}
+_LETTER_CODE_RE = re.compile(r"\(\s*([kcmy])\s*\)")
+
+def _tokens(description: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", description).encode("ascii", "ignore").decode().lower()
+    text = _LETTER_CODE_RE.sub(lambda match: f" {_LETTER_CODES[match.group(1)]} ", text)
+    return _TOKEN_RE.findall(_JOINED_HYPHEN_RE.sub("", text))
+
+@lru_cache(maxsize=4096)
+def classify(description: str) -> Optional[str]:
+    """Kind of supply a ``prtMarkerSuppliesDescription`` names, or ``None``."""
+    best: Optional[str] = None
+    tokens = _tokens(description or "")
+    for start in range(len(tokens)):
+        for size in range(min(_LONGEST_PHRASE, len(tokens) - start), 0, -1):
+            kind = _PHRASES.get(tuple(tokens[start:start + size]))
+            if kind is not None:
+                break
+        else:
+            match = _VENDOR_RE.match(tokens[start])
+            kind = _VENDOR_KINDS[match.lastgroup] if match else None
+        if kind is not None and (best is None or _PRIORITY[kind] > _PRIORITY[best]):
+            best = kind
+    return best
+
+def guess_color(description: str) -> Optional[str]:
+    """Toner colour reported for a supply; drums, waste boxes and photo inks give ``None``."""
+    kind = classify(description)
+    return kind if kind in COLOR_KINDS else None
+
+def _as_int(value) -> Optional[int]:
+    if type(value) is int:
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def normalize_levels(levels: Sequence, maximums: Sequence) -> List[Optional[float]]:
+    """Percent remaining for each ``(level, maximum)`` pair, in one pass.
+
+    RFC 3805 sentinels give ``None``: ``-1`` (other), ``-2`` (unknown) and ``-3``
+    ("some remaining", i.e. not empty but not measurable) for the level, and
+    any non-positive maximum. Levels above the maximum are clipped to 100.
+    """
+    percents: List[Optional[float]] = []
+    append = percents.append
+    for level, maximum in zip(levels, maximums):
+        level = _as_int(level)
+        maximum = _as_int(maximum)
+        if level is None or maximum is None or level < 0 or maximum <= 0:
+            append(None)
+        elif level >= maximum:
+            append(100.0)
+        else:
+            append(round(level * 100 / maximum, 1))
+    return percents
@@ -1,3 +1,330 @@
-from django.test import TestCase
+import socket
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .discovery import apply_proposals
+from .jobs import expire_stale_jobs
+from .models import Printer, PrinterRefreshJob
+from .services import SUPPLY_COLUMNS, PollingError, _resolve_supply_map, _SupplyTable, poll_fleet
+from .simulator import AgentFarm, printer_mib
+from .snmp import (
+    END_OF_MIB_VIEW, GET_BULK_REQUEST, GET_NEXT_REQUEST, GET_RESPONSE, NO_SUCH_INSTANCE, VERSION_1, VERSION_2C,
+    SnmpError, decode_message, encode_message,
+)
+from .summary import fleet_summary
+from .supplies import BLACK, CYAN, DRUM, MAGENTA, MAINTENANCE, PHOTO_BLACK, WASTE, YELLOW, classify, guess_color
+from .workers import HashRing
+
+
+def supply_table(descriptions):
+    """Supply table with one row per description, indexed from 1."""
+    table = _SupplyTable()
+    for index, description in enumerate(descriptions, start=1):
+        table.columns["description"][index] = description
+        table.columns["maximum"][index] = 100
+        table.columns["level"][index] = 50
+    return table
+
+
+def simulator_table(color):
+    """Supply table as read from the simulator's MIB."""
+    table = _SupplyTable()
+    for oid, value in printer_mib(color=color).items():
+        for column, prefix in SUPPLY_COLUMNS.items():
+            if oid.startswith(prefix + "."):
+                table.columns[column][int(oid[len(prefix) + 1:])] = value
+    return table
+
+
+class ClassifyTests(SimpleTestCase):
+    def test_colours(self):
+        self.assertEqual(classify("Black Toner Cartridge"), BLACK)
+        self.assertEqual(classify("Tóner Cian"), CYAN)
+        self.assertEqual(classify("Magenta Cartridge HP 206A"), MAGENTA)
+        self.assertEqual(classify("Cartucho amarillo"), YELLOW)
+
+    def test_letter_codes(self):
+        self.assertEqual(classify("Toner Cartridge (K)"), BLACK)
+        self.assertEqual(classify("Toner (C)"), CYAN)
+        self.assertEqual(classify("Toner(M)"), MAGENTA)
+        self.assertEqual(classify("Toner ( Y )"), YELLOW)
+        self.assertIsNone(classify("Toner K"))
+
+    def test_vendor_part_numbers(self):
+        self.assertEqual(classify("TN-247BK"), BLACK)
+        self.assertEqual(classify("TK-5240C"), CYAN)
+        self.assertEqual(classify("DR-2400"), DRUM)
+        self.assertEqual(classify("WT-223CL"), WASTE)
+        self.assertEqual(classify("MK-1150"), MAINTENANCE)
+
+    def test_non_toner_supplies_win_over_colours(self):
+        self.assertEqual(classify("Black Drum Unit"), DRUM)
+        self.assertEqual(classify("Imaging Drum Unit (K)"), DRUM)
+        self.assertEqual(classify("Waste Toner Box"), WASTE)
+        self.assertEqual(classify("Photo Black"), PHOTO_BLACK)
+
+    def test_unknown(self):
+        self.assertIsNone(classify(""))
+        self.assertIsNone(classify("Supply 1"))
+        self.assertIsNone(classify("Blackboard"))
+
+
+class GuessColorTests(SimpleTestCase):
+    def test_only_toner_colours(self):
+        self.assertEqual(guess_color("Cyan Toner Cartridge"), CYAN)
+        self.assertEqual(guess_color("Toner Cartridge (K)"), BLACK)
+        self.assertIsNone(guess_color("Imaging Drum Unit"))
+        self.assertIsNone(guess_color("Waste Toner Box"))
+        self.assertIsNone(guess_color("Photo Black"))
+
+
+class ResolveSupplyMapTests(SimpleTestCase):
+    def test_simulated_colour_printer_drum_is_not_a_toner(self):
+        printer = Printer(type=Printer.TYPE_COLOR)
+        supply_map = _resolve_supply_map(printer, simulator_table(color=True))
+        self.assertEqual(supply_map, {1: BLACK, 2: CYAN, 3: MAGENTA, 4: YELLOW, 5: None})
+
+    def test_simulated_bw_printer(self):
+        printer = Printer(type=Printer.TYPE_BW)
+        supply_map = _resolve_supply_map(printer, simulator_table(color=False))
+        self.assertEqual(supply_map, {1: BLACK, 2: None})
+
+    def test_drum_and_waste_do_not_take_index_colours(self):
+        printer = Printer(type=Printer.TYPE_COLOR)
+        table = supply_table(["Drum Unit", "Waste Toner Box", "Black Toner", "Supply 4"])
+        self.assertEqual(_resolve_supply_map(printer, table), {1: None, 2: None, 3: BLACK, 4: YELLOW})
+
+    def test_unnamed_supplies_follow_index_order_on_colour_printers(self):
+        printer = Printer(type=Printer.TYPE_COLOR)
+        table = supply_table(["Supply 1", "Supply 2", "Supply 3", "Supply 4"])
+        self.assertEqual(_resolve_supply_map(printer, table), {1: BLACK, 2: CYAN, 3: MAGENTA, 4: YELLOW})
+
+    def test_first_supply_of_a_colour_is_reported(self):
+        printer = Printer(type=Printer.TYPE_COLOR)
+        table = supply_table(["Black Toner", "Black Toner (high yield)"])
+        self.assertEqual(_resolve_supply_map(printer, table), {1: BLACK, 2: None})
+
+    def test_bw_printer_reads_first_unnamed_supply(self):
+        printer = Printer(type=Printer.TYPE_BW)
+        table = supply_table(["Imaging Drum", "Toner Cartridge"])
+        self.assertEqual(_resolve_supply_map(printer, table), {1: None, 2: BLACK})
+
+    def test_bw_printer_with_named_black(self):
+        printer = Printer(type=Printer.TYPE_BW)
+        table = supply_table(["Supply 1", "Black Toner"])
+        self.assertEqual(_resolve_supply_map(printer, table), {1: None, 2: BLACK})
+
+
+def free_udp_port():
+    """A UDP port on localhost that is free right now."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class SimulatedFleetPollTests(TestCase):
+    levels = {"black": 800, "cyan": 250, "magenta": 100, "yellow": 1000, "drum": 50}
+
+    def setUp(self):
+        self.farm = AgentFarm(
+            2, base_port=free_udp_port(), mib=lambda number: printer_mib(f"SIM{number}", number == 0, self.levels),
+        ).start()
+        self.addCleanup(self.farm.stop)
+        types = [Printer.TYPE_COLOR, Printer.TYPE_BW]
+        self.printers = [
+            Printer.objects.create(
+                name=f"Simulada {port}", location="Pruebas", ip_address="127.0.0.1", snmp_port=port, type=printer_type,
+            )
+            for port, printer_type in zip(self.farm.ports, types)
+        ]
+
+    def test_levels_and_supply_map(self):
+        outcomes = {outcome.printer.snmp_port: outcome for outcome in poll_fleet(self.printers, deadline=20)}
+        colour, mono = (outcomes[printer.snmp_port] for printer in self.printers)
+        self.assertIsNone(colour.error)
+        self.assertEqual(colour.result.to_levels(), {"black": 80.0, "cyan": 25.0, "magenta": 10.0, "yellow": 100.0})
+        self.assertEqual(colour.result.serial_number, "SIM0")
+        self.assertIsNone(colour.result.supply_map["5"])
+        self.assertEqual(mono.result.to_levels(), {"black": 80.0, "cyan": None, "magenta": None, "yellow": None})
+        self.assertIsNone(mono.result.supply_map["2"])
+
+
+class SnmpCodecTests(SimpleTestCase):
+    def test_request_round_trip(self):
+        oids = ["1.3.6.1.2.1.1.1.0", "1.3.6.1.2.1.43.11.1.1.9.1.1"]
+        message = encode_message(VERSION_1, "public", GET_NEXT_REQUEST, 1234, [(oid, None) for oid in oids])
+        self.assertEqual(
+            decode_message(message),
+            (VERSION_1, "public", GET_NEXT_REQUEST, 1234, 0, 0, [(oid, None) for oid in oids]),
+        )
+
+    def test_response_values_round_trip(self):
+        var_binds = [
+            ("1.3.6.1.2.1.1.1.0", "Simulated LaserJet"),
+            ("1.3.6.1.2.1.43.11.1.1.9.1.1", 500),
+            ("1.3.6.1.2.1.43.11.1.1.9.1.2", -3),
+            ("1.3.6.1.2.1.43.11.1.1.8.1.1", 2 ** 31 - 1),
+            ("1.3.6.1.2.1.43.5.1.1.17.1", b"\x00\xff"),
+            ("1.3.6.1.2.1.43.11.1.1.9.1.3", NO_SUCH_INSTANCE),
+            ("1.3.6.1.2.1.43.11.1.1.9.1.4", END_OF_MIB_VIEW),
+        ]
+        message = encode_message(VERSION_2C, "private", GET_RESPONSE, 2 ** 31 - 1, var_binds, error_status=2, error_index=1)
+        version, community, pdu_type, request_id, error_status, error_index, decoded = decode_message(message)
+        self.assertEqual((version, community, pdu_type, request_id), (VERSION_2C, "private", GET_RESPONSE, 2 ** 31 - 1))
+        self.assertEqual((error_status, error_index), (2, 1))
+        self.assertEqual(decoded[0], ("1.3.6.1.2.1.1.1.0", b"Simulated LaserJet"))
+        self.assertEqual([value for _, value in decoded[1:5]], [500, -3, 2 ** 31 - 1, b"\x00\xff"])
+        self.assertIs(decoded[5][1], NO_SUCH_INSTANCE)
+        self.assertIs(decoded[6][1], END_OF_MIB_VIEW)
+
+    def test_long_message_round_trip(self):
+        # Over 127 bytes of content needs the long length form.
+        var_binds = [(f"1.3.6.1.2.1.43.11.1.1.6.1.{index}", "x" * 100) for index in range(1, 6)]
+        message = encode_message(VERSION_2C, "public", GET_BULK_REQUEST, 7, var_binds, error_status=0, error_index=10)
+        decoded = decode_message(message)
+        self.assertEqual(decoded[5], 10)
+        self.assertEqual(decoded[6], [(oid, value.encode()) for oid, value in var_binds])
+
+    def test_large_oid_arcs(self):
+        oid = "1.3.6.1.4.1.2435.2.3.9.4.2.1.5.5.8.0"
+        self.assertEqual(decode_message(encode_message(VERSION_1, "public", GET_RESPONSE, 1, [(oid, 0)]))[6], [(oid, 0)])
+
+    def test_truncated_message(self):
+        message = encode_message(VERSION_1, "public", GET_RESPONSE, 1, [("1.3.6.1.2.1.1.1.0", "printer")])
+        with self.assertRaises(SnmpError):
+            decode_message(message[:-3])
+        with self.assertRaises(SnmpError):
+            decode_message(b"\x02\x01\x00")
+
+
+class HashRingTests(SimpleTestCase):
+    def test_same_assignment_every_time(self):
+        first = HashRing(4)
+        second = HashRing(4)
+        self.assertEqual([first.shard_for(key) for key in range(1000)], [second.shard_for(key) for key in range(1000)])
+
+    def test_every_shard_gets_printers(self):
+        ring = HashRing(4)
+        counts = [0] * 4
+        for key in range(4000):
+            counts[ring.shard_for(key)] += 1
+        self.assertTrue(all(600 < count < 1400 for count in counts), counts)
+
+    def test_adding_a_shard_moves_few_printers(self):
+        before = HashRing(4)
+        after = HashRing(5)
+        moved = [key for key in range(5000) if before.shard_for(key) != after.shard_for(key)]
+        # About 1/5 should move, and only to the new shard.
+        self.assertLess(len(moved), 5000 * 0.3)
+        self.assertTrue(all(after.shard_for(key) == 4 for key in moved))
+
+    def test_assign(self):
+        printers = [Printer(pk=pk) for pk in range(1, 51)]
+        shards = HashRing(3).assign(printers, 3)
+        self.assertEqual(sorted(printer.pk for shard in shards for printer in shard), list(range(1, 51)))
+
+
+class ApplyProposalsTests(TestCase):
+    def setUp(self):
+        self.moved = Printer.objects.create(name="Moved", location="x", ip_address="10.0.0.5", serial_number="A")
+        self.holder = Printer.objects.create(name="Holder", location="x", ip_address="10.0.0.6", serial_number="B")
+
+    def proposals(self, new_ip):
+        return {
+            "known": [],
+            "ip_changes": [
+                {"id": f"ip:{self.moved.pk}", "printer_id": self.moved.pk, "name": "Moved", "old_ip": "10.0.0.5", "new_ip": new_ip},
+            ],
+            "new": [
+                {"id": "new:10.0.0.7", "name": "New colour", "ip_address": "10.0.0.7", "serial_number": "C",
+                 "community": "public", "type": Printer.TYPE_COLOR},
+                {"id": "new:10.0.0.8", "name": "New mono", "ip_address": "10.0.0.8", "serial_number": "D",
+                 "community": "public", "type": Printer.TYPE_BW},
+            ],
+        }
+
+    def test_only_selected_ids(self):
+        applied = apply_proposals(self.proposals("10.0.0.9"), ["new:10.0.0.7"])
+        self.assertEqual(applied, {"ip_changes": 0, "created": 1, "conflicts": []})
+        self.assertEqual(Printer.objects.get(ip_address="10.0.0.7").type, Printer.TYPE_COLOR)
+        self.assertFalse(Printer.objects.filter(ip_address="10.0.0.8").exists())
+        self.moved.refresh_from_db()
+        self.assertEqual(self.moved.ip_address, "10.0.0.5")
+
+    def test_ip_change_onto_another_printer_is_skipped(self):
+        applied = apply_proposals(self.proposals("10.0.0.6"))
+        self.assertEqual(applied["ip_changes"], 0)
+        self.assertEqual([conflict["id"] for conflict in applied["conflicts"]], [f"ip:{self.moved.pk}"])
+        self.moved.refresh_from_db()
+        self.assertEqual(self.moved.ip_address, "10.0.0.5")
+
+    def test_new_printer_on_an_address_freed_by_a_move(self):
+        proposals = self.proposals("10.0.0.9")
+        proposals["new"][0]["ip_address"] = "10.0.0.5"
+        applied = apply_proposals(proposals)
+        self.assertEqual(applied, {"ip_changes": 1, "created": 2, "conflicts": []})
+
+    def test_new_printer_on_a_taken_address_is_skipped(self):
+        proposals = self.proposals("10.0.0.9")
+        proposals["new"][1]["ip_address"] = "10.0.0.9"
+        applied = apply_proposals(proposals)
+        self.assertEqual(applied["created"], 1)
+        self.assertEqual([conflict["id"] for conflict in applied["conflicts"]], ["new:10.0.0.8"])
+
+
+class ExpireStaleJobsTests(TestCase):
+    def test_jobs_without_a_recent_heartbeat_fail(self):
+        old = timezone.now() - timedelta(minutes=10)
+        stale = PrinterRefreshJob.objects.create(status=PrinterRefreshJob.STATUS_RUNNING)
+        never_started = PrinterRefreshJob.objects.create()
+        alive = PrinterRefreshJob.objects.create(status=PrinterRefreshJob.STATUS_RUNNING, heartbeat_at=timezone.now())
+        finished = PrinterRefreshJob.objects.create(status=PrinterRefreshJob.STATUS_DONE)
+        PrinterRefreshJob.objects.filter(pk__in=[stale.pk, never_started.pk, alive.pk, finished.pk]).update(created_at=old)
+        PrinterRefreshJob.objects.filter(pk=stale.pk).update(heartbeat_at=old)
+
+        self.assertEqual(expire_stale_jobs(), 2)
+        statuses = dict(PrinterRefreshJob.objects.values_list("pk", "status"))
+        self.assertEqual(statuses[stale.pk], PrinterRefreshJob.STATUS_FAILED)
+        self.assertEqual(statuses[never_started.pk], PrinterRefreshJob.STATUS_FAILED)
+        self.assertEqual(statuses[alive.pk], PrinterRefreshJob.STATUS_RUNNING)
+        self.assertEqual(statuses[finished.pk], PrinterRefreshJob.STATUS_DONE)
+
+
+@override_settings(PRINTER_BREAKER_THRESHOLD=2)
+class RefreshViewTests(TestCase):
+    def setUp(self):
+        self.printer = Printer.objects.create(name="Recepción", location="Piso 1", ip_address="10.0.0.9")
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user("operador"))
+
+    def test_failure_is_recorded(self):
+        with mock.patch("impresoras.views.poll_and_store_printer", side_effect=PollingError("Sin respuesta")):
+            for _ in range(2):
+                response = self.client.post(f"/api/printers/{self.printer.pk}/refresh/")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["success"])
+        self.assertEqual(response.data["printer"]["consecutive_failures"], 2)
+        self.printer.refresh_from_db()
+        self.assertEqual(self.printer.consecutive_failures, 2)
+        self.assertFalse(self.printer.last_ok)
+        self.assertEqual(self.printer.last_message, "Sin respuesta")
+        self.assertIsNotNone(self.printer.breaker_open_until)
+
+
+class FleetSummarySignalTests(TestCase):
+    def test_delete_subtracts_the_stored_row(self):
+        printer = Printer.objects.create(
+            name="Recepción", location="Piso 1", ip_address="10.0.0.9", last_check=timezone.now(), last_ok=False,
+        )
+        fleet_summary()
+        stale = Printer.objects.get(pk=printer.pk)
+        printer.last_ok = True
+        printer.save()
+        stale.delete()
+        summary = fleet_summary()
+        self.assertEqual((summary["total"], summary["online"], summary["offline"]), (0, 0, 0))
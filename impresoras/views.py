@@ -1,9 +1,34 @@
+from datetime import datetime, time, timedelta
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Printer
+from rest_framework.reverse import reverse
+from rest_framework.utils.encoders import JSONEncoder
+from .discovery import DiscoveryError, apply_proposals
+from .forecast import fleet_forecast
+from .history import RESOLUTION_DAY, RESOLUTION_HOUR, RESOLUTION_RAW, level_series
+from .jobs import expire_stale_jobs, job_results, start_discovery_job, start_refresh_job, stream_job
+from .models import Printer, PrinterRefreshJob
 from .serializers import PrinterSerializer
-from .services import poll_and_store_printer, PollingError
+from .services import poll_and_store_printer, store_poll_failure, PollingError
+from .summary import fleet_summary
+
+def _parse_moment(value, end_of_day=False):
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time.max if end_of_day else time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
 
 class PrinterViewSet(viewsets.ModelViewSet):
     queryset = Printer.objects.all().order_by("name")
@@ -15,27 +40,139 @@ class PrinterViewSet(viewsets.ModelViewSet):
         printer = self.get_object()
         try:
             poll_and_store_printer(printer)
-            serializer = self.get_serializer(printer)
-            return Response({"success": True, "printer": serializer.data})
         except PollingError as exc:
-            return Response({"success": False, "error": str(exc)}, status=status.HTTP_200_OK)
-        except Exception as exc:
-            return Response({"success": False, "error": str(exc)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            # Same bookkeeping as a fleet poll: failure count, breaker, alerts
+            store_poll_failure(printer, str(exc))
+            serializer = self.get_serializer(printer)
+            return Response({"success": False, "error": str(exc), "printer": serializer.data})
+        serializer = self.get_serializer(printer)
+        return Response({"success": True, "printer": serializer.data})
 
     @action(detail=False, methods=["post"])
     def refresh_all(self, request):
-        results = []
-        any_error = False
+        job = start_refresh_job(self.get_queryset().filter(enabled=True))
+        return Response(
+            {
+                "job_id": str(job.pk),
+                "total": job.total,
+                "status": job.status,
+                "poll_url": reverse("printer-refresh-job", args=[job.pk], request=request),
+                "stream_url": reverse("printer-refresh-job-stream", args=[job.pk], request=request),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    def _get_job(self, job_id, kind=PrinterRefreshJob.KIND_REFRESH):
+        expire_stale_jobs(PrinterRefreshJob.objects.filter(pk=job_id))
+        return get_object_or_404(PrinterRefreshJob, pk=job_id, kind=kind)
+
+    @action(detail=False, methods=["get"], url_path=r"refresh_jobs/(?P<job_id>[0-9a-f-]{36})")
+    def refresh_job(self, request, job_id=None):
+        job = self._get_job(job_id)
+        try:
+            after = int(request.query_params.get("after", 0))
+        except ValueError:
+            after = 0
+        results = [
+            {
+                "seq": r.id,
+                "id": r.printer_id,
+                "ok": r.ok,
+                "error": r.error,
+                "printer": self.get_serializer(r.printer).data,
+            }
+            for r in job_results(job, after)
+        ]
+        return Response(
+            {
+                "job_id": str(job.pk),
+                "status": job.status,
+                "total": job.total,
+                "message": job.message,
+                "results": results,
+            }
+        )
+
+    @action(detail=False, methods=["get"], url_path=r"refresh_jobs/(?P<job_id>[0-9a-f-]{36})/stream")
+    def refresh_job_stream(self, request, job_id=None):
+        job = self._get_job(job_id)
+        response = StreamingHttpResponse(
+            stream_job(job, lambda printer: self.get_serializer(printer).data, encoder=JSONEncoder),
+            content_type="application/x-ndjson",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @action(detail=True, methods=["get"])
+    def history(self, request, pk=None):
+        printer = self.get_object()
+        try:
+            end = _parse_moment(request.query_params.get("end"), end_of_day=True) or timezone.now()
+            start = _parse_moment(request.query_params.get("start")) or end - timedelta(days=7)
+        except ValueError as exc:
+            return Response({"error": f"Fecha inválida: {exc}"}, status=status.HTTP_400_BAD_REQUEST)
+        resolution = request.query_params.get("resolution") or None
+        if resolution not in (None, RESOLUTION_RAW, RESOLUTION_HOUR, RESOLUTION_DAY):
+            return Response({"error": "Resolución inválida."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(level_series(printer, start, end, resolution))
+
+    @action(detail=False, methods=["get"])
+    def forecast(self, request):
         printers = self.get_queryset().filter(enabled=True)
-        for printer in printers:
-            try:
-                poll_and_store_printer(printer)
-                results.append({"id": printer.id, "ok": True})
-            except PollingError as exc:
-                any_error = True
-                results.append({"id": printer.id, "ok": False, "error": str(exc)})
-            except Exception as exc:
-                any_error = True
-                results.append({"id": printer.id, "ok": False, "error": str(exc)})
-        
-        return Response({"success": not any_error, "results": results})
+        return Response({"generated_at": timezone.now(), "printers": fleet_forecast(printers, timezone.now())})
+
+    @action(detail=False, methods=["get"])
+    def summary(self, request):
+        return Response(fleet_summary())
+
+    @action(detail=False, methods=["post"])
+    def discover(self, request):
+        networks = request.data.get("networks") or None
+        if networks is not None and not isinstance(networks, list):
+            networks = [networks]
+        try:
+            job = start_discovery_job(networks)
+        except DiscoveryError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {
+                "job_id": str(job.pk),
+                "total": job.total,
+                "status": job.status,
+                "poll_url": reverse("printer-discovery-job", args=[job.pk], request=request),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    @action(detail=False, methods=["get"], url_path=r"discovery_jobs/(?P<job_id>[0-9a-f-]{36})")
+    def discovery_job(self, request, job_id=None):
+        job = self._get_job(job_id, PrinterRefreshJob.KIND_DISCOVERY)
+        return Response(
+            {
+                "job_id": str(job.pk),
+                "status": job.status,
+                "total": job.total,
+                "message": job.message,
+                "proposals": job.data.get("proposals"),
+                "applied": job.data.get("applied"),
+            }
+        )
+
+    @action(detail=False, methods=["post"], url_path=r"discovery_jobs/(?P<job_id>[0-9a-f-]{36})/apply")
+    def apply_discovery(self, request, job_id=None):
+        job = self._get_job(job_id, PrinterRefreshJob.KIND_DISCOVERY)
+        if job.status != PrinterRefreshJob.STATUS_DONE:
+            return Response({"error": "El descubrimiento aún no termina."}, status=status.HTTP_409_CONFLICT)
+        ids = request.data.get("ids")
+        if not isinstance(ids, list) or not all(isinstance(item, str) for item in ids):
+            return Response({"error": "Indica la lista de propuestas a aplicar en ids."}, status=status.HTTP_400_BAD_REQUEST)
+        proposals = job.data["proposals"]
+        known = {item["id"] for item in proposals["ip_changes"] + proposals["new"]}
+        unknown = sorted(set(ids) - known)
+        if unknown:
+            return Response({"error": f"Propuestas desconocidas: {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+        applied = apply_proposals(proposals, ids)
+        job.data["applied"] = applied
+        job.save(update_fields=["data"])
+        return Response(applied)
@@ -0,0 +1,245 @@
+"""Sharded polling: one supervisor process, N SNMP worker processes.
+
+Every worker runs its own event loop (and so its own SNMP engine) over the
+printers the consistent-hash ring assigns to it, and sends outcomes back to
+the supervisor, which owns the database and writes them in batches.
+"""
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import pollworker
+from .history import compact_history
+from .models import Printer
+from .monitor import PrinterMonitor
+from .services import PollResult, PollWriter
+
+logger = logging.getLogger(__name__)
+
+RESTART_DELAY = 5.0
+
+class HashRing:
+    """Consistent hash of printer ids onto shards.
+
+    Each shard owns ``replicas`` points on the ring, so changing the number of
+    workers only moves about ``1/N`` of the printers.
+    """
+
+    def __init__(self, shards: int, replicas: int = 64):
+        points = []
+        for shard in range(shards):
+            for replica in range(replicas):
+                points.append((self._hash(f"{shard}:{replica}"), shard))
+        points.sort()
+        self._keys = [key for key, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+    def shard_for(self, key) -> int:
+        position = bisect.bisect(self._keys, self._hash(str(key))) % len(self._keys)
+        return self._shards[position]
+
+    def assign(self, printers: Iterable[Printer], shards: int) -> List[List[Printer]]:
+        assigned: List[List[Printer]] = [[] for _ in range(shards)]
+        for printer in printers:
+            assigned[self.shard_for(printer.pk)].append(printer)
+        return assigned
+
+# -- worker side --------------------------------------------------------------
+
+class _WorkerMonitor(PrinterMonitor):
+    """Schedules the printers of one shard and reports outcomes instead of saving them."""
+
+    def __init__(self, outbox, **options):
+        super().__init__(reload_interval=1, compact_interval=None, **options)
+        self.outbox = outbox
+        self.assigned: Dict[int, Printer] = {}
+
+    async def load_printers(self) -> List[Printer]:
+        return list(self.assigned.values())
+
+    async def store(self, printer: Printer, result: Optional[PollResult], error: Optional[str]):
+        self.outbox.put((printer.pk, result, error))
+
+async def _worker_run(inbox, outbox, options):
+    monitor = _WorkerMonitor(outbox, **options)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    async def read_inbox():
+        while True:
+            kind, payload = await loop.run_in_executor(None, inbox.get)
+            if kind == "stop":
+                stop.set()
+                return
+            if kind == "assign":
+                monitor.assigned = {printer.pk: printer for printer in payload}
+            elif kind == "update" and payload.pk in monitor.assigned:
+                # State written by the supervisor (breaker, credentials, supply map).
+                monitor.assigned[payload.pk] = payload
+
+    reader = asyncio.ensure_future(read_inbox())
+    try:
+        await monitor.run(stop)
+    finally:
+        reader.cancel()
+
+def run_worker(shard, inbox, outbox, options):
+    logger.debug("Printer poll worker %s started", shard)
+    asyncio.run(_worker_run(inbox, outbox, options))
+
+# -- supervisor side ----------------------------------------------------------
+
+class _Worker:
+    def __init__(self, shard: int):
+        self.shard = shard
+        self.process: Optional[multiprocessing.Process] = None
+        self.inbox = None
+        self.assigned: List[int] = []
+        self.started_at = 0.0
+
+class PollingSupervisor:
+    """Split the enabled printers over ``workers`` processes and store what they report.
+
+    Outcomes are written ``batch_size`` at a time with ``PollWriter``; after
+    each write the printer's new state goes back to its worker so breaker,
+    remembered credentials and supply map stay current there. A worker that
+    dies is started again with the same shard.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: float = 1.0,
+        reload_interval: float = 60,
+        compact_interval: float = 3600,
+        **monitor_options,
+    ):
+        self.count = max(1, workers or getattr(settings, "PRINTER_POLL_WORKERS", 1))
+        self.batch_size = batch_size or getattr(settings, "PRINTER_WRITE_BATCH_SIZE", 100)
+        self.flush_interval = flush_interval
+        self.reload_interval = reload_interval
+        self.compact_interval = compact_interval
+        self.monitor_options = {key: value for key, value in monitor_options.items() if value is not None}
+        self.ring = HashRing(self.count)
+        self.context = multiprocessing.get_context("spawn")
+        self.outbox = self.context.Queue()
+        self.workers = [_Worker(shard) for shard in range(self.count)]
+        self.printers: Dict[int, Printer] = {}
+
+    def _start(self, worker: _Worker):
+        worker.inbox = self.context.Queue()
+        worker.process = self.context.Process(
+            target=pollworker.main,
+            args=(worker.shard, worker.inbox, self.outbox, self.monitor_options),
+            name=f"printer-poll-{worker.shard}",
+            daemon=True,
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        worker.inbox.put(("assign", [self.printers[pk] for pk in worker.assigned if pk in self.printers]))
+
+    def _reload(self):
+        close_old_connections()
+        self.printers = {printer.pk: printer for printer in Printer.objects.filter(enabled=True)}
+        for worker, printers in zip(self.workers, self.ring.assign(self.printers.values(), self.count)):
+            ids = sorted(printer.pk for printer in printers)
+            if ids != worker.assigned:
+                worker.assigned = ids
+                if worker.inbox is not None:
+                    worker.inbox.put(("assign", printers))
+
+    def _check_workers(self):
+        for worker in self.workers:
+            if worker.process is None:
+                self._start(worker)
+            elif not worker.process.is_alive():
+                if time.monotonic() - worker.started_at < RESTART_DELAY:
+                    continue
+                logger.error(
+                    "Printer poll worker %s exited with code %s; restarting",
+                    worker.shard,
+                    worker.process.exitcode,
+                )
+                self._start(worker)
+
+    def _collect(self, timeout: float) -> list:
+        batch = []
+        deadline = time.monotonic() + timeout
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self.outbox.get(timeout=remaining) if remaining > 0 else self.outbox.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _write(self, batch: list) -> int:
+        outcomes = []
+        for pk, result, error in batch:
+            printer = self.printers.get(pk)
+            if printer is not None:  # otherwise disabled or deleted since it was assigned
+                outcomes.append((printer, result, error))
+        written = 0
+        for printer, _, _, store_error in PollWriter.write(outcomes):
+            if store_error is not None:
+                continue
+            written += 1
+            worker = self.workers[self.ring.shard_for(printer.pk)]
+            if worker.inbox is not None:
+                worker.inbox.put(("update", printer))
+        return written
+
+    def run(self, stop: threading.Event):
+        next_reload = 0.0
+        next_compact = time.monotonic() + self.compact_interval
+        try:
+            while not stop.is_set():
+                now = time.monotonic()
+                if now >= next_reload:
+                    self._reload()
+                    next_reload = now + self.reload_interval
+                if now >= next_compact:
+                    compact_history()
+                    next_compact = now + self.compact_interval
+                self._check_workers()
+                batch = self._collect(self.flush_interval)
+                if batch:
+                    self._write(batch)
+        finally:
+            self._shutdown()
+
+    def _shutdown(self):
+        for worker in self.workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.inbox.put(("stop", None))
+        deadline = time.monotonic() + 10
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            # Keep draining so a worker blocked on a full pipe can exit.
+            while worker.process.is_alive() and time.monotonic() < deadline:
+                batch = self._collect(0.2)
+                if batch:
+                    self._write(batch)
+                worker.process.join(0.1)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        batch = self._collect(0)
+        while batch:
+            self._write(batch)
+            batch = self._collect(0)
@@ -12,6 +12,8 @@ from .serializers import (
 )
 
 from establecimientos.views import EstablecimientoViewSet
+from core.mixins import SparseFieldsMixin
+from core.pagination import OptionalCursorPagination
 
 class SolicitanteViewSet(viewsets.ModelViewSet):
     queryset = Solicitante.objects.all()
@@ -26,10 +28,13 @@ class LlaveViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     search_fields = ['nombre', 'establecimiento__nombre']
 
-class PrestamoViewSet(viewsets.ModelViewSet):
-    queryset = Prestamo.objects.all()
+class PrestamoViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
+    queryset = Prestamo.objects.select_related('llave__establecimiento', 'solicitante')
     serializer_class = PrestamoSerializer
+    pagination_class = OptionalCursorPagination
     filterset_fields = ['llave', 'solicitante']
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    search_fields = ['llave__nombre', 'llave__establecimiento__nombre', 'solicitante__nombre', 'solicitante__apellido', 'solicitante__rut']
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -40,6 +40,7 @@ class RegistroPagoSerializer(serializers.ModelSerializer):
     class Meta:
         model = RegistroPago
         fields = '__all__'
+        field_paths = {'servicio_detalle': ['servicio__numero_cliente', 'servicio__proveedor__nombre']}
 
     def get_servicio_detalle(self, obj):
         return f"{obj.servicio.proveedor.nombre} - Cliente: {obj.servicio.numero_cliente}"
@@ -1,4 +1,8 @@
-from rest_framework import viewsets
+from rest_framework import filters, viewsets
+from django_filters.rest_framework import DjangoFilterBackend
+
+from core.mixins import SparseFieldsMixin
+from core.pagination import OptionalCursorPagination
 from .models import Proveedor, TipoDocumento, Servicio, TipoProveedor, RegistroPago
 from .serializers import ProveedorSerializer, TipoDocumentoSerializer, ServicioSerializer, TipoProveedorSerializer, RegistroPagoSerializer
 
@@ -15,12 +19,18 @@ class TipoDocumentoViewSet(viewsets.ModelViewSet):
     queryset = TipoDocumento.objects.all()
     serializer_class = TipoDocumentoSerializer
 
-class ServicioViewSet(viewsets.ModelViewSet):
-    queryset = Servicio.objects.all()
+class ServicioViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
+    queryset = Servicio.objects.select_related('proveedor', 'establecimiento', 'tipo_documento')
     serializer_class = ServicioSerializer
+    pagination_class = OptionalCursorPagination
     filterset_fields = ['proveedor', 'establecimiento', 'tipo_documento', 'numero_cliente']
 
-class RegistroPagoViewSet(viewsets.ModelViewSet):
-    queryset = RegistroPago.objects.all().order_by('-fecha_pago')
+class RegistroPagoViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
+    queryset = RegistroPago.objects.select_related(
+        'servicio__proveedor', 'establecimiento'
+    ).order_by('-fecha_pago')
     serializer_class = RegistroPagoSerializer
+    pagination_class = OptionalCursorPagination
     filterset_fields = ['establecimiento', 'servicio', 'fecha_pago']
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    search_fields = ['nro_documento', 'servicio__proveedor__nombre', 'servicio__numero_cliente', 'establecimiento__nombre']